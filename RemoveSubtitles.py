@@ -1,40 +1,213 @@
 #Imports
-import cv2
+import argparse
+import glob
+import json
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import cv2
 import numpy as np
-import pytesseract as pt
-from pytesseract import Output
 
-#Read single image
-#Change this to the path of the image with subtitles
-img = cv2.imread('image.jpg')
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.expanduser("~"), "Downloads", "legenda_removida")
 
 #Main Process
 #Detect subtitles, create mask, inpaint that area
-mask = np.zeros(img.shape, np.uint8)
-recogImg = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-recogImg = cv2.threshold(recogImg, 240, 255, cv2.THRESH_BINARY)[1]
-kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (7,5))
-recogImg = cv2.morphologyEx(recogImg, cv2.MORPH_CLOSE, kernel)
-recogImg = cv2.dilate(recogImg, kernel, iterations=3)
-contours, hierarchy = cv2.findContours(recogImg, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
-
-if len(contours) != 0:
-    c = max(contours, key=cv2.contourArea)
-    x,y,w,h = cv2.boundingRect(c)
-
-mask = cv2.cvtColor(mask, cv2.COLOR_BGR2GRAY)
-mask[y:y+h, x:x+w] = recogImg[y:y+h, x:x+w]
-mask = cv2.erode(mask, kernel, iterations=1)
-mask = cv2.GaussianBlur(mask, (3,3), 0)
-
-cleanedImg = cv2.inpaint(img, mask, 3, cv2.INPAINT_TELEA)
- 
-#Show all stages of process
-cv2.imshow("original", img)
-cv2.imshow("b&w", recogImg)
-cv2.imshow("mask", mask)
-cv2.imshow("clean", cleanedImg)
-
-#Press key to close
-cv2.waitKey(0)
+#Returns the b&w detection, the final mask and the cleaned image
+def remove_subtitles(img):
+    recogImg = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    recogImg = cv2.threshold(recogImg, 240, 255, cv2.THRESH_BINARY)[1]
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (7,5))
+    recogImg = cv2.morphologyEx(recogImg, cv2.MORPH_CLOSE, kernel)
+    recogImg = cv2.dilate(recogImg, kernel, iterations=3)
+    contours, hierarchy = cv2.findContours(recogImg, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+
+    #Single-channel mask straight away (no 3-channel buffer to convert)
+    mask = np.zeros(img.shape[:2], np.uint8)
+
+    #Nothing bright enough to be a subtitle: empty mask
+    if len(contours) != 0:
+        c = max(contours, key=cv2.contourArea)
+        x,y,w,h = cv2.boundingRect(c)
+        mask[y:y+h, x:x+w] = recogImg[y:y+h, x:x+w]
+
+    mask = cv2.erode(mask, kernel, iterations=1)
+    mask = cv2.GaussianBlur(mask, (3,3), 0)
+
+    cleanedImg = cv2.inpaint(img, mask, 3, cv2.INPAINT_TELEA)
+    return recogImg, mask, cleanedImg
+
+
+#Bulk mode
+#Inputs -> list of (source path, output path relative to the output folder)
+#Folders are walked recursively and keep their sub-folders in the output
+#Inputs that would land on the same output (a/x.jpg and b/x.jpg) get a number: x.jpg, x_2.jpg
+def expand_images(patterns):
+    items = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    for name in sorted(files):
+                        if name.lower().endswith(IMAGE_EXTENSIONS):
+                            src = os.path.join(root, name)
+                            items.append((src, os.path.relpath(src, path)))
+            else:
+                items.append((path, os.path.basename(path)))
+
+    seen = set()
+    used = set()
+    unique = []
+    for src, rel in items:
+        src = os.path.abspath(src)
+        if src in seen:
+            continue
+        seen.add(src)
+        if os.path.normcase(rel) in used:
+            name, ext = os.path.splitext(rel)
+            n = 2
+            while os.path.normcase(f"{name}_{n}{ext}") in used:
+                n += 1
+            rel = f"{name}_{n}{ext}"
+            print(f"Duplicate name: {src} -> {output_path(rel, '')}", file=sys.stderr)
+        used.add(os.path.normcase(rel))
+        unique.append((src, rel))
+    return unique
+
+
+def output_path(rel, output_dir):
+    name, ext = os.path.splitext(rel)
+    return os.path.join(output_dir, f"{name}_sem_legenda{ext}")
+
+
+#Worker: each process reads, cleans and writes its own image, so only paths cross processes
+#Returns (source, output, {stage: seconds}, error message or None)
+def clean_image_file(src, dst):
+    timings = {}
+    try:
+        t0 = time.perf_counter()
+        img = cv2.imread(src, cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("could not read image")
+        t1 = time.perf_counter()
+        cleanedImg = remove_subtitles(img)[2]
+        t2 = time.perf_counter()
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        if not cv2.imwrite(dst, cleanedImg):
+            raise ValueError("could not write image")
+        t3 = time.perf_counter()
+        timings = {"read": t1 - t0, "clean": t2 - t1, "write": t3 - t2}
+        return src, dst, timings, None
+    except Exception as e:
+        return src, dst, timings, f"{type(e).__name__}: {e}"
+
+
+def _init_worker():
+    #One OpenCV thread per process: the pool already uses every core
+    cv2.setNumThreads(1)
+
+
+#Cleans every image in `items` [(source, relative output)] with `processes` workers
+#At most `max_in_flight` images are queued at once, so memory does not grow with the list
+#Returns one dict per image: source, output, timings (seconds) and error (None if ok)
+def process_images(items, output_dir=DEFAULT_OUTPUT_DIR, processes=None, max_in_flight=None,
+                   progress_every=500):
+    processes = max(1, processes or os.cpu_count() or 1)
+    max_in_flight = max(processes, max_in_flight or processes * 4)
+    results = []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+        pending = set()
+        queue = iter(items)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_in_flight:
+                try:
+                    src, rel = next(queue)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(clean_image_file, src, output_path(rel, output_dir)))
+            if not pending:
+                break
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                src, dst, timings, error = future.result()
+                results.append({"source": src, "output": dst, "timings": timings, "error": error})
+                if error is not None:
+                    print(f"Failed: {src}: {error}", file=sys.stderr)
+                if progress_every and len(results) % progress_every == 0:
+                    rate = len(results) / (time.perf_counter() - start)
+                    print(f"{len(results)}/{len(items)} images ({rate:.1f} img/s)")
+
+    return results
+
+
+#Per-stage totals and percentiles (ms) of a bulk run
+def summarize(results, elapsed):
+    ok = [r for r in results if r["error"] is None]
+    lines = [f"{len(ok)} images cleaned, {len(results) - len(ok)} failed "
+             f"in {elapsed:.2f} s ({len(results) / elapsed if elapsed > 0 else 0:.1f} img/s)"]
+    for stage in ("read", "clean", "write"):
+        values = np.array([r["timings"][stage] for r in ok]) * 1000
+        if len(values):
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            lines.append(f"  {stage:<6} total {values.sum() / 1000:7.2f} s | mean {values.mean():7.2f} ms"
+                         f" | p50 {p50:7.2f} | p95 {p95:7.2f} | p99 {p99:7.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove burned-in subtitles from images in bulk.")
+    parser.add_argument("inputs", nargs="+", help="images, folders or globs (\"folder/*.jpg\")")
+    parser.add_argument("--out", default=DEFAULT_OUTPUT_DIR, help="output folder")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="worker processes")
+    parser.add_argument("--in-flight", type=int, default=None,
+                        help="max images queued at once (default: 4 per process)")
+    parser.add_argument("--report", default=None, metavar="JSON",
+                        help="write per-image timings and failures to this file")
+    args = parser.parse_args(argv)
+
+    items = expand_images(args.inputs)
+    if not items:
+        print("No images found.", file=sys.stderr)
+        return 1
+
+    print(f"{len(items)} images, {args.processes} processes -> {args.out}")
+    start = time.perf_counter()
+    results = process_images(items, args.out, args.processes, args.in_flight)
+    elapsed = time.perf_counter() - start
+    print(summarize(results, elapsed))
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"elapsed_seconds": elapsed, "processes": args.processes,
+                       "images": results}, f, indent=2)
+        print(f"Report saved to: {args.report}")
+    return 1 if any(r["error"] is not None for r in results) else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        #Bulk mode: python RemoveSubtitles.py folder/ "more/*.png" --out clean/
+        sys.exit(main())
+
+    #Read single image
+    #Change this to the path of the image with subtitles
+    img = cv2.imread('image.jpg')
+
+    recogImg, mask, cleanedImg = remove_subtitles(img)
+
+    #Show all stages of process
+    cv2.imshow("original", img)
+    cv2.imshow("b&w", recogImg)
+    cv2.imshow("mask", mask)
+    cv2.imshow("clean", cleanedImg)
+
+    #Press key to close
+    cv2.waitKey(0)
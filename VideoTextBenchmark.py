@@ -0,0 +1,1324 @@
+"""
+Medições e comparações do removedor de legendas (sem interface gráfica).
+
+Uso:
+    python VideoTextBenchmark.py seams video.mp4 [--frames 60] [--save pasta]
+    python VideoTextBenchmark.py mask-scale video.mp4 [--scales 1 0.5 0.25]
+    python VideoTextBenchmark.py kernel video.mp4 [--frames 60]
+    python VideoTextBenchmark.py fill video.mp4 [--frames 300]
+    python VideoTextBenchmark.py chunks video.mp4 [--processes 2 4]
+    python VideoTextBenchmark.py yuv video.mp4 [--frames 300]
+    python VideoTextBenchmark.py resume video.mp4 [--work pasta]
+    python VideoTextBenchmark.py sweep video.mp4 --thresh 210 230 --dilation 6 10 --density 0.75 1 [--save pasta]
+    python VideoTextBenchmark.py suite [--sizes 540x960 1080x1920] [--seconds 2 5] [--json saida.json]
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+try:
+    import resource  # só existe em Linux/macOS
+except ImportError:
+    resource = None
+
+from RemoveSubtitles import remove_subtitles
+from VideoTextEngine import (CALIBRATION_CONTRAST, CALIBRATION_MIN_BRIGHT, FFmpegPipeReader,
+                             FFmpegPipeWriter,
+                             FrameKernel, StageTimer, TemporalFill, build_text_mask,
+                             clean_frame, make_cleaner, open_at, probe_keyframes,
+                             ResumeManifest, process_video, report_path,
+                             resume_manifest_path, split_frame_ranges,
+                             subtitle_index_path, text_tiles)
+
+
+# ---------- UTILITÁRIOS ---------- #
+
+def sample_frames(video_path, count):
+    """Lê `count` frames espalhados pelo vídeo (por seek)."""
+    vid = cv2.VideoCapture(video_path)
+    if not vid.isOpened():
+        raise RuntimeError("Não foi possível abrir o vídeo.")
+
+    total = int(vid.get(cv2.CAP_PROP_FRAME_COUNT))
+    if total <= 0:
+        vid.release()
+        raise RuntimeError("Vídeo sem contagem de frames.")
+
+    frames = []
+    for idx in np.linspace(0, total - 1, min(count, total)).astype(int):
+        vid.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+        ret, frame = vid.read()
+        if ret:
+            frames.append((int(idx), frame))
+    vid.release()
+    return frames
+
+
+def band_pixels(shape, band_fracs):
+    """Converte as frações (topo, base, esq, dir) em pixels, como o process_video."""
+    h, w = shape[:2]
+    top, bottom, left, right = band_fracs
+    return int(h * top), int(h * bottom), int(w * left), int(w * right)
+
+
+def psnr(a, b):
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+# ---------- RECORTES x ROI INTEIRA ---------- #
+
+def compare_tiles(video_path, frames=60, band_fracs=(0.55, 0.95, 0.0, 1.0),
+                  thresh_val=230, min_pixels_text=150, clean_weight=0.75,
+                  dilation_iter=10, use_edges=False, save_dir=None):
+    """
+    Compara o inpainting por recortes (tile_inpaint=True) com o da ROI inteira
+    nos mesmos frames. Além da diferença geral, mede a diferença só nas bordas
+    dos recortes, que é onde uma emenda apareceria.
+    """
+    clean_args = (thresh_val, min_pixels_text, clean_weight, dilation_iter, use_edges)
+
+    report = {
+        "frames": 0, "frames_with_text": 0,
+        "max_abs_diff": 0, "mean_abs_diff": 0.0, "min_psnr": float("inf"),
+        "max_seam_diff": 0, "tile_area_frac": 0.0,
+        "full_ms": 0.0, "tiles_ms": 0.0,
+    }
+    worst = None
+
+    for idx, frame in sample_frames(video_path, frames):
+        band = band_pixels(frame.shape, band_fracs)
+        top, bottom, left, right = band
+
+        t0 = time.perf_counter()
+        full = clean_frame(frame.copy(), band, *clean_args, tile_inpaint=False)
+        t1 = time.perf_counter()
+        tiled = clean_frame(frame.copy(), band, *clean_args, tile_inpaint=True)
+        t2 = time.perf_counter()
+
+        report["frames"] += 1
+        report["full_ms"] += (t1 - t0) * 1000
+        report["tiles_ms"] += (t2 - t1) * 1000
+
+        mask = build_text_mask(frame[top:bottom, left:right],
+                               thresh_val, dilation_iter, use_edges)
+        if cv2.countNonZero(mask) <= min_pixels_text:
+            continue
+        report["frames_with_text"] += 1
+
+        tiles = text_tiles(mask)
+        roi_area = mask.shape[0] * mask.shape[1]
+        report["tile_area_frac"] += sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in tiles) / roi_area
+
+        diff = cv2.absdiff(full, tiled).max(axis=2)
+        report["mean_abs_diff"] += float(diff.mean())
+        report["min_psnr"] = min(report["min_psnr"], psnr(full, tiled))
+
+        # Anel de 2 px nas bordas de cada recorte (coordenadas do frame)
+        seam = np.zeros(diff.shape, np.uint8)
+        for x1, y1, x2, y2 in tiles:
+            cv2.rectangle(seam, (left + x1, top + y1), (left + x2 - 1, top + y2 - 1), 255, 2)
+        seam_diff = int(diff[seam > 0].max()) if seam.any() else 0
+        report["max_seam_diff"] = max(report["max_seam_diff"], seam_diff)
+
+        frame_max = int(diff.max())
+        if worst is None or frame_max > worst[0]:
+            worst = (frame_max, idx, full, tiled, diff)
+        report["max_abs_diff"] = max(report["max_abs_diff"], frame_max)
+
+    n = max(1, report["frames"])
+    n_text = max(1, report["frames_with_text"])
+    report["full_ms"] /= n
+    report["tiles_ms"] /= n
+    report["mean_abs_diff"] /= n_text
+    report["tile_area_frac"] /= n_text
+
+    if save_dir and worst is not None:
+        # Lado a lado: ROI inteira | recortes | diferença amplificada (x10)
+        os.makedirs(save_dir, exist_ok=True)
+        _, idx, full, tiled, diff = worst
+        amplified = cv2.cvtColor(cv2.convertScaleAbs(diff, alpha=10), cv2.COLOR_GRAY2BGR)
+        path = os.path.join(save_dir, f"seams_frame{idx:06d}.png")
+        cv2.imwrite(path, np.hstack([full, tiled, amplified]))
+        report["image"] = path
+
+    return report
+
+
+def print_seams_report(report):
+    print(f"Frames comparados: {report['frames']} ({report['frames_with_text']} com texto)")
+    print(f"Área dos recortes: {report['tile_area_frac'] * 100:.1f}% da ROI")
+    print(f"Diferença máxima: {report['max_abs_diff']} | média: {report['mean_abs_diff']:.4f} | "
+          f"PSNR mínimo: {report['min_psnr']:.2f} dB")
+    print(f"Diferença máxima nas bordas dos recortes (emendas): {report['max_seam_diff']}")
+    speedup = report["full_ms"] / report["tiles_ms"] if report["tiles_ms"] else 0.0
+    print(f"Tempo por frame: ROI inteira {report['full_ms']:.2f} ms | "
+          f"recortes {report['tiles_ms']:.2f} ms ({speedup:.2f}x)")
+    if "image" in report:
+        print(f"Imagem de comparação: {report['image']}")
+
+
+# ---------- MÁSCARA EM ESCALA REDUZIDA ---------- #
+
+def compare_mask_scales(video_path, scales=(1.0, 0.5, 0.25), frames=60,
+                        band_fracs=(0.55, 0.95, 0.0, 1.0), thresh_val=230,
+                        min_pixels_text=150, clean_weight=0.75,
+                        dilation_iter=10, use_edges=False):
+    """
+    Para cada escala: tempo por frame só da máscara e do frame inteiro
+    (máscara + inpainting), IoU com a máscara em resolução cheia, relação
+    de área e pixels de texto (threshold cru) que ficaram fora da máscara.
+    """
+    stats = {s: {"mask_ms": [], "frame_ms": [], "inter": 0, "union": 0,
+                 "area": 0, "ref_area": 0, "missed": 0} for s in scales}
+    text_pixels = 0
+
+    for _, frame in sample_frames(video_path, frames):
+        band = band_pixels(frame.shape, band_fracs)
+        top, bottom, left, right = band
+        roi = frame[top:bottom, left:right]
+
+        ref = build_text_mask(roi, thresh_val, dilation_iter, use_edges)
+        _, bright = cv2.threshold(cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY),
+                                  thresh_val, 255, cv2.THRESH_BINARY)
+        text_pixels += cv2.countNonZero(bright)
+
+        for scale in scales:
+            st = stats[scale]
+
+            t0 = time.perf_counter()
+            mask = build_text_mask(roi, thresh_val, dilation_iter, use_edges, scale)
+            st["mask_ms"].append((time.perf_counter() - t0) * 1000)
+
+            t0 = time.perf_counter()
+            clean_frame(frame.copy(), band, thresh_val, min_pixels_text,
+                        clean_weight, dilation_iter, use_edges, True, scale)
+            st["frame_ms"].append((time.perf_counter() - t0) * 1000)
+
+            st["inter"] += cv2.countNonZero(cv2.bitwise_and(mask, ref))
+            st["union"] += cv2.countNonZero(cv2.bitwise_or(mask, ref))
+            st["area"] += cv2.countNonZero(mask)
+            st["ref_area"] += cv2.countNonZero(ref)
+            st["missed"] += cv2.countNonZero(cv2.bitwise_and(bright, cv2.bitwise_not(mask)))
+
+    report = []
+    for scale in scales:
+        st = stats[scale]
+        report.append({
+            "scale": scale,
+            "mask_ms": float(np.mean(st["mask_ms"])) if st["mask_ms"] else 0.0,
+            "mask_ms_p95": float(np.percentile(st["mask_ms"], 95)) if st["mask_ms"] else 0.0,
+            "frame_ms": float(np.mean(st["frame_ms"])) if st["frame_ms"] else 0.0,
+            "iou": st["inter"] / st["union"] if st["union"] else 1.0,
+            "area_ratio": st["area"] / st["ref_area"] if st["ref_area"] else 1.0,
+            "missed_text_frac": st["missed"] / text_pixels if text_pixels else 0.0,
+        })
+    return report
+
+
+def print_mask_scale_report(report):
+    print(f"{'escala':>6} {'máscara ms':>11} {'p95 ms':>8} {'frame ms':>9} "
+          f"{'IoU':>6} {'área':>6} {'texto fora':>11}")
+    for r in report:
+        print(f"{r['scale']:>6.2f} {r['mask_ms']:>11.2f} {r['mask_ms_p95']:>8.2f} "
+              f"{r['frame_ms']:>9.2f} {r['iou']:>6.3f} {r['area_ratio']:>6.2f} "
+              f"{r['missed_text_frac'] * 100:>10.2f}%")
+
+
+# ---------- KERNEL DE FRAME x CÓDIGO ANTIGO ---------- #
+
+def legacy_clean_frame(frame, band, kernel, thresh_val, min_pixels_text,
+                       clean_weight, dilation_iter, use_edges):
+    """Corpo do laço do process_video antes do FrameKernel (referência para comparação)."""
+    band_top, band_bottom, band_left, band_right = band
+
+    roi = frame[band_top:band_bottom, band_left:band_right]
+    gray_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+
+    _, bin_roi = cv2.threshold(gray_roi, thresh_val, 255, cv2.THRESH_BINARY)
+    if use_edges:
+        edges = cv2.Canny(gray_roi, 50, 150)
+        bin_roi = cv2.bitwise_or(bin_roi, edges)
+
+    bin_roi = cv2.morphologyEx(bin_roi, cv2.MORPH_CLOSE, kernel)
+    if dilation_iter > 0:
+        bin_roi = cv2.dilate(bin_roi, kernel, iterations=dilation_iter)
+
+    if cv2.countNonZero(bin_roi) > min_pixels_text:
+        cleaned_roi = cv2.inpaint(roi, bin_roi, 3, cv2.INPAINT_TELEA)
+        if clean_weight >= 1.0:
+            frame[band_top:band_bottom, band_left:band_right] = cleaned_roi
+        else:
+            blended_roi = cv2.addWeighted(cleaned_roi, clean_weight, roi, 1.0 - clean_weight, 0)
+            frame[band_top:band_bottom, band_left:band_right] = blended_roi
+
+    return frame
+
+
+def _measure(fn, frames, repeat):
+    """Latências (ms) e bytes alocados a mais no pico por frame (tracemalloc)."""
+    times, peaks = [], []
+    for _, frame in frames:
+        for _ in range(repeat):
+            work = frame.copy()
+            tracemalloc.start()
+            base, _ = tracemalloc.get_traced_memory()
+            t0 = time.perf_counter()
+            fn(work)
+            times.append((time.perf_counter() - t0) * 1000)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peaks.append(peak - base)
+    return times, peaks
+
+
+def compare_kernel(video_path, frames=60, repeat=3, band_fracs=(0.55, 0.95, 0.0, 1.0),
+                   thresh_val=230, min_pixels_text=150, clean_weight=0.75,
+                   dilation_iter=10, use_edges=False):
+    """
+    Microbenchmark do FrameKernel contra o código antigo nos mesmos frames:
+    latência por frame (média/p50/p95), memória alocada por frame e se a
+    saída é idêntica.
+    """
+    sampled = sample_frames(video_path, frames)
+    band = band_pixels(sampled[0][1].shape, band_fracs)
+    kernel3 = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    frame_kernel = FrameKernel(thresh_val, min_pixels_text, clean_weight,
+                               dilation_iter, use_edges)
+
+    def legacy(frame):
+        return legacy_clean_frame(frame, band, kernel3, thresh_val, min_pixels_text,
+                                  clean_weight, dilation_iter, use_edges)
+
+    def new(frame):
+        return frame_kernel.clean(frame, band)
+
+    identical = all(np.array_equal(legacy(f.copy()), new(f.copy())) for _, f in sampled)
+
+    report = {"identical": identical}
+    for name, fn in (("legacy", legacy), ("kernel", new)):
+        fn(sampled[0][1].copy())  # aquecimento (cria os buffers do kernel)
+        times, peaks = _measure(fn, sampled, repeat)
+        report[name] = {
+            "mean_ms": float(np.mean(times)),
+            "p50_ms": float(np.percentile(times, 50)),
+            "p95_ms": float(np.percentile(times, 95)),
+            "alloc_kb": float(np.mean(peaks)) / 1024,
+        }
+    return report
+
+
+def print_kernel_report(report):
+    print(f"Saída idêntica ao código antigo: {'sim' if report['identical'] else 'NÃO'}")
+    print(f"{'':>8} {'média ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'alocado/frame':>14}")
+    for name in ("legacy", "kernel"):
+        r = report[name]
+        print(f"{name:>8} {r['mean_ms']:>9.2f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+              f"{r['alloc_kb']:>11.0f} KB")
+
+
+# ---------- PREENCHIMENTO TEMPORAL x TELEA ---------- #
+
+def compare_fill(video_path, frames=300, band_fracs=(0.55, 0.95, 0.0, 1.0),
+                 thresh_val=230, min_pixels_text=150, clean_weight=0.75,
+                 dilation_iter=10, use_edges=False, tile_inpaint=True, max_age=60):
+    """
+    Limpa os primeiros `frames` frames (em ordem) com TELEA e com o
+    preenchimento temporal: tempo de limpeza por frame, fração dos pixels
+    preenchidos de cada jeito e diferença entre as duas saídas.
+    """
+    vid = cv2.VideoCapture(video_path)
+    decoded = []
+    while len(decoded) < frames:
+        ret, frame = vid.read()
+        if not ret:
+            break
+        decoded.append(frame)
+    vid.release()
+    if not decoded:
+        raise RuntimeError("Não foi possível ler o vídeo.")
+
+    band = band_pixels(decoded[0].shape, band_fracs)
+    top, bottom, left, right = band
+    kernel = FrameKernel(thresh_val, min_pixels_text, clean_weight, dilation_iter,
+                         use_edges, tile_inpaint)
+    filler = TemporalFill(band, max_age=max_age)
+
+    times = {"telea": 0.0, "temporal": 0.0}
+    psnrs = []
+    for frame in decoded:
+        t0 = time.perf_counter()
+        telea = kernel.clean(frame.copy(), band)
+        t1 = time.perf_counter()
+        temporal = kernel.clean(frame.copy(), band, filler=filler)
+        times["telea"] += t1 - t0
+        times["temporal"] += time.perf_counter() - t1
+        if not np.array_equal(telea, frame):
+            psnrs.append(psnr(telea[top:bottom, left:right], temporal[top:bottom, left:right]))
+
+    n = len(decoded)
+    total_px = filler.temporal_pixels + filler.telea_pixels
+    return {
+        "frames": n,
+        "telea_ms": times["telea"] / n * 1000,
+        "temporal_ms": times["temporal"] / n * 1000,
+        "speedup": times["telea"] / times["temporal"] if times["temporal"] > 0 else None,
+        "temporal_share": filler.temporal_pixels / total_px if total_px else 0.0,
+        "scene_cuts": filler.scene_cuts,
+        "stale_tiles": filler.stale_tiles,
+        "mean_psnr_vs_telea": float(np.mean([p for p in psnrs if np.isfinite(p)] or [float("inf")])),
+    }
+
+
+def print_fill_report(report):
+    print(f"Frames: {report['frames']} | cortes de cena: {report['scene_cuts']} | "
+          f"recortes com fundo em movimento: {report['stale_tiles']}")
+    print(f"Pixels preenchidos: {report['temporal_share'] * 100:.1f}% de frames vizinhos, "
+          f"{(1 - report['temporal_share']) * 100:.1f}% TELEA")
+    speedup = f"{report['speedup']:.2f}x" if report["speedup"] else "-"
+    print(f"Limpeza por frame: TELEA {report['telea_ms']:.2f} ms | temporal "
+          f"{report['temporal_ms']:.2f} ms ({speedup})")
+    print(f"PSNR médio temporal x TELEA na faixa: {report['mean_psnr_vs_telea']:.1f} dB")
+
+
+# ---------- YUV420P x BGR ---------- #
+
+def compare_yuv(video_path, frames=300, band_fracs=(0.55, 0.95, 0.0, 1.0),
+                thresh_val=230, min_pixels_text=150, clean_weight=0.75,
+                dilation_iter=10, use_edges=False, tile_inpaint=True):
+    """
+    Limpa os primeiros `frames` frames pelos dois caminhos do process_video:
+    BGR do OpenCV (FrameKernel.clean) e yuv420p do ffmpeg (clean_yuv).
+    Compara frames com legenda detectada, pixels de máscara, tempo de
+    limpeza e o PSNR da faixa entre as duas saídas (a do YUV convertida
+    para BGR). O PSNR da faixa sem limpeza mede só a diferença das duas
+    decodificações, para separar da diferença da limpeza.
+    """
+    bgr_vid = cv2.VideoCapture(video_path)
+    if not bgr_vid.isOpened():
+        raise RuntimeError("Não foi possível abrir o vídeo.")
+    width = int(bgr_vid.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(bgr_vid.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    if width % 2 or height % 2:
+        bgr_vid.release()
+        raise RuntimeError("O modo YUV precisa de largura e altura pares.")
+    yuv_vid = FFmpegPipeReader(video_path, width, height, pix_fmt="yuv420p")
+
+    band = band_pixels((height, width), band_fracs)
+    top, bottom, left, right = band
+    clean_args = (thresh_val, min_pixels_text, clean_weight, dilation_iter,
+                  use_edges, tile_inpaint, 1.0)
+    timers = {"bgr": StageTimer(), "yuv": StageTimer()}
+    kernels = {name: FrameKernel(*clean_args, timer=timer) for name, timer in timers.items()}
+
+    count = both = only_bgr = only_yuv = 0
+    sse = {"cleaned": 0.0, "input": 0.0}
+    try:
+        while count < frames:
+            ok_bgr, bgr = bgr_vid.read()
+            ok_yuv, yuv = yuv_vid.read()
+            if not (ok_bgr and ok_yuv):
+                break
+            count += 1
+            before = {name: t.frames_inpainted for name, t in timers.items()}
+            decoded = cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR_I420)
+            sse["input"] += np.sum((decoded[top:bottom, left:right].astype(np.float64)
+                                    - bgr[top:bottom, left:right]) ** 2)
+
+            kernels["bgr"].clean(bgr, band)
+            kernels["yuv"].clean_yuv(yuv, band)
+            cleaned = cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR_I420)
+            sse["cleaned"] += np.sum((cleaned[top:bottom, left:right].astype(np.float64)
+                                      - bgr[top:bottom, left:right]) ** 2)
+
+            hit_bgr = timers["bgr"].frames_inpainted > before["bgr"]
+            hit_yuv = timers["yuv"].frames_inpainted > before["yuv"]
+            both += hit_bgr and hit_yuv
+            only_bgr += hit_bgr and not hit_yuv
+            only_yuv += hit_yuv and not hit_bgr
+    finally:
+        bgr_vid.release()
+        yuv_vid.release()
+    if not count:
+        raise RuntimeError("Nenhum frame lido.")
+
+    samples = count * (bottom - top) * (right - left) * 3
+    report = {"frames": count, "detected_both": both, "only_bgr": only_bgr, "only_yuv": only_yuv}
+    for key, value in sse.items():
+        mse = value / samples
+        report[f"band_psnr_{key}"] = float(10 * np.log10(255.0 ** 2 / mse)) if mse > 0 else float("inf")
+    for name, timer in timers.items():
+        stats = timer.stats()["stages"]
+        report[name] = {
+            "frames_inpainted": timer.frames_inpainted,
+            "mask_pixels": timer.mask_area,
+            "clean_ms": sum(st["total_s"] for st in stats.values()) * 1000 / count,
+        }
+    return report
+
+
+def print_yuv_report(report):
+    print(f"Frames: {report['frames']} | legenda nos dois: {report['detected_both']} | "
+          f"só BGR: {report['only_bgr']} | só YUV: {report['only_yuv']}")
+    print(f"{'':>4} {'frames limpos':>13} {'pixels de máscara':>18} {'ms/frame':>9}")
+    for name in ("bgr", "yuv"):
+        r = report[name]
+        print(f"{name:>4} {r['frames_inpainted']:>13} {r['mask_pixels']:>18} {r['clean_ms']:>9.2f}")
+    if report["bgr"]["mask_pixels"]:
+        ratio = report["yuv"]["mask_pixels"] / report["bgr"]["mask_pixels"]
+        print(f"Máscara YUV / BGR: {ratio:.3f}")
+    print(f"PSNR da faixa YUV x BGR: {report['band_psnr_cleaned']:.1f} dB limpa, "
+          f"{report['band_psnr_input']:.1f} dB sem limpeza (só a decodificação)")
+
+
+# ---------- TRECHOS x UM PROCESSO ---------- #
+
+def _cleaned_hashes(video_path, start, end, fps, band, clean_args):
+    """Hash de cada frame limpo de [start, end), lido como no _process_chunk."""
+    vid = open_at(video_path, start, fps)
+    clean = make_cleaner(band, clean_args)
+    hashes = []
+    try:
+        for idx in range(start, end):
+            ret, frame = vid.read()
+            if not ret:
+                break
+            hashes.append(hashlib.md5(clean(frame, idx)).hexdigest())
+    finally:
+        vid.release()
+    return hashes
+
+
+def compare_chunks(video_path, processes=(2, 4), band_fracs=(0.55, 0.95, 0.0, 1.0),
+                   thresh_val=230, dilation_iter=10, clean_weight=0.75, use_edges=False,
+                   tile_inpaint=True):
+    """
+    Confere se o modo em blocos limpa os mesmos frames que um processo só:
+    hash de cada frame limpo na leitura sequencial x nos trechos do
+    process_video_chunked (mesmos cortes, cada um aberto com open_at). O
+    hash é tirado antes do encoder, que codifica cada trecho de um jeito.
+    Frame repetido, pulado ou deslocado numa emenda aparece como diferença.
+    """
+    vid = cv2.VideoCapture(video_path)
+    if not vid.isOpened():
+        raise RuntimeError("Não foi possível abrir o vídeo.")
+    frame_count = int(vid.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = vid.get(cv2.CAP_PROP_FPS) or 25
+    shape = (int(vid.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(vid.get(cv2.CAP_PROP_FRAME_WIDTH)))
+    vid.release()
+
+    band = band_pixels(shape, band_fracs)
+    clean_args = (thresh_val, 150, clean_weight, dilation_iter, use_edges, tile_inpaint, 1.0)
+    serial = _cleaned_hashes(video_path, 0, frame_count, fps, band, clean_args)
+    keyframes = probe_keyframes(video_path, fps)
+
+    results = []
+    for n in processes:
+        ranges = split_frame_ranges(frame_count, n, keyframes)
+        chunked = []
+        for start, end in ranges:
+            chunked += _cleaned_hashes(video_path, start, end, fps, band, clean_args)
+        mismatched = [i for i in range(max(len(serial), len(chunked)))
+                      if i >= len(serial) or i >= len(chunked) or serial[i] != chunked[i]]
+        results.append({
+            "processes": n,
+            "ranges": ranges,
+            "frames": len(chunked),
+            "mismatched": len(mismatched),
+            "first_mismatch": mismatched[0] if mismatched else None,
+        })
+
+    return {"video": os.path.basename(video_path), "frames": len(serial), "results": results}
+
+
+def print_chunks_report(report):
+    print(f"{report['video']}: {report['frames']} frames em um processo")
+    for r in report["results"]:
+        cuts = ", ".join(str(start) for start, _ in r["ranges"][1:]) or "-"
+        if r["mismatched"]:
+            status = (f"{r['mismatched']} frames diferentes (primeiro: {r['first_mismatch']}, "
+                      f"{r['frames']} lidos)")
+        else:
+            status = "idênticos"
+        print(f"  {r['processes']} processos (cortes em {cuts}): {status}")
+
+
+# ---------- RETOMADA ---------- #
+
+def _frame_count(video_path):
+    vid = cv2.VideoCapture(video_path)
+    count = int(vid.get(cv2.CAP_PROP_FRAME_COUNT)) if vid.isOpened() else 0
+    vid.release()
+    return count
+
+
+def check_resume(video_path, work_dir="benchmark_resume", band_fracs=(0.55, 0.95, 0.0, 1.0),
+                 segment_seconds=1.0):
+    """
+    Confere se a retomada refaz o que sumiu: roda com `resume` até o fim,
+    apaga a saída e roda de novo; depois deixa o manifesto com todos os
+    segmentos prontos mas sem os arquivos deles (o que fica de uma saída
+    concluída com `complete` desmarcado) e roda outra vez. Cada etapa
+    tem que terminar com a saída no lugar e com todos os frames.
+    """
+    params = dict(zip(("band_top_frac", "band_bottom_frac", "band_left_frac", "band_right_frac"),
+                      band_fracs), output_dir=work_dir, resume=True,
+                  segment_seconds=segment_seconds)
+    expected = _frame_count(video_path)
+    steps = []
+
+    def run(name):
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                output, _ = process_video(video_path, **params)
+            error = None
+        except Exception as e:
+            output, error = None, str(e)
+        frames = _frame_count(output) if output and os.path.exists(output) else 0
+        steps.append({"step": name, "frames": frames, "ok": error is None and frames == expected,
+                      "error": error})
+        return output
+
+    output = run("primeira execução")
+    if output is not None:
+        os.remove(output)
+        run("saída apagada")
+        manifest = ResumeManifest.load(resume_manifest_path(output))
+        if manifest is not None:
+            manifest.complete = False
+            manifest.save()
+        if os.path.exists(output):
+            os.remove(output)
+        run("segmentos apagados")
+
+    return {"video": os.path.basename(video_path), "frames": expected, "steps": steps}
+
+
+def print_resume_report(report):
+    print(f"{report['video']}: {report['frames']} frames")
+    for step in report["steps"]:
+        status = "ok" if step["ok"] else (step["error"] or f"{step['frames']} frames na saída")
+        print(f"  {step['step']}: {status}")
+
+
+# ---------- VARREDURA DE PARÂMETROS ---------- #
+
+def parameter_grid(thresh_vals=(230,), dilation_iters=(10,), edges=(False,),
+                   clean_weights=(0.75,)):
+    """Todas as combinações dos valores, como dicts de argumentos do process_video."""
+    return [dict(thresh_val=t, dilation_iter=d, use_edges=bool(e), clean_weight=w)
+            for t, d, e, w in itertools.product(thresh_vals, dilation_iters, edges, clean_weights)]
+
+
+def stroke_contrast(roi, frame_height):
+    """Cinza e top-hat (quanto cada pixel é mais claro que o entorno) da ROI BGR."""
+    size = max(9, frame_height // 60) | 1
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (size, size))
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    return gray, cv2.morphologyEx(gray, cv2.MORPH_TOPHAT, kernel)
+
+
+def text_strokes(roi, frame_height):
+    """
+    Pixels de traço de letra na ROI: claros e bem mais claros que o entorno,
+    com os mesmos limites da calibração do motor. Não depende do limiar
+    testado, então serve de régua para todas as combinações.
+    """
+    gray, tophat = stroke_contrast(roi, frame_height)
+    return (tophat >= CALIBRATION_CONTRAST) & (gray >= CALIBRATION_MIN_BRIGHT)
+
+
+_sweep_bands = None  # faixas dos frames amostrados, uma cópia por processo da varredura
+_sweep_height = None  # altura do frame inteiro (tamanho do top-hat de text_strokes)
+
+
+def _init_sweep(bands, frame_height):
+    global _sweep_bands, _sweep_height
+    cv2.setNumThreads(1)  # o paralelismo é entre combinações
+    _sweep_bands = bands
+    _sweep_height = frame_height
+
+
+def _sweep_one(params, min_pixels_text, tile_inpaint, mask_scale, thumb_ids, thumb_width):
+    """Executado num processo da varredura: uma combinação em todas as faixas amostradas."""
+    timer = StageTimer()
+    kernel = FrameKernel(params["thresh_val"], min_pixels_text, params["clean_weight"],
+                         params["dilation_iter"], params["use_edges"], tile_inpaint,
+                         mask_scale, timer=timer)
+    frame_ms, thumbs = [], []
+    left_over = band_area = 0
+    for i, (idx, roi, strokes, _) in enumerate(_sweep_bands):
+        cleaned = roi.copy()
+        h, w = roi.shape[:2]
+        t0 = time.perf_counter()
+        kernel.clean(cleaned, (0, h, 0, w))
+        frame_ms.append((time.perf_counter() - t0) * 1000)
+        band_area = h * w
+        # contraste que sobrou onde havia traço: pega também o "fantasma" da densidade < 1
+        left_over += int(stroke_contrast(cleaned, _sweep_height)[1][strokes].sum(dtype=np.int64))
+        if i in thumb_ids:
+            thumbs.append(cv2.resize(cleaned, (thumb_width, max(1, h * thumb_width // w)),
+                                     interpolation=cv2.INTER_AREA))
+
+    stats = timer.stats()
+    return {
+        "params": params,
+        "frames_inpainted": stats["frames_inpainted"],
+        "mask_coverage": stats["mean_mask_area"] / band_area if band_area else 0.0,
+        "inpainted_pixels": timer.mask_area,
+        "frame_ms": float(np.mean(frame_ms)),
+        "frame_ms_p95": float(np.percentile(frame_ms, 95)),
+        "mask_ms": stats["stages"].get("mask", {}).get("mean_ms", 0.0),
+        "inpaint_ms": stats["stages"].get("inpaint", {}).get("mean_ms", 0.0),
+        "contrast_left": left_over,
+    }, thumbs
+
+
+def _label_row(label, images, label_width=260):
+    """Linha da folha de contato: texto à esquerda e as miniaturas lado a lado."""
+    lines = label.split("\n")
+    row = np.hstack(images)
+    height = max(row.shape[0], 12 + 20 * len(lines))
+    row = cv2.copyMakeBorder(row, 0, height - row.shape[0], 0, 0, cv2.BORDER_CONSTANT)
+    tag = np.full((height, label_width, 3), 32, np.uint8)
+    for i, line in enumerate(lines):
+        cv2.putText(tag, line, (8, 22 + 20 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                    (255, 255, 255), 1, cv2.LINE_AA)
+    return np.hstack([tag, row])
+
+
+def sweep_parameters(video_path, grid, frames=40, band_fracs=(0.55, 0.95, 0.0, 1.0),
+                     min_pixels_text=150, tile_inpaint=True, mask_scale=1.0,
+                     processes=None, thumbs=4, thumb_width=320, save_dir=None,
+                     max_left_over=0.05):
+    """
+    Decodifica `frames` frames espalhados uma vez só, guarda só a faixa de
+    cada um e roda cada combinação de `grid` (parameter_grid) em paralelo
+    sobre eles. Para cada combinação: cobertura da máscara, pixels
+    inpaintados, custo por frame e fração dos traços de letra que sobraram
+    (contraste top-hat nos traços de text_strokes, depois / antes; a
+    densidade < 1 deixa um fantasma que conta aqui). A recomendada é a mais barata que deixa
+    no máximo `max_left_over` do texto. Com `save_dir`, salva uma folha de
+    contato: os `thumbs` frames com mais texto, originais e limpos por combinação.
+    """
+    bands = []
+    frame_height = None
+    for idx, frame in sample_frames(video_path, frames):
+        top, bottom, left, right = band_pixels(frame.shape, band_fracs)
+        roi = frame[top:bottom, left:right].copy()
+        frame_height = frame.shape[0]
+        strokes = text_strokes(roi, frame_height)
+        contrast = int(stroke_contrast(roi, frame_height)[1][strokes].sum(dtype=np.int64))
+        bands.append((idx, roi, strokes, contrast))
+    if not bands:
+        raise RuntimeError("Nenhum frame lido.")
+
+    stroke_counts = [int(np.count_nonzero(band[2])) for band in bands]
+    text_pixels = sum(stroke_counts)
+    text_contrast = sum(band[3] for band in bands)
+    busiest = sorted(range(len(bands)), key=lambda i: stroke_counts[i], reverse=True)
+    thumb_ids = sorted(busiest[:thumbs])
+
+    processes = max(1, min(len(grid), processes or os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_sweep,
+                             initargs=(bands, frame_height)) as pool:
+        futures = [pool.submit(_sweep_one, params, min_pixels_text, tile_inpaint, mask_scale,
+                               thumb_ids, thumb_width) for params in grid]
+        outcomes = [future.result() for future in futures]
+
+    results = []
+    for result, _ in outcomes:
+        left = result.pop("contrast_left")
+        result["text_left_frac"] = left / text_contrast if text_contrast else None
+        results.append(result)
+    removes = [r for r in results
+               if r["text_left_frac"] is not None and r["text_left_frac"] <= max_left_over]
+    best = min(removes, key=lambda r: r["frame_ms"]) if removes else None
+
+    report = {"video": os.path.abspath(video_path), "frames": len(bands),
+              "text_pixels": text_pixels, "band": list(band_fracs), "processes": processes,
+              "results": results, "best": results.index(best) if best is not None else None}
+
+    if save_dir:
+        os.makedirs(save_dir, exist_ok=True)
+        originals = [cv2.resize(bands[i][1], outcomes[0][1][k].shape[1::-1],
+                                interpolation=cv2.INTER_AREA)
+                     for k, i in enumerate(thumb_ids)]
+        rows = [_label_row("original\n" + " ".join(f"#{bands[i][0]}" for i in thumb_ids), originals)]
+        for n, (result, images) in enumerate(outcomes):
+            p = result["params"]
+            mark = " *" if n == report["best"] else ""
+            rows.append(_label_row(
+                f"{n}: limiar {p['thresh_val']} dil {p['dilation_iter']}{mark}\n"
+                f"bordas {'sim' if p['use_edges'] else 'nao'} dens {p['clean_weight']:.2f}\n"
+                f"{result['frame_ms']:.1f} ms/frame\n"
+                f"texto restante {(result['text_left_frac'] or 0) * 100:.1f}%", images))
+        path = os.path.join(save_dir, "varredura.jpg")
+        cv2.imwrite(path, np.vstack(rows))
+        report["sheet"] = path
+
+    return report
+
+
+def print_sweep_report(report):
+    print(f"Frames amostrados: {report['frames']} | pixels de texto (traços): "
+          f"{report['text_pixels']} | {report['processes']} processo(s)")
+    print(f"{'#':>3} {'limiar':>6} {'dil':>4} {'bordas':>6} {'dens':>5} {'cobertura':>9} "
+          f"{'px/frame':>9} {'frames':>6} {'ms/frame':>9} {'p95':>7} {'texto rest.':>11}")
+    for n, r in enumerate(report["results"]):
+        p = r["params"]
+        per_frame = r["inpainted_pixels"] / report["frames"]
+        left = f"{r['text_left_frac'] * 100:.1f}%" if r["text_left_frac"] is not None else "-"
+        mark = " <- mais barata que remove o texto" if n == report["best"] else ""
+        print(f"{n:>3} {p['thresh_val']:>6} {p['dilation_iter']:>4} "
+              f"{'sim' if p['use_edges'] else 'não':>6} {p['clean_weight']:>5.2f} "
+              f"{r['mask_coverage'] * 100:>8.1f}% {per_frame:>9.0f} {r['frames_inpainted']:>6} "
+              f"{r['frame_ms']:>9.2f} {r['frame_ms_p95']:>7.2f} {left:>11}{mark}")
+    if report["best"] is None:
+        print("Nenhuma combinação removeu o texto dentro da tolerância.")
+    if "sheet" in report:
+        print(f"Folha de contato: {report['sheet']}")
+
+
+# ---------- SUÍTE COM VÍDEOS SINTÉTICOS ---------- #
+
+# Hershey não tem acentos: legendas só em ASCII
+SUBTITLES = [
+    "Voce viu o que aconteceu ontem?",
+    "Nao acredito que ele disse isso",
+    "Vamos embora daqui agora",
+    "Espera, tem mais uma coisa",
+    "Isso muda tudo",
+]
+SUBTITLE_FRAMES = 45  # tempo de cada legenda na tela
+GAP_FRAMES = 15       # intervalo sem legenda entre duas falas
+SUBTITLE_Y = 0.80     # linha de base da legenda (fração da altura)
+
+
+def subtitle_at(idx):
+    """Texto na tela no frame `idx` (None nos intervalos)."""
+    cycle = SUBTITLE_FRAMES + GAP_FRAMES
+    if idx % cycle >= SUBTITLE_FRAMES:
+        return None
+    return SUBTITLES[(idx // cycle) % len(SUBTITLES)]
+
+
+def synthetic_background(idx, width, height, seed=0):
+    """Fundo em movimento (gradiente, círculos e ruído) sem nenhum pixel acima de 200."""
+    t = idx / 30.0
+    y = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+    x = np.linspace(0.0, 1.0, width, dtype=np.float32)[None, :]
+    frame = np.empty((height, width, 3), np.uint8)
+    frame[..., 0] = 70 + 50 * np.sin(2 * np.pi * (x + 0.2 * t)) * np.cos(np.pi * y)
+    frame[..., 1] = 80 + 40 * np.sin(2 * np.pi * (y - 0.1 * t))
+    frame[..., 2] = 90 + 45 * np.cos(2 * np.pi * (x * y + 0.15 * t))
+
+    rng = np.random.default_rng(seed)
+    for _ in range(6):
+        cx, cy, vx, vy = rng.uniform(0, 1, 2).tolist() + rng.uniform(-0.1, 0.1, 2).tolist()
+        color = [int(c) for c in rng.integers(20, 190, 3)]
+        center = (int(((cx + vx * t) % 1.0) * width), int(((cy + vy * t) % 1.0) * height))
+        cv2.circle(frame, center, int(width * rng.uniform(0.04, 0.12)), color, -1)
+
+    noise = np.random.default_rng(seed * 100003 + idx).integers(0, 10, frame.shape, np.uint8)
+    cv2.add(frame, noise, dst=frame)
+    return np.minimum(frame, 200, out=frame)
+
+
+def _subtitle_layout(text, width, height):
+    font = cv2.FONT_HERSHEY_DUPLEX
+    longest = max(SUBTITLES, key=lambda s: cv2.getTextSize(s, font, 1.0, 1)[0][0])
+    scale = 0.9 * width / cv2.getTextSize(longest, font, 1.0, 1)[0][0]
+    thickness = max(2, int(round(scale * 2)))
+    text_w = cv2.getTextSize(text, font, scale, thickness)[0][0]
+    return font, scale, thickness, ((width - text_w) // 2, int(height * SUBTITLE_Y))
+
+
+def draw_subtitle(frame, text):
+    """Legenda branca com contorno preto, centralizada na parte de baixo (como no 9:16)."""
+    h, w = frame.shape[:2]
+    font, scale, thickness, org = _subtitle_layout(text, w, h)
+    cv2.putText(frame, text, org, font, scale, (0, 0, 0), thickness + 4, cv2.LINE_AA)
+    cv2.putText(frame, text, org, font, scale, (255, 255, 255), thickness, cv2.LINE_AA)
+    return frame
+
+
+def subtitle_truth(idx, width, height):
+    """Máscara real da legenda (texto + contorno) no frame `idx`; None se não houver legenda."""
+    text = subtitle_at(idx)
+    if text is None:
+        return None
+    mask = np.zeros((height, width), np.uint8)
+    font, scale, thickness, org = _subtitle_layout(text, width, height)
+    cv2.putText(mask, text, org, font, scale, 255, thickness + 4, cv2.LINE_AA)
+    return cv2.threshold(mask, 0, 255, cv2.THRESH_BINARY)[1]
+
+
+def make_synthetic_video(path, width, height, frames, fps=30, seed=0):
+    """Grava o vídeo sintético (MJPG) se ele ainda não existir. Mesmo seed -> mesmo vídeo."""
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    writer = cv2.VideoWriter(path + ".part.avi", cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError("Não foi possível criar o vídeo sintético.")
+    for idx in range(frames):
+        frame = synthetic_background(idx, width, height, seed)
+        text = subtitle_at(idx)
+        if text is not None:
+            draw_subtitle(frame, text)
+        writer.write(frame)
+    writer.release()
+    os.replace(path + ".part.avi", path)
+    return path
+
+
+def suite_configs(cores=None):
+    """Modos comparados pela suíte: nome -> argumentos extras do process_video."""
+    cores = cores or os.cpu_count() or 1
+    workers = max(1, cores - 1)
+    processes = max(2, min(4, cores))
+    default = dict(workers=workers, direct_ffmpeg=True, tile_inpaint=True)  # padrão da interface
+    return {
+        "serial": dict(workers=1, direct_ffmpeg=False, tile_inpaint=False),  # código original
+        "pipeline": dict(workers=workers, direct_ffmpeg=False, tile_inpaint=False),
+        "direct": dict(workers=workers, direct_ffmpeg=True, tile_inpaint=False),
+        "default": default,
+        "cache": dict(default, temporal_cache=True),
+        "index": dict(default, subtitle_index=True),
+        "detect-5": dict(default, detect_every=5),
+        "mask-50": dict(default, mask_scale=0.5),
+        "temporal": dict(default, fill_engine="temporal"),
+        "auto": dict(default, auto_calibrate=True),
+        "chunked": dict(default, processes=processes, workers=max(1, workers // processes)),
+        "yuv": dict(default, yuv=True),
+    }
+
+
+def _peak_rss_mb():
+    """Pico de memória residente deste processo ou de um filho (ffmpeg, blocos)."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _run_config(video_path, params, output_dir):
+    """Executado num processo novo (o pico de memória é só desta execução)."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        output, _ = process_video(video_path, output_dir=output_dir, report=True, **params)
+    elapsed = time.perf_counter() - start
+    with open(report_path(output), encoding="utf-8") as f:
+        job_report = json.load(f)
+    return output, elapsed, _peak_rss_mb(), job_report
+
+
+def stage_times(video_path, params, band_fracs, frames=60, work_dir="."):
+    """Tempo médio por frame (ms) de cada etapa, medidas em série nos primeiros `frames` frames."""
+    kernel = FrameKernel(params.get("thresh_val", 230), params.get("min_pixels_text", 150),
+                         params.get("clean_weight", 0.75), params.get("dilation_iter", 10),
+                         params.get("use_edges", False), params.get("tile_inpaint", False),
+                         params.get("mask_scale", 1.0))
+    vid = cv2.VideoCapture(video_path)
+    fps = vid.get(cv2.CAP_PROP_FPS) or 25
+    decoded = []
+    t0 = time.perf_counter()
+    while len(decoded) < frames:
+        ret, frame = vid.read()
+        if not ret:
+            break
+        decoded.append(frame)
+    decode = time.perf_counter() - t0
+    vid.release()
+
+    band = band_pixels(decoded[0].shape, band_fracs)
+    top, bottom, left, right = band
+    mask = clean = 0.0
+    for frame in decoded:
+        t0 = time.perf_counter()
+        kernel.text_mask(frame[top:bottom, left:right])
+        t1 = time.perf_counter()
+        kernel.clean(frame, band)
+        mask += t1 - t0
+        clean += time.perf_counter() - t1
+
+    h, w = decoded[0].shape[:2]
+    encoded_path = os.path.join(work_dir, "_etapas.mp4")
+    writer = FFmpegPipeWriter(encoded_path, w, h, fps, frame_count=len(decoded))
+    t0 = time.perf_counter()
+    for frame in decoded:
+        writer.write(frame)
+    writer.release()
+    encode = time.perf_counter() - t0
+    os.remove(encoded_path)
+
+    n = len(decoded)
+    return {
+        "decode": decode / n * 1000,
+        "mask": mask / n * 1000,
+        "inpaint": max(0.0, clean - mask) / n * 1000,
+        "encode": encode / n * 1000,
+    }
+
+
+def mask_quality(video_path, params, band_fracs, samples=20):
+    """
+    Máscara detectada x máscara real da legenda, nos frames com legenda:
+    recall (fração do texto coberta) e excesso (área extra, em múltiplos da área do texto).
+    """
+    covered = truth_px = extra = 0
+    for idx, frame in sample_frames(video_path, samples):
+        h, w = frame.shape[:2]
+        truth = subtitle_truth(idx, w, h)
+        if truth is None:
+            continue
+        top, bottom, left, right = band_pixels(frame.shape, band_fracs)
+        detected = np.zeros((h, w), np.uint8)
+        detected[top:bottom, left:right] = build_text_mask(
+            frame[top:bottom, left:right], params.get("thresh_val", 230),
+            params.get("dilation_iter", 10), params.get("use_edges", False),
+            params.get("mask_scale", 1.0))
+        hit = cv2.countNonZero(cv2.bitwise_and(detected, truth))
+        covered += hit
+        truth_px += cv2.countNonZero(truth)
+        extra += cv2.countNonZero(detected) - hit
+    return {"recall": covered / truth_px if truth_px else None,
+            "excess": extra / truth_px if truth_px else None}
+
+
+def output_quality(output_path, band_fracs, seed=0, samples=20):
+    """
+    Saída x fundo limpo (conhecido no vídeo sintético), nos frames com legenda:
+    PSNR na faixa e diferença média onde estava o texto (resíduo da legenda).
+    """
+    psnrs, residuals = [], []
+    for idx, frame in sample_frames(output_path, samples):
+        h, w = frame.shape[:2]
+        truth = subtitle_truth(idx, w, h)
+        if truth is None:
+            continue
+        background = synthetic_background(idx, w, h, seed)
+        top, bottom, left, right = band_pixels(frame.shape, band_fracs)
+        psnrs.append(psnr(frame[top:bottom, left:right], background[top:bottom, left:right]))
+        diff = cv2.absdiff(frame, background).max(axis=2)
+        residuals.append(float(diff[truth > 0].mean()))
+    return {"band_psnr": float(np.mean(psnrs)) if psnrs else None,
+            "text_residual": float(np.mean(residuals)) if residuals else None}
+
+
+def image_benchmark(width=1080, height=1920, repeat=5, seed=0):
+    """Caminho de imagem única: RemoveSubtitles.py x clean_frame do motor, na mesma imagem."""
+    background = synthetic_background(0, width, height, seed)
+    image = draw_subtitle(background.copy(), subtitle_at(0))
+    truth = subtitle_truth(0, width, height)
+    band = band_pixels(image.shape, (0.55, 0.95, 0.0, 1.0))
+
+    def quality(cleaned):
+        diff = cv2.absdiff(cleaned, background).max(axis=2)
+        return {"psnr": psnr(cleaned, background), "text_residual": float(diff[truth > 0].mean())}
+
+    report = {"size": f"{width}x{height}"}
+    for name, fn in (("RemoveSubtitles", lambda img: remove_subtitles(img)[2]),
+                     ("engine", lambda img: clean_frame(img, band, tile_inpaint=True))):
+        times = []
+        for _ in range(repeat):
+            work = image.copy()
+            t0 = time.perf_counter()
+            cleaned = fn(work)
+            times.append((time.perf_counter() - t0) * 1000)
+        report[name] = dict(ms=float(np.median(times)), **quality(cleaned))
+    return report
+
+
+def run_suite(sizes=((540, 960), (1080, 1920)), seconds=(2, 5), fps=30, configs=None,
+              work_dir="benchmark_videos", band_fracs=(0.55, 0.95, 0.0, 1.0), seed=0):
+    """
+    Gera os vídeos sintéticos e roda cada modo em cada um.
+    Retorna um dict pronto para JSON (uma execução = uma entrada em "runs").
+    """
+    all_configs = suite_configs()
+    configs = configs or list(all_configs)
+    output_dir = os.path.join(work_dir, "saidas")
+    band = dict(zip(("band_top_frac", "band_bottom_frac", "band_left_frac", "band_right_frac"),
+                    band_fracs))
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "cores": os.cpu_count(),
+        "runs": [],
+        "chunks": [],
+        "yuv": [],
+    }
+    spawn = multiprocessing.get_context("spawn")
+
+    for width, height in sizes:
+        for secs in seconds:
+            frames = int(secs * fps)
+            video = make_synthetic_video(
+                os.path.join(work_dir, f"sintetico_{width}x{height}_{frames}f.avi"),
+                width, height, frames, fps, seed)
+            if "chunked" in configs:
+                # O modo em blocos tem que limpar os mesmos frames que um processo só
+                chunk_processes = all_configs["chunked"]["processes"]
+                report["chunks"].append(compare_chunks(video, (chunk_processes,), band_fracs))
+            if "yuv" in configs:
+                # O modo YUV contra a saída BGR de sempre, frame a frame
+                yuv_report = compare_yuv(video, frames, band_fracs)
+                yuv_report["video"] = os.path.basename(video)
+                report["yuv"].append(yuv_report)
+            for name in configs:
+                params = dict(band, **all_configs[name])
+                # O índice salvo ao lado do vídeo seria reaproveitado: mede a pré-análise também
+                if os.path.exists(subtitle_index_path(video)):
+                    os.remove(subtitle_index_path(video))
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                    output, elapsed, rss, job_report = pool.submit(
+                        _run_config, video, params, output_dir).result()
+                # Com a calibração, mede com a faixa e o limiar que o process_video usou
+                used = job_report["params"]
+                run_band = tuple(used["band"])
+                run_params = dict(params, thresh_val=used["thresh_val"])
+                run = {
+                    "video": os.path.basename(video),
+                    "size": f"{width}x{height}",
+                    "frames": frames,
+                    "config": name,
+                    "params": all_configs[name],
+                    "seconds": elapsed,
+                    "fps": frames / elapsed,
+                    "peak_rss_mb": rss,
+                    "band": list(run_band),
+                    "stages_ms": stage_times(video, run_params, run_band, work_dir=work_dir),
+                    # Tempos medidos dentro do process_video (somados entre threads)
+                    "job_stages": job_report["stages"],
+                    "frames_inpainted": job_report["frames_inpainted"],
+                    "frames_passed": job_report["frames_passed"],
+                    "mask": mask_quality(video, run_params, run_band),
+                    "output": output_quality(output, band_fracs, seed),
+                }
+                report["runs"].append(run)
+                print(f"{run['size']:>10} {frames:>5}f {name:>9}: {run['fps']:7.1f} fps")
+
+    report["image"] = image_benchmark(seed=seed)
+    return report
+
+
+def print_suite_report(report):
+    print(f"\n{report['platform']} | {report['cores']} núcleos | OpenCV {report['opencv']}")
+    print(f"{'vídeo':>16} {'modo':>9} {'fps':>7} {'RSS MB':>7} {'dec':>6} {'másc':>6} "
+          f"{'inp':>6} {'cod':>6} {'recall':>7} {'excesso':>8} {'PSNR':>6} {'resíduo':>8}")
+    for run in report["runs"]:
+        st, mq, oq = run["stages_ms"], run["mask"], run["output"]
+        rss = f"{run['peak_rss_mb']:.0f}" if run["peak_rss_mb"] is not None else "-"
+        print(f"{run['size'] + '/' + str(run['frames']):>16} {run['config']:>9} {run['fps']:>7.1f} "
+              f"{rss:>7} {st['decode']:>6.1f} {st['mask']:>6.1f} {st['inpaint']:>6.1f} "
+              f"{st['encode']:>6.1f} {mq['recall'] or 0:>7.3f} {mq['excess'] or 0:>8.2f} "
+              f"{oq['band_psnr'] or 0:>6.1f} {oq['text_residual'] or 0:>8.1f}")
+    if report.get("chunks"):
+        print("\nTrechos x um processo (hash dos frames limpos):")
+        for chunks in report["chunks"]:
+            print_chunks_report(chunks)
+    for yuv_report in report.get("yuv", []):
+        print(f"\nYUV x BGR ({yuv_report['video']}):")
+        print_yuv_report(yuv_report)
+    image = report["image"]
+    print(f"\nImagem {image['size']}:")
+    for name in ("RemoveSubtitles", "engine"):
+        r = image[name]
+        print(f"{name:>16}: {r['ms']:7.1f} ms | PSNR {r['psnr']:.1f} dB | resíduo {r['text_residual']:.1f}")
+
+
+def parse_size(text):
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+# ---------- LINHA DE COMANDO ---------- #
+
+def main():
+    parser = argparse.ArgumentParser(description="Medições do removedor de legendas")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seams = sub.add_parser("seams", help="compara inpainting por recortes com a ROI inteira")
+    seams.add_argument("video")
+    seams.add_argument("--frames", type=int, default=60)
+    seams.add_argument("--band", type=float, nargs=4, default=(0.55, 0.95, 0.0, 1.0),
+                       metavar=("TOPO", "BASE", "ESQ", "DIR"))
+    seams.add_argument("--thresh", type=int, default=230)
+    seams.add_argument("--dilation", type=int, default=10)
+    seams.add_argument("--density", type=float, default=0.75)
+    seams.add_argument("--edges", action="store_true")
+    seams.add_argument("--save", help="pasta para salvar a imagem do pior frame")
+
+    mask_scale = sub.add_parser("mask-scale", help="tempo e IoU da máscara em escala reduzida")
+    mask_scale.add_argument("video")
+    mask_scale.add_argument("--scales", type=float, nargs="+", default=(1.0, 0.5, 0.25))
+    mask_scale.add_argument("--frames", type=int, default=60)
+    mask_scale.add_argument("--band", type=float, nargs=4, default=(0.55, 0.95, 0.0, 1.0),
+                            metavar=("TOPO", "BASE", "ESQ", "DIR"))
+    mask_scale.add_argument("--thresh", type=int, default=230)
+    mask_scale.add_argument("--dilation", type=int, default=10)
+    mask_scale.add_argument("--edges", action="store_true")
+
+    kernel = sub.add_parser("kernel", help="FrameKernel x código antigo (latência e alocações)")
+    kernel.add_argument("video")
+    kernel.add_argument("--frames", type=int, default=60)
+    kernel.add_argument("--repeat", type=int, default=3)
+    kernel.add_argument("--band", type=float, nargs=4, default=(0.55, 0.95, 0.0, 1.0),
+                        metavar=("TOPO", "BASE", "ESQ", "DIR"))
+    kernel.add_argument("--thresh", type=int, default=230)
+    kernel.add_argument("--dilation", type=int, default=10)
+    kernel.add_argument("--density", type=float, default=0.75)
+    kernel.add_argument("--edges", action="store_true")
+
+    fill = sub.add_parser("fill", help="preenchimento temporal x TELEA (tempo e pixels de cada um)")
+    fill.add_argument("video")
+    fill.add_argument("--frames", type=int, default=300)
+    fill.add_argument("--max-age", type=int, default=60)
+    fill.add_argument("--band", type=float, nargs=4, default=(0.55, 0.95, 0.0, 1.0),
+                      metavar=("TOPO", "BASE", "ESQ", "DIR"))
+    fill.add_argument("--thresh", type=int, default=230)
+    fill.add_argument("--dilation", type=int, default=10)
+    fill.add_argument("--density", type=float, default=0.75)
+    fill.add_argument("--edges", action="store_true")
+
+    chunks = sub.add_parser("chunks", help="confere se os trechos do modo em blocos limpam "
+                                           "os mesmos frames que um processo só")
+    chunks.add_argument("video")
+    chunks.add_argument("--processes", type=int, nargs="+", default=[2, 4])
+    chunks.add_argument("--band", type=float, nargs=4, default=(0.55, 0.95, 0.0, 1.0),
+                        metavar=("TOPO", "BASE", "ESQ", "DIR"))
+    chunks.add_argument("--thresh", type=int, default=230)
+    chunks.add_argument("--dilation", type=int, default=10)
+    chunks.add_argument("--density", type=float, default=0.75)
+    chunks.add_argument("--edges", action="store_true")
+
+    yuv = sub.add_parser("yuv", help="compara a limpeza em yuv420p com a de BGR")
+    yuv.add_argument("video")
+    yuv.add_argument("--frames", type=int, default=300)
+    yuv.add_argument("--band", type=float, nargs=4, default=(0.55, 0.95, 0.0, 1.0),
+                     metavar=("TOPO", "BASE", "ESQ", "DIR"))
+    yuv.add_argument("--thresh", type=int, default=230)
+    yuv.add_argument("--dilation", type=int, default=10)
+    yuv.add_argument("--density", type=float, default=0.75)
+    yuv.add_argument("--edges", action="store_true")
+
+    resume = sub.add_parser("resume", help="confere se a retomada refaz a saída ou os "
+                                           "segmentos apagados")
+    resume.add_argument("video")
+    resume.add_argument("--band", type=float, nargs=4, default=(0.55, 0.95, 0.0, 1.0),
+                        metavar=("TOPO", "BASE", "ESQ", "DIR"))
+    resume.add_argument("--work", default="benchmark_resume", help="pasta das saídas")
+
+    sweep = sub.add_parser("sweep", help="testa combinações de limiar/dilatação/bordas/densidade "
+                                         "em frames decodificados uma vez")
+    sweep.add_argument("video")
+    sweep.add_argument("--frames", type=int, default=40)
+    sweep.add_argument("--band", type=float, nargs=4, default=(0.55, 0.95, 0.0, 1.0),
+                       metavar=("TOPO", "BASE", "ESQ", "DIR"))
+    sweep.add_argument("--thresh", type=int, nargs="+", default=[230])
+    sweep.add_argument("--dilation", type=int, nargs="+", default=[10])
+    sweep.add_argument("--edges", type=int, nargs="+", choices=(0, 1), default=[0],
+                       help="0 sem Canny, 1 com (ex.: --edges 0 1 testa os dois)")
+    sweep.add_argument("--density", type=float, nargs="+", default=[0.75])
+    sweep.add_argument("--mask-scale", type=float, default=1.0)
+    sweep.add_argument("--no-tiles", action="store_true")
+    sweep.add_argument("--processes", type=int, default=None)
+    sweep.add_argument("--max-left", type=float, default=0.05,
+                       help="fração de texto restante aceita para recomendar uma combinação")
+    sweep.add_argument("--save", help="pasta para a folha de contato")
+    sweep.add_argument("--json", help="grava o resultado neste arquivo JSON")
+
+    suite = sub.add_parser("suite", help="vídeos sintéticos: fps, etapas, memória e qualidade por modo")
+    suite.add_argument("--sizes", type=parse_size, nargs="+",
+                       default=[(540, 960), (1080, 1920)], metavar="LxA")
+    suite.add_argument("--seconds", type=float, nargs="+", default=(2, 5))
+    suite.add_argument("--fps", type=int, default=30)
+    suite.add_argument("--configs", nargs="+", choices=list(suite_configs()),
+                       help="modos a rodar (padrão: todos)")
+    suite.add_argument("--work", default="benchmark_videos",
+                       help="pasta dos vídeos sintéticos e saídas")
+    suite.add_argument("--json", help="grava o resultado neste arquivo JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "seams":
+        report = compare_tiles(args.video, frames=args.frames, band_fracs=args.band,
+                               thresh_val=args.thresh, clean_weight=args.density,
+                               dilation_iter=args.dilation, use_edges=args.edges,
+                               save_dir=args.save)
+        print_seams_report(report)
+    elif args.command == "mask-scale":
+        report = compare_mask_scales(args.video, scales=args.scales, frames=args.frames,
+                                     band_fracs=args.band, thresh_val=args.thresh,
+                                     dilation_iter=args.dilation, use_edges=args.edges)
+        print_mask_scale_report(report)
+    elif args.command == "kernel":
+        report = compare_kernel(args.video, frames=args.frames, repeat=args.repeat,
+                                band_fracs=args.band, thresh_val=args.thresh,
+                                clean_weight=args.density, dilation_iter=args.dilation,
+                                use_edges=args.edges)
+        print_kernel_report(report)
+    elif args.command == "fill":
+        report = compare_fill(args.video, frames=args.frames, band_fracs=args.band,
+                              thresh_val=args.thresh, clean_weight=args.density,
+                              dilation_iter=args.dilation, use_edges=args.edges,
+                              max_age=args.max_age)
+        print_fill_report(report)
+    elif args.command == "chunks":
+        report = compare_chunks(args.video, args.processes, args.band, args.thresh,
+                                args.dilation, args.density, args.edges)
+        print_chunks_report(report)
+        if any(r["mismatched"] for r in report["results"]):
+            return 1
+    elif args.command == "yuv":
+        print_yuv_report(compare_yuv(args.video, args.frames, args.band, args.thresh,
+                                     clean_weight=args.density, dilation_iter=args.dilation,
+                                     use_edges=args.edges))
+    elif args.command == "resume":
+        report = check_resume(args.video, args.work, args.band)
+        print_resume_report(report)
+        if not all(step["ok"] for step in report["steps"]):
+            return 1
+    elif args.command == "sweep":
+        grid = parameter_grid(args.thresh, args.dilation, args.edges, args.density)
+        report = sweep_parameters(args.video, grid, frames=args.frames, band_fracs=args.band,
+                                  tile_inpaint=not args.no_tiles, mask_scale=args.mask_scale,
+                                  processes=args.processes, save_dir=args.save,
+                                  max_left_over=args.max_left)
+        print_sweep_report(report)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nResultado salvo em: {args.json}")
+    elif args.command == "suite":
+        report = run_suite(sizes=args.sizes, seconds=args.seconds, fps=args.fps,
+                           configs=args.configs, work_dir=args.work)
+        print_suite_report(report)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nResultado salvo em: {args.json}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3769 @@
+"""
+Motor do removedor de legendas: processamento sem interface gráfica.
+
+Pode ser importado (process_video, run_batch, ...) ou usado pela linha de comando:
+    python VideoTextEngine.py video.mp4 "pasta/*.mov" --band 0.55 0.95 0 1 --out saida
+"""
+
+import os
+import sys
+import glob
+import hashlib
+import time
+import json
+import queue
+import shutil
+import bisect
+import argparse
+import contextlib
+import importlib
+import subprocess
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+
+class _LazyModule:
+    """Importa o módulo só no primeiro uso (importar o motor não carrega o OpenCV)."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+cv2 = _LazyModule("cv2")
+np = _LazyModule("numpy")
+
+# ---------- LIMPEZA DE UM FRAME ---------- #
+
+INPAINT_RADIUS = 3
+
+# Contexto em volta de cada recorte. O TELEA só olha vizinhos a até
+# INPAINT_RADIUS pixels da máscara, então com essa margem o resultado do
+# recorte é idêntico ao da ROI inteira (sem emendas)
+TILE_MARGIN = 2 * INPAINT_RADIUS + 2
+
+
+def text_tiles(mask, margin=TILE_MARGIN):
+    """
+    Retângulos (x1, y1, x2, y2) ao redor dos componentes conexos da máscara,
+    com `margin` pixels de contexto. Retângulos que se encostam são unidos
+    até nenhum se sobrepor, então cada componente fica inteiro num só recorte.
+    """
+    h, w = mask.shape[:2]
+    n, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+
+    tiles = [[max(0, x - margin), max(0, y - margin),
+              min(w, x + bw + margin), min(h, y + bh + margin)]
+             for x, y, bw, bh, _ in stats[1:n]]
+
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for tile in tiles:
+            for other in result:
+                if (tile[0] < other[2] and other[0] < tile[2] and
+                        tile[1] < other[3] and other[1] < tile[3]):
+                    other[:] = [min(tile[0], other[0]), min(tile[1], other[1]),
+                                max(tile[2], other[2]), max(tile[3], other[3])]
+                    merged = True
+                    break
+            else:
+                result.append(tile)
+        tiles = result
+
+    return [tuple(t) for t in tiles]
+
+
+# ---------- CACHE TEMPORAL ---------- #
+
+class TemporalCache:
+    """
+    Reaproveita a máscara e o inpainting do frame anterior enquanto a legenda
+    não muda. Uma linha de legenda costuma ficar 30-120 frames na tela.
+
+    O cache vale quando:
+      - a máscara crua (threshold) difere da anterior em no máximo
+        `mask_tolerance` dos pixels de texto;
+      - o fundo no anel em volta da máscara (de onde o TELEA tira as cores)
+        mudou em média no máximo `bg_tolerance` níveis de cinza;
+      - não houve corte de cena (miniatura da ROI mudou mais que `cut_threshold`).
+    """
+
+    def __init__(self, mask_tolerance=0.02, bg_tolerance=3.0, cut_threshold=30.0):
+        self.mask_tolerance = mask_tolerance
+        self.bg_tolerance = bg_tolerance
+        self.cut_threshold = cut_threshold
+
+        self.hits = 0
+        self.misses = 0
+        self.scene_cuts = 0
+
+        self._entry = None
+        self._thumb = None
+
+    def lookup(self, gray_roi, raw_mask):
+        """Retorna (máscara, ROI inpaintada) do frame anterior se ainda valerem, senão None."""
+        self._check_scene_cut(gray_roi)
+
+        entry = self._entry
+        if entry is None or entry["gray"].shape != gray_roi.shape:
+            return None
+
+        changed = cv2.countNonZero(cv2.bitwise_xor(raw_mask, entry["raw"]))
+        if changed > self.mask_tolerance * max(1, entry["raw_count"]):
+            return None
+
+        ring_diff = cv2.mean(cv2.absdiff(gray_roi, entry["gray"]), mask=entry["ring"])[0]
+        if ring_diff > self.bg_tolerance:
+            return None
+
+        return entry["mask"], entry["filled"]
+
+    def store(self, gray_roi, raw_mask, mask, filled):
+        """Guarda (copiando, pois os buffers do FrameKernel são reaproveitados) o frame atual."""
+        size = 2 * INPAINT_RADIUS + 1
+        ring_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (size, size))
+        ring = cv2.subtract(cv2.dilate(mask, ring_kernel), mask)
+
+        self._entry = {
+            "raw": raw_mask.copy(),
+            "raw_count": cv2.countNonZero(raw_mask),
+            "mask": mask.copy(),
+            "ring": ring,
+            "gray": gray_roi.copy(),
+            "filled": filled.copy(),
+        }
+
+    def reset(self):
+        self._entry = None
+
+    def summary(self):
+        total = self.hits + self.misses
+        saved = (self.hits / total * 100) if total else 0.0
+        return (f"Cache temporal: {self.hits} reaproveitados, {self.misses} recalculados "
+                f"({saved:.1f}% do inpainting evitado), {self.scene_cuts} cortes de cena")
+
+    def _check_scene_cut(self, gray_roi):
+        cut, self._thumb = scene_cut(gray_roi, self._thumb, self.cut_threshold)
+        if cut:
+            self.scene_cuts += 1
+            self._entry = None
+
+
+class MaskPropagation:
+    """
+    Detecção espaçada: a detecção completa (limiar, bordas, fechamento e
+    dilatação) roda no máximo a cada `every` frames e, no meio, a máscara
+    da última detecção é reaproveitada. A legenda só muda de lugar quando
+    troca de linha.
+
+    O sinal para redetectar antes é só o limiar, numa amostra da faixa (um
+    pixel a cada `step` em cada direção): se os pixels claros diferem dos da
+    última detecção em mais de `change_tolerance` dos pixels claros de lá
+    (ou de `min_change` pixels da amostra), a legenda entrou, saiu ou
+    trocou, e a detecção roda no mesmo frame. Os frames precisam chegar em ordem.
+    """
+
+    def __init__(self, every=5, change_tolerance=0.05, min_change=8, step=4):
+        self.every = max(1, int(every))
+        self.change_tolerance = change_tolerance
+        self.min_change = min_change
+        self.step = max(1, int(step))
+
+        self.detections = 0
+        self.propagated = 0
+        self.triggered = 0  # redetecções antes dos `every` frames, pelo sinal
+
+        self._entry = None
+
+    def lookup(self, bright):
+        """(crua, máscara) da última detecção se ainda valem para a amostra de pixels claros `bright`, senão None."""
+        entry = self._entry
+        if entry is None or entry["bright"].shape != bright.shape or entry["age"] >= self.every:
+            return None
+
+        changed = cv2.countNonZero(cv2.bitwise_xor(bright, entry["bright"]))
+        if changed > max(self.min_change, self.change_tolerance * entry["count"]):
+            self.triggered += 1
+            return None
+
+        entry["age"] += 1
+        self.propagated += 1
+        return entry["raw"], entry["mask"]
+
+    def store(self, bright, raw, mask):
+        """Guarda (copiando, pois os buffers do FrameKernel são reaproveitados) uma detecção completa."""
+        self.detections += 1
+        self._entry = {
+            "bright": bright.copy(),
+            "count": cv2.countNonZero(bright),
+            "raw": raw.copy(),
+            "mask": mask.copy(),
+            "age": 1,
+        }
+
+    def stats(self):
+        return {"every": self.every, "detections": self.detections,
+                "propagated": self.propagated, "triggered": self.triggered}
+
+    def summary(self):
+        total = self.detections + self.propagated
+        saved = (self.propagated / total * 100) if total else 0.0
+        return (f"Detecção espaçada (a cada {self.every}): {self.propagated} frames com máscara "
+                f"propagada ({saved:.1f}%), {self.detections} detecções, "
+                f"{self.triggered} antecipadas por mudança no texto")
+
+
+def scene_cut(gray_roi, prev_thumb, threshold):
+    """(houve corte de cena?, miniatura da ROI): a miniatura mudou mais que `threshold` em relação a `prev_thumb`."""
+    thumb = cv2.resize(gray_roi, None, fx=0.125, fy=0.125, interpolation=cv2.INTER_AREA)
+    cut = (prev_thumb is not None and thumb.shape == prev_thumb.shape and
+           cv2.absdiff(thumb, prev_thumb).mean() > threshold)
+    return cut, thumb
+
+
+# ---------- PREENCHIMENTO TEMPORAL ---------- #
+
+FILL_ENGINES = ("telea", "temporal")
+
+
+class TemporalFill:
+    """
+    Alternativa ao TELEA para cenas paradas ou lentas: o pixel embaixo da
+    legenda costuma aparecer limpo em frames próximos (entre uma fala e
+    outra, ou quando a legenda muda de tamanho). Guarda, para cada pixel da
+    faixa `band`, a cor e o frame da última vez em que ele foi visto fora da
+    máscara. Os pixels mascarados vistos há no máximo `max_age` frames vêm
+    dessa memória; o resto passa pelo TELEA.
+
+    Para não colar fundo velho numa cena que se mexeu, cada recorte compara
+    a miniatura do fundo de agora com a do frame mais antigo que ele usaria:
+    se mudou mais que `bg_tolerance` níveis de cinza, o recorte vai todo
+    para o TELEA.
+
+    Os frames precisam chegar em ordem (uma thread de limpeza) e todos
+    precisam passar por `observe`, inclusive os sem legenda.
+    """
+
+    NEVER = -(2 ** 30)
+    THUMB_SCALE = 8  # miniatura do fundo: 1 pixel a cada 8x8
+
+    def __init__(self, band, max_age=60, bg_tolerance=3.0, cut_threshold=30.0):
+        self.band = band
+        self.max_age = max_age
+        self.bg_tolerance = bg_tolerance
+        self.cut_threshold = cut_threshold
+
+        self.temporal_pixels = 0
+        self.telea_pixels = 0
+        self.stale_tiles = 0
+        self.scene_cuts = 0
+
+        band_top, band_bottom, band_left, band_right = band
+        h, w = band_bottom - band_top, band_right - band_left
+        self._frame = 0
+        self._background = np.zeros((h, w, 3), np.uint8)
+        self._last_seen = np.full((h, w), self.NEVER, np.int32)
+        self._gray = np.empty((h, w), np.uint8)
+        self._thumb_size = (max(1, w // self.THUMB_SCALE), max(1, h // self.THUMB_SCALE))
+        self._thumbs = deque(maxlen=max_age + 1)  # miniaturas do fundo, a mais nova no fim
+        self._cut_thumb = None
+
+    def _region(self, origin, h, w):
+        top = origin[0] - self.band[0]
+        left = origin[1] - self.band[2]
+        return slice(top, top + h), slice(left, left + w)
+
+    def observe(self, roi, mask, origin, gray_roi=None):
+        """
+        Registra os pixels da ROI (que começa em `origin`, em coordenadas do frame)
+        fora da máscara; todos, se `mask` for None. Uma vez por frame, antes do fill.
+        """
+        self._frame += 1
+
+        if gray_roi is not None:
+            cut, self._cut_thumb = scene_cut(gray_roi, self._cut_thumb, self.cut_threshold)
+            if cut:
+                # O que foi visto antes do corte não vale para a cena nova
+                self.scene_cuts += 1
+                self._last_seen.fill(self.NEVER)
+                self._thumbs.clear()
+
+        rows, cols = self._region(origin, *roi.shape[:2])
+        background = self._background[rows, cols]
+        last_seen = self._last_seen[rows, cols]
+        if mask is None:
+            background[:] = roi
+            last_seen.fill(self._frame)
+        else:
+            clean = mask == 0
+            np.copyto(background, roi, where=clean[..., None])
+            last_seen[clean] = self._frame
+
+        cv2.cvtColor(self._background, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        self._thumbs.append(cv2.resize(self._gray, self._thumb_size,
+                                       interpolation=cv2.INTER_AREA))
+
+    def _drift(self, rows, cols, age):
+        """Mudança média da miniatura do fundo no recorte nos últimos `age` frames (None se não houver)."""
+        if age >= len(self._thumbs):
+            return None
+        s = self.THUMB_SCALE
+        th, tw = self._thumbs[-1].shape
+        y1, y2 = min(rows.start // s, th - 1), min(max(rows.stop // s, rows.start // s + 1), th)
+        x1, x2 = min(cols.start // s, tw - 1), min(max(cols.stop // s, cols.start // s + 1), tw)
+        now = self._thumbs[-1][y1:y2, x1:x2]
+        past = self._thumbs[-1 - age][y1:y2, x1:x2]
+        return cv2.absdiff(now, past).mean()
+
+    def fill(self, tile, tile_mask, origin, dst):
+        """Preenche os pixels mascarados do recorte em `dst`: da memória quando possível, senão TELEA."""
+        rows, cols = self._region(origin, *tile_mask.shape)
+        masked = tile_mask > 0
+        age = self._frame - self._last_seen[rows, cols]
+        known = masked & (age <= self.max_age)
+
+        dst[:] = tile
+        if known.any():
+            drift = self._drift(rows, cols, int(age[known].max()))
+            if drift is None or drift > self.bg_tolerance:
+                self.stale_tiles += 1
+                known[:] = False
+            else:
+                np.copyto(dst, self._background[rows, cols], where=known[..., None])
+
+        missing = masked & ~known
+        known_count = int(np.count_nonzero(known))
+        missing_count = int(np.count_nonzero(missing))
+        self.temporal_pixels += known_count
+        self.telea_pixels += missing_count
+        if missing_count:
+            # Os pixels já preenchidos servem de contexto para o TELEA
+            cv2.inpaint(dst.copy(), missing.view(np.uint8) * 255, INPAINT_RADIUS,
+                        cv2.INPAINT_TELEA, dst=dst)
+        return dst
+
+    def summary(self):
+        total = self.temporal_pixels + self.telea_pixels
+        share = (self.temporal_pixels / total * 100) if total else 0.0
+        return (f"Preenchimento temporal: {share:.1f}% dos pixels vieram de frames vizinhos, "
+                f"{100 - share if total else 0.0:.1f}% do TELEA ({self.stale_tiles} recortes com "
+                f"fundo em movimento), {self.scene_cuts} cortes de cena")
+
+
+# ---------- MÉTRICAS E PROGRESSO ---------- #
+
+class StageTimer:
+    """
+    Tempo de cada etapa do processamento (uma amostra por frame, ou por
+    chamada no caso da codificação final) e contadores de frames.
+    Com várias threads de limpeza, os totais somam o tempo de todas elas.
+    """
+
+    STAGES = ("decode", "mask", "inpaint", "blend", "write", "encode")
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in self.STAGES}
+        self.frames_inpainted = 0
+        self.frames_passed = 0
+        self.mask_area = 0  # soma dos pixels de máscara dos frames limpos
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        self.samples[stage].append(seconds)
+
+    def count_frame(self, mask_pixels=None):
+        """Frame limpo (com a área da máscara em pixels) ou que passou direto (None)."""
+        with self._lock:
+            if mask_pixels is None:
+                self.frames_passed += 1
+            else:
+                self.frames_inpainted += 1
+                self.mask_area += mask_pixels
+
+    def to_dict(self):
+        """Estado bruto (para juntar os tempos de outro processo com merge)."""
+        return {"samples": self.samples, "frames_inpainted": self.frames_inpainted,
+                "frames_passed": self.frames_passed, "mask_area": self.mask_area}
+
+    def merge(self, state):
+        for stage, values in state["samples"].items():
+            self.samples[stage].extend(values)
+        self.frames_inpainted += state["frames_inpainted"]
+        self.frames_passed += state["frames_passed"]
+        self.mask_area += state["mask_area"]
+
+    def stats(self):
+        """Total, média e percentis (ms) de cada etapa, e os contadores de frames."""
+        stages = {}
+        for stage, values in self.samples.items():
+            if not values:
+                continue
+            ms = np.asarray(values) * 1000
+            p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+            stages[stage] = {
+                "count": len(values),
+                "total_s": float(ms.sum() / 1000),
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(ms.max()),
+            }
+        return {
+            "stages": stages,
+            "frames_inpainted": self.frames_inpainted,
+            "frames_passed": self.frames_passed,
+            "mean_mask_area": (self.mask_area / self.frames_inpainted
+                               if self.frames_inpainted else 0.0),
+        }
+
+    def summary(self):
+        stats = self.stats()
+        lines = [f"Frames: {stats['frames_inpainted']} limpos, {stats['frames_passed']} sem texto "
+                 f"(máscara média: {stats['mean_mask_area']:.0f} pixels)"]
+        for stage, st in stats["stages"].items():
+            lines.append(f"  {stage:<8} total {st['total_s']:7.2f} s | média {st['mean_ms']:7.2f} ms"
+                         f" | p50 {st['p50_ms']:7.2f} | p95 {st['p95_ms']:7.2f} | p99 {st['p99_ms']:7.2f}")
+        return "\n".join(lines)
+
+
+def format_eta(seconds):
+    seconds = int(max(0, seconds))
+    h, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+
+class ProgressReporter:
+    """
+    Transforma a contagem de frames em eventos de progresso (dict com stage,
+    done, total, percent, fps e eta) e limita a frequência: no máximo um evento
+    a cada `min_interval` segundos, mais o primeiro e o último.
+    Com `total` None (pipe, transmissão ao vivo), percent e eta são None.
+    """
+
+    def __init__(self, callback, total, min_interval=0.25, stage="limpeza"):
+        self.callback = callback
+        self.total = max(1, total) if total else None
+        self.min_interval = min_interval
+        self.stage = stage
+        self.start = time.perf_counter()
+        self.initial = 0
+        self._last = None
+
+    def start_at(self, done):
+        """Frames já prontos antes de começar (retomada): contam no percentual, não no fps."""
+        self.initial = done
+        self.start = time.perf_counter()
+
+    def update(self, done):
+        now = time.perf_counter()
+        finished = self.total is not None and done >= self.total
+        if (self._last is not None and not finished and
+                now - self._last < self.min_interval):
+            return
+        self._last = now
+
+        elapsed = now - self.start
+        fps = (done - self.initial) / elapsed if elapsed > 0 else 0.0
+        known = self.total is not None
+        event = {
+            "stage": self.stage,
+            "done": done,
+            "total": self.total,
+            "percent": min(100.0, done / self.total * 100) if known else None,
+            "fps": fps,
+            "eta": (self.total - done) / fps if known and fps > 0 else None,
+        }
+        if known:
+            eta = format_eta(event["eta"]) if event["eta"] is not None else "--:--"
+            print(f"Processado {done}/{self.total} frames ({fps:.1f} fps, ETA {eta})...")
+        else:
+            print(f"Processado {done} frames ({fps:.1f} fps)...")
+        if self.callback:
+            self.callback(event)
+
+
+def report_path(output_path):
+    """Relatório JSON do processamento, salvo ao lado do vídeo de saída."""
+    base, _ = os.path.splitext(output_path)
+    return base + ".relatorio.json"
+
+
+# ---------- KERNEL DE UM FRAME ---------- #
+
+class FrameKernel:
+    """
+    Detecção + inpainting + mistura de um frame sem alocar arrays a cada frame:
+    os buffers (cinza, máscara crua, fechada, dilatada, inpainting) são
+    criados uma vez por tamanho de ROI e todas as chamadas do OpenCV
+    escrevem neles com `dst=`. A mistura é feita direto na fatia do frame.
+
+    As `dilation_iter` dilatações 3x3 viram uma única dilatação com um
+    quadrado (2 * dilation_iter + 1), pré-calculado: o resultado é idêntico.
+
+    Com `timer` (StageTimer), registra o tempo de máscara, inpainting e mistura.
+    clean_yuv faz o mesmo direto num frame yuv420p.
+
+    Não é thread-safe: use uma instância por thread (make_cleaner cuida disso).
+    """
+
+    MAX_BUFFER_SHAPES = 8
+
+    def __init__(self, thresh_val=230, min_pixels_text=150, clean_weight=0.75,
+                 dilation_iter=10, use_edges=False, tile_inpaint=False,
+                 mask_scale=1.0, timer=None):
+        self.thresh_val = thresh_val
+        self.min_pixels_text = min_pixels_text
+        self.clean_weight = max(0.0, min(1.0, clean_weight))
+        self.dilation_iter = max(0, int(dilation_iter))
+        self.use_edges = use_edges
+        self.tile_inpaint = tile_inpaint
+        self.mask_scale = mask_scale
+        self.timer = timer
+        # O plano Y vem em faixa limitada (16-235): o mesmo limiar em cinza 0-255
+        self.luma_thresh = 16 + thresh_val * 219.0 / 255
+
+        self.close_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        # Na escala reduzida as iterações encolhem junto (mesmo alcance em pixels originais)
+        iterations = self.dilation_iter
+        if mask_scale < 1.0:
+            iterations = int(round(self.dilation_iter * mask_scale))
+        self.dilate_kernel = None
+        if iterations > 0:
+            size = 2 * iterations + 1
+            self.dilate_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (size, size))
+
+        self._buffers = {}
+
+    def _buffers_for(self, h, w):
+        bufs = self._buffers.get((h, w))
+        if bufs is not None:
+            return bufs
+
+        # Com o índice de legendas o tamanho da ROI muda por intervalo
+        if len(self._buffers) >= self.MAX_BUFFER_SHAPES:
+            self._buffers.clear()
+
+        bufs = {
+            "gray": np.empty((h, w), np.uint8),
+            "raw": np.empty((h, w), np.uint8),
+            "edges": np.empty((h, w), np.uint8),
+            "closed": np.empty((h, w), np.uint8),
+            "mask": np.empty((h, w), np.uint8),
+            "inpaint": np.empty((h, w, 3), np.uint8),
+        }
+        if self.mask_scale < 1.0:
+            small = (max(1, int(round(h * self.mask_scale))),
+                     max(1, int(round(w * self.mask_scale))))
+            bufs["small_size"] = (small[1], small[0])
+            bufs["small"] = np.empty(small, np.uint8)
+            bufs["small_closed"] = np.empty(small, np.uint8)
+            bufs["small_mask"] = np.empty(small, np.uint8)
+
+        self._buffers[(h, w)] = bufs
+        return bufs
+
+    def threshold(self, roi, bufs):
+        """Cinza e máscara crua (pixels claros e, se ativado, bordas) da ROI BGR."""
+        gray = bufs["gray"]
+        cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY, dst=gray)
+        return gray, self.binarize(gray, bufs, self.thresh_val)
+
+    def binarize(self, gray, bufs, thresh):
+        """Máscara crua de uma imagem de um canal (cinza ou plano Y) com o limiar `thresh`."""
+        raw = bufs["raw"]
+        cv2.threshold(gray, thresh, 255, cv2.THRESH_BINARY, dst=raw)
+
+        # Se ativado, usa detecção de bordas (Canny) para reforçar a máscara
+        # Isso ajuda a capturar legendas claras ou com bordas definidas que o threshold ignora
+        if self.use_edges:
+            # Canny com limiares conservadores para pegar texto
+            cv2.Canny(gray, 50, 150, edges=bufs["edges"])
+            cv2.bitwise_or(raw, bufs["edges"], dst=raw)
+
+        return raw
+
+    def merged_mask(self, gray, bufs, members, luma=False):
+        """
+        Máscara de um grupo de regiões sobrepostas (ver plan_regions): cada
+        membro (FrameKernel, (y1, y2, x1, x2) relativo a `gray`) detecta com o
+        próprio limiar, bordas, dilatação e mínimo de pixels, e as máscaras
+        são unidas nos buffers deste kernel. Se as densidades dos membros
+        forem diferentes, monta também o mapa de pesos (float32, a densidade
+        de cada pixel da máscara; a maior onde dois membros detectam) para
+        o blend. Retorna (crua, final, pesos ou None).
+        """
+        raw, mask = bufs["raw"], bufs["mask"]
+        raw[:] = 0
+        mask[:] = 0
+        weights = None
+        if len({kernel.clean_weight for kernel, _ in members}) > 1:
+            weights = bufs.get("weights")
+            if weights is None:
+                weights = bufs["weights"] = np.empty(gray.shape, np.float32)
+            weights[:] = 0
+        # Densidade crescente: onde as máscaras se cruzam, fica a maior
+        for kernel, (y1, y2, x1, x2) in sorted(members, key=lambda m: m[0].clean_weight):
+            sub = gray[y1:y2, x1:x2]
+            sub_bufs = kernel._buffers_for(*sub.shape)
+            sub_raw = kernel.binarize(sub, sub_bufs,
+                                      kernel.luma_thresh if luma else kernel.thresh_val)
+            sub_mask = kernel.grow(sub_raw, sub_bufs)
+            if cv2.countNonZero(sub_mask) <= kernel.min_pixels_text:
+                continue
+            cv2.bitwise_or(raw[y1:y2, x1:x2], sub_raw, dst=raw[y1:y2, x1:x2])
+            cv2.bitwise_or(mask[y1:y2, x1:x2], sub_mask, dst=mask[y1:y2, x1:x2])
+            if weights is not None:
+                weights[y1:y2, x1:x2][sub_mask > 0] = kernel.clean_weight
+        return raw, mask, weights
+
+    def blend(self, tile, cleaned_tile, weights=None):
+        """
+        Mistura o resultado do inpainting no `tile` (no lugar): com a
+        densidade do kernel, ou pixel a pixel com `weights` (merged_mask).
+        """
+        if weights is not None:
+            cv2.blendLinear(cleaned_tile, tile, weights, 1.0 - weights, dst=tile)
+        elif self.clean_weight >= 1.0:
+            # Se a densidade for 100%, não misturamos com o original para evitar fantasmas
+            tile[:] = cleaned_tile
+        else:
+            cv2.addWeighted(cleaned_tile, self.clean_weight, tile,
+                            1.0 - self.clean_weight, 0, dst=tile)
+
+    def grow(self, raw, bufs):
+        """
+        Fecha os buracos das letras e dilata a máscara. Com `mask_scale` < 1,
+        isso roda numa máscara reduzida (qualquer pixel de texto no bloco conta)
+        e volta ao tamanho da ROI com vizinho mais próximo.
+        """
+        if self.mask_scale < 1.0:
+            src, closed, out = bufs["small"], bufs["small_closed"], bufs["small_mask"]
+            cv2.resize(raw, bufs["small_size"], dst=src, interpolation=cv2.INTER_AREA)
+            cv2.threshold(src, 0, 255, cv2.THRESH_BINARY, dst=src)
+        else:
+            src, closed, out = raw, bufs["closed"], bufs["mask"]
+
+        cv2.morphologyEx(src, cv2.MORPH_CLOSE, self.close_kernel, dst=closed)
+        if self.dilate_kernel is not None:
+            cv2.dilate(closed, self.dilate_kernel, dst=out)
+        else:
+            out[:] = closed
+
+        if self.mask_scale < 1.0:
+            h, w = raw.shape
+            cv2.resize(out, (w, h), dst=bufs["mask"], interpolation=cv2.INTER_NEAREST)
+        return bufs["mask"]
+
+    def propagated_mask(self, roi, bufs, thresh, propagation):
+        """
+        (crua, final) com detecção espaçada (MaskPropagation) na ROI BGR ou
+        no plano Y: todo frame passa só pelo limiar numa amostra reduzida; a
+        detecção completa roda quando a máscara anterior venceu ou os pixels
+        claros mudaram (e só aí o cinza da ROI em bufs["gray"] é calculado).
+        """
+        h, w = roi.shape[:2]
+        step = propagation.step
+        sample = cv2.resize(roi, (max(1, w // step), max(1, h // step)),
+                            interpolation=cv2.INTER_NEAREST)
+        if sample.ndim == 3:
+            sample = cv2.cvtColor(sample, cv2.COLOR_BGR2GRAY)
+        bright = cv2.threshold(sample, thresh, 255, cv2.THRESH_BINARY)[1]
+        found = propagation.lookup(bright)
+        if found is not None:
+            return found
+
+        gray = roi if roi.ndim == 2 else cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY, dst=bufs["gray"])
+        raw = self.binarize(gray, bufs, thresh)
+        mask = self.grow(raw, bufs)
+        propagation.store(bright, raw, mask)
+        return raw, mask
+
+    def _yuv_buffers(self, bufs, h, w):
+        """Buffers do clean_yuv: inpainting do Y e máscara/inpainting do croma (metade da resolução)."""
+        yuv = bufs.get("yuv")
+        if yuv is None:
+            half = (h // 2, w // 2)
+            yuv = bufs["yuv"] = {
+                "luma": np.empty((h, w), np.uint8),
+                "chroma_mask": np.empty(half, np.uint8),
+                "u": np.empty(half, np.uint8),
+                "v": np.empty(half, np.uint8),
+            }
+        return yuv
+
+    def text_mask(self, roi):
+        """Máscara binária (0/255) do texto. É um buffer interno: vale até a próxima chamada."""
+        bufs = self._buffers_for(*roi.shape[:2])
+        _, raw = self.threshold(roi, bufs)
+        return self.grow(raw, bufs)
+
+    def clean(self, frame, band, cache=None, filler=None, members=None, propagation=None):
+        """
+        Detecta o texto na faixa `band` (topo, base, esq, dir) e aplica o inpainting no próprio frame.
+        Com `members`, a máscara é a união das regiões do grupo (merged_mask).
+        Com `propagation` (MaskPropagation), a detecção completa não roda em todo frame.
+        Com `tile_inpaint`, o inpainting roda só em recortes ao redor do texto detectado.
+        Com `cache` (TemporalCache), reaproveita o frame anterior quando a legenda não mudou.
+        Com `filler` (TemporalFill), os pixels mascarados vêm de frames vizinhos e o TELEA
+        só cobre o que nunca foi visto limpo. Com cache ou filler, os frames precisam chegar em ordem.
+        """
+        band_top, band_bottom, band_left, band_right = band
+        timer = self.timer
+        t0 = time.perf_counter()
+
+        roi = frame[band_top:band_bottom, band_left:band_right]
+        bufs = self._buffers_for(*roi.shape[:2])
+        weights = None
+        if members is not None:
+            gray_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY, dst=bufs["gray"])
+            raw_mask, grown, weights = self.merged_mask(gray_roi, bufs, members)
+        elif propagation is not None:
+            raw_mask, grown = self.propagated_mask(roi, bufs, self.thresh_val, propagation)
+            gray_roi = None
+            if cache is not None or filler is not None:
+                gray_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY, dst=bufs["gray"])
+        else:
+            gray_roi, raw_mask = self.threshold(roi, bufs)
+            grown = None
+
+        cached = cache.lookup(gray_roi, raw_mask) if cache is not None else None
+        if cached is not None:
+            bin_roi, filled_roi = cached
+        else:
+            bin_roi = grown if grown is not None else self.grow(raw_mask, bufs)
+            filled_roi = None
+
+        white_pixels = cv2.countNonZero(bin_roi)
+        if timer is not None:
+            timer.add("mask", time.perf_counter() - t0)
+
+        if filler is not None:
+            # Antes do inpainting: guarda os pixels que estão limpos neste frame
+            filler.observe(roi, bin_roi, (band_top, band_left), gray_roi)
+
+        if white_pixels <= self.min_pixels_text:
+            if cache is not None:
+                cache.reset()
+            if timer is not None:
+                timer.count_frame(None)
+            return frame
+
+        if self.tile_inpaint:
+            # Só os recortes com texto: o custo acompanha o tamanho da legenda
+            tiles = text_tiles(bin_roi)
+        else:
+            # Inpainting direto com a máscara binária dilatada na ROI inteira
+            tiles = [(0, 0, roi.shape[1], roi.shape[0])]
+
+        if cache is not None:
+            if filled_roi is not None:
+                cache.hits += 1
+            else:
+                cache.misses += 1
+
+        inpaint_time = blend_time = 0.0
+        inpainted = bufs["inpaint"]
+        for x1, y1, x2, y2 in tiles:
+            t0 = time.perf_counter()
+            # `tile` é uma view do frame: escrever nela já altera o frame
+            tile = roi[y1:y2, x1:x2]
+            tile_mask = bin_roi[y1:y2, x1:x2]
+            cleaned_tile = inpainted[y1:y2, x1:x2]
+
+            if filled_roi is not None:
+                # Fora da máscara o inpainting não muda nada: só os pixels
+                # mascarados vêm do frame anterior
+                cleaned_tile[:] = tile
+                cv2.copyTo(filled_roi[y1:y2, x1:x2], tile_mask, dst=cleaned_tile)
+            elif filler is not None:
+                filler.fill(tile, tile_mask, (band_top + y1, band_left + x1), cleaned_tile)
+            else:
+                cv2.inpaint(tile, tile_mask, INPAINT_RADIUS, cv2.INPAINT_TELEA,
+                            dst=cleaned_tile)
+            t1 = time.perf_counter()
+
+            self.blend(tile, cleaned_tile, None if weights is None else weights[y1:y2, x1:x2])
+            inpaint_time += t1 - t0
+            blend_time += time.perf_counter() - t1
+
+        if timer is not None:
+            timer.add("inpaint", inpaint_time)
+            timer.add("blend", blend_time)
+            timer.count_frame(white_pixels)
+
+        if cache is not None and filled_roi is None:
+            # Fora dos recortes o buffer tem lixo de frames anteriores, mas o
+            # cache só usa os pixels sob a máscara, que estão todos nos recortes
+            cache.store(gray_roi, raw_mask, bin_roi, inpainted)
+
+        return frame
+
+    def clean_yuv(self, frame, band, members=None, propagation=None):
+        """
+        clean() num frame yuv420p (ver yuv_planes) sem passar por BGR: a
+        detecção usa o plano Y direto, e o inpainting e a mistura rodam em
+        cada plano, o croma na metade da resolução com a máscara reduzida
+        (qualquer pixel de texto no bloco 2x2 conta). A faixa é alinhada a
+        pixels pares. Sem cache nem preenchimento temporal. `members` e
+        `propagation` como no clean().
+        """
+        y_plane, u_plane, v_plane = yuv_planes(frame)
+        band_top, band_bottom, band_left, band_right = band
+        band_top -= band_top % 2
+        band_left -= band_left % 2
+        band_bottom += band_bottom % 2
+        band_right += band_right % 2
+        timer = self.timer
+        t0 = time.perf_counter()
+
+        roi = y_plane[band_top:band_bottom, band_left:band_right]
+        h, w = roi.shape
+        bufs = self._buffers_for(h, w)
+        weights = None
+        if members is not None:
+            _, bin_roi, weights = self.merged_mask(roi, bufs, members, luma=True)
+        elif propagation is not None:
+            bin_roi = self.propagated_mask(roi, bufs, self.luma_thresh, propagation)[1]
+        else:
+            bin_roi = self.grow(self.binarize(roi, bufs, self.luma_thresh), bufs)
+
+        white_pixels = cv2.countNonZero(bin_roi)
+        if timer is not None:
+            timer.add("mask", time.perf_counter() - t0)
+        if white_pixels <= self.min_pixels_text:
+            if timer is not None:
+                timer.count_frame(None)
+            return frame
+
+        yuv = self._yuv_buffers(bufs, h, w)
+        chroma_mask = yuv["chroma_mask"]
+        cv2.resize(bin_roi, (w // 2, h // 2), dst=chroma_mask, interpolation=cv2.INTER_AREA)
+        cv2.threshold(chroma_mask, 0, 255, cv2.THRESH_BINARY, dst=chroma_mask)
+        chroma_weights = None
+        if weights is not None:
+            # Bloco 2x2 do croma: a maior densidade entre os pixels dele, como a máscara
+            chroma_weights = weights.reshape(h // 2, 2, w // 2, 2).max(axis=(1, 3))
+        cy, cx = band_top // 2, band_left // 2
+        planes = [(roi, bin_roi, yuv["luma"], weights, 1),
+                  (u_plane[cy:cy + h // 2, cx:cx + w // 2], chroma_mask, yuv["u"], chroma_weights, 2),
+                  (v_plane[cy:cy + h // 2, cx:cx + w // 2], chroma_mask, yuv["v"], chroma_weights, 2)]
+
+        if self.tile_inpaint:
+            # Margem em dobro: no croma ela cai pela metade
+            tiles = text_tiles(bin_roi, 2 * TILE_MARGIN)
+        else:
+            tiles = [(0, 0, w, h)]
+
+        inpaint_time = blend_time = 0.0
+        for x1, y1, x2, y2 in tiles:
+            for plane, mask, inpainted, plane_weights, step in planes:
+                t0 = time.perf_counter()
+                py1, py2 = y1 // step, -(-y2 // step)
+                px1, px2 = x1 // step, -(-x2 // step)
+                tile = plane[py1:py2, px1:px2]
+                cleaned_tile = inpainted[py1:py2, px1:px2]
+                cv2.inpaint(tile, mask[py1:py2, px1:px2], INPAINT_RADIUS,
+                            cv2.INPAINT_TELEA, dst=cleaned_tile)
+                t1 = time.perf_counter()
+
+                self.blend(tile, cleaned_tile, None if plane_weights is None
+                           else plane_weights[py1:py2, px1:px2])
+                inpaint_time += t1 - t0
+                blend_time += time.perf_counter() - t1
+
+        if timer is not None:
+            timer.add("inpaint", inpaint_time)
+            timer.add("blend", blend_time)
+            timer.count_frame(white_pixels)
+        return frame
+
+
+def yuv_planes(frame):
+    """
+    Views (Y, U, V) de um frame yuv420p guardado como o I420 do OpenCV: um
+    array (altura * 3 / 2, largura) com o Y e depois U e V na metade da
+    resolução. Escrever nas views altera o frame.
+    """
+    h, w = frame.shape[0] * 2 // 3, frame.shape[1]
+    flat = frame.reshape(-1)
+    luma = h * w
+    u = flat[luma:luma + luma // 4].reshape(h // 2, w // 2)
+    v = flat[luma + luma // 4:].reshape(h // 2, w // 2)
+    return frame[:h], u, v
+
+
+def build_text_mask(roi, thresh_val=230, dilation_iter=10, use_edges=False, mask_scale=1.0):
+    """Máscara binária (0/255) do texto claro na ROI BGR (cópia própria)."""
+    kernel = FrameKernel(thresh_val, dilation_iter=dilation_iter, use_edges=use_edges,
+                         mask_scale=mask_scale)
+    return kernel.text_mask(roi).copy()
+
+
+def clean_frame(frame, band, thresh_val=230, min_pixels_text=150, clean_weight=0.75,
+                dilation_iter=10, use_edges=False, tile_inpaint=False,
+                mask_scale=1.0, cache=None, filler=None):
+    """Atalho para limpar um frame avulso. Em laços, reaproveite um FrameKernel."""
+    kernel = FrameKernel(thresh_val, min_pixels_text, clean_weight, dilation_iter,
+                         use_edges, tile_inpaint, mask_scale)
+    return kernel.clean(frame, band, cache, filler)
+
+
+def band_from_fracs(shape, top_frac, bottom_frac, left_frac, right_frac):
+    """Faixa (topo, base, esq, dir) em pixels, sempre com pelo menos 1 pixel."""
+    h, w = shape[:2]
+    top = max(0, min(int(h * top_frac), h - 1))
+    bottom = max(top + 1, min(int(h * bottom_frac), h))
+    left = max(0, min(int(w * left_frac), w - 1))
+    right = max(left + 1, min(int(w * right_frac), w))
+    return top, bottom, left, right
+
+
+def mask_overlay(frame, band, thresh_val=230, dilation_iter=10, use_edges=False):
+    """Cópia do frame com a máscara pintada de verde dentro da faixa (preview do que será apagado)."""
+    top, bottom, left, right = band
+    display_frame = frame.copy()
+    mask = build_text_mask(display_frame[top:bottom, left:right],
+                           thresh_val, dilation_iter, use_edges)
+
+    # Verde neon onde detectou texto, preto no resto da faixa
+    mask_bgr = np.zeros((bottom - top, right - left, 3), np.uint8)
+    mask_bgr[mask == 255] = [0, 255, 0]
+    display_frame[top:bottom, left:right] = mask_bgr
+    return display_frame
+
+
+# ---------- PIPELINE (DECODIFICAÇÃO / LIMPEZA / GRAVAÇÃO) ---------- #
+
+def run_pipelined(read, writer, clean, workers, frame_done, first_index=0,
+                  timer=None):
+    """
+    Decodifica numa thread, limpa `workers` frames ao mesmo tempo num pool
+    (`clean(frame, índice)`) e grava na ordem original. A fila entre as etapas é limitada, então
+    no máximo ~3x `workers` frames ficam em memória ao mesmo tempo.
+    """
+    pending = queue.Queue(maxsize=workers * 2)
+    stop = threading.Event()
+    decode_errors = []
+
+    def put(item):
+        # Não bloqueia para sempre se o consumidor já desistiu (erro na gravação)
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+
+    def decode():
+        try:
+            frame_idx = first_index
+            while not stop.is_set():
+                ret, frame = read()
+                if not ret:
+                    break
+                put(pool.submit(clean, frame, frame_idx))
+                frame_idx += 1
+        except Exception as e:
+            decode_errors.append(e)
+        finally:
+            put(None)
+
+    reader = threading.Thread(target=decode, daemon=True)
+    reader.start()
+
+    try:
+        while True:
+            future = pending.get()
+            if future is None:
+                break
+            frame = future.result()
+            t0 = time.perf_counter()
+            writer.write(frame)
+            if timer is not None:
+                timer.add("write", time.perf_counter() - t0)
+            frame_done()
+    finally:
+        stop.set()
+        reader.join()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    if decode_errors:
+        raise decode_errors[0]
+
+
+def clean_frames(vid, writer, clean, workers, frame_done, frame_limit=None,
+                 first_index=0, timer=None):
+    """
+    Lê, limpa e grava os frames até o fim do vídeo (ou até `frame_limit` frames).
+    `clean` recebe o frame e o índice dele no vídeo (a partir de `first_index`).
+    Com `timer` (StageTimer), registra o tempo de decodificação e de gravação.
+    """
+    remaining = frame_limit
+
+    def read():
+        nonlocal remaining
+        if remaining is not None:
+            if remaining <= 0:
+                return False, None
+            remaining -= 1
+        t0 = time.perf_counter()
+        ret, frame = vid.read()
+        if ret and timer is not None:
+            timer.add("decode", time.perf_counter() - t0)
+        return ret, frame
+
+    if workers > 1:
+        # Modo pipeline: decodificação, limpeza e gravação em paralelo
+        run_pipelined(read, writer, clean, workers, frame_done, first_index, timer)
+        return
+
+    frame_idx = first_index
+    while True:
+        ret, frame = read()
+        if not ret:
+            break
+
+        frame = clean(frame, frame_idx)
+        t0 = time.perf_counter()
+        writer.write(frame)
+        if timer is not None:
+            timer.add("write", time.perf_counter() - t0)
+        frame_idx += 1
+        frame_done()
+
+
+# ---------- FFMPEG ---------- #
+
+FFMPEG_BIN = "ffmpeg"
+
+# Parâmetros de saída: H.264 compatível com navegadores, áudio original copiado
+H264_ARGS = ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "veryfast"]
+
+
+def h264_args(threads=None):
+    """Argumentos do encoder H.264, opcionalmente limitado a `threads` threads."""
+    if threads:
+        return H264_ARGS + ["-threads", str(threads)]
+    return list(H264_ARGS)
+
+
+def audio_mux_args(audio_source):
+    """Argumentos para copiar o áudio de `audio_source` (2ª entrada do ffmpeg), se existir."""
+    # O '?' evita erro se o vídeo original não tiver áudio
+    # -shortest: garante que pare quando o menor stream acabar (evita loops)
+    return ["-i", audio_source, "-map", "0:v:0", "-map", "1:a:0?",
+            "-c:a", "copy", "-shortest"]
+
+
+def _watch_ffmpeg(proc, frame_count, stderr_tail):
+    """Lê o progresso (-progress pipe:1) e o stderr do ffmpeg em threads separadas."""
+
+    def read_progress():
+        last_report = 0
+        for line in iter(proc.stdout.readline, b""):
+            key, _, value = line.decode("utf-8", "replace").strip().partition("=")
+            if key == "frame" and value.isdigit():
+                encoded = int(value)
+                if encoded - last_report >= 100 or (frame_count and encoded == frame_count):
+                    last_report = encoded
+                    print(f"Codificado {encoded}/{frame_count} frames (ffmpeg)...")
+
+    def read_stderr():
+        for line in iter(proc.stderr.readline, b""):
+            stderr_tail.append(line.decode("utf-8", "replace").rstrip())
+
+    threads = [threading.Thread(target=read_stderr, daemon=True)]
+    if proc.stdout is not None:  # sem -progress quando o vídeo sai pelo stdout
+        threads.append(threading.Thread(target=read_progress, daemon=True))
+    for t in threads:
+        t.start()
+    return threads
+
+
+def _ffmpeg_error(returncode, stderr_tail):
+    details = "\n".join(stderr_tail) or "sem detalhes"
+    return RuntimeError(f"ffmpeg falhou (código {returncode}):\n{details}")
+
+
+def run_ffmpeg(args, frame_count=0):
+    """Executa o ffmpeg reportando o progresso; levanta RuntimeError se ele falhar."""
+    cmd = [FFMPEG_BIN, "-y", "-loglevel", "error", "-nostats",
+           "-progress", "pipe:1"] + args
+    stderr_tail = deque(maxlen=20)
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg não encontrado. Instale-o e adicione ao PATH.")
+
+    threads = _watch_ffmpeg(proc, frame_count, stderr_tail)
+    proc.wait()
+    for t in threads:
+        t.join()
+
+    if proc.returncode != 0:
+        raise _ffmpeg_error(proc.returncode, stderr_tail)
+
+
+class FFmpegPipeWriter:
+    """
+    Envia frames BGR crus para o stdin do ffmpeg, que codifica direto em H.264
+    (e copia o áudio de `audio_source`). Substitui o cv2.VideoWriter + AVI
+    temporário: uma codificação só, sem arquivo intermediário.
+
+    `output_path` "-" escreve no stdout (o ffmpeg herda o stdout deste
+    processo). `output_format` força o contêiner (ex.: "mpegts" para pipe ou
+    FIFO; "rawvideo" grava os frames BGR crus, sem codificar). `low_latency`
+    tira o atraso do encoder (x264 sem lookahead nem B-frames) e grava cada
+    pacote na hora. `output_args` vão logo antes da saída (opções extras do encoder).
+    `pix_fmt` é o formato dos frames enviados: "bgr24" ou "yuv420p" (vai
+    para o H.264 sem conversão de cor).
+    """
+
+    def __init__(self, output_path, width, height, fps, audio_source=None,
+                 frame_count=0, threads=None, output_format=None, low_latency=False,
+                 output_args=None, pix_fmt="bgr24"):
+        self.output_path = output_path
+        self.frame_size = int(np.prod(FFmpegPipeReader.SHAPES[pix_fmt](width, height)))
+        to_stdout = output_path in ("-", "pipe:1")
+
+        cmd = [FFMPEG_BIN, "-y", "-loglevel", "error", "-nostats"]
+        if not to_stdout:
+            cmd += ["-progress", "pipe:1"]
+        cmd += ["-f", "rawvideo", "-pix_fmt", pix_fmt,
+                "-s", f"{width}x{height}", "-r", str(fps), "-i", "pipe:0"]
+        if audio_source:
+            cmd += audio_mux_args(audio_source)
+        if output_format == "rawvideo":
+            cmd += ["-f", "rawvideo", "-pix_fmt", pix_fmt]
+        else:
+            cmd += h264_args(threads)
+            if low_latency:
+                cmd += ["-tune", "zerolatency"]
+            if output_format:
+                cmd += ["-f", output_format]
+        if low_latency:
+            cmd += ["-flush_packets", "1"]
+        cmd += output_args or []
+        cmd.append("pipe:1" if to_stdout else output_path)
+
+        self._stderr_tail = deque(maxlen=20)
+        try:
+            self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                         stdout=None if to_stdout else subprocess.PIPE,
+                                         stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            raise RuntimeError("ffmpeg não encontrado. Instale-o e adicione ao PATH.")
+        self._threads = _watch_ffmpeg(self.proc, frame_count, self._stderr_tail)
+
+    def isOpened(self):
+        return self.proc.poll() is None
+
+    def write(self, frame):
+        try:
+            self.proc.stdin.write(np.ascontiguousarray(frame).data)
+        except (BrokenPipeError, OSError):
+            # O ffmpeg morreu no meio do caminho: espera e reporta o erro dele
+            self._finish()
+
+    def release(self):
+        """Fecha o stdin e espera o ffmpeg terminar; levanta RuntimeError se ele falhar."""
+        try:
+            self.proc.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        self._finish()
+
+    def abort(self):
+        """Interrompe o ffmpeg e apaga a saída incompleta."""
+        self.proc.kill()
+        try:
+            self.proc.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        self.proc.wait()
+        self._join()
+        self._remove_output()
+
+    def _finish(self):
+        self.proc.wait()
+        self._join()
+        if self.proc.returncode != 0:
+            self._remove_output()
+            raise _ffmpeg_error(self.proc.returncode, self._stderr_tail)
+
+    def _remove_output(self):
+        # Só arquivo comum: um FIFO ou o stdout não são apagados
+        if os.path.isfile(self.output_path):
+            os.remove(self.output_path)
+
+    def _join(self):
+        for t in self._threads:
+            t.join()
+
+
+class FFmpegPipeReader:
+    """
+    Lê frames crus decodificados pelo ffmpeg pelo stdout, com a mesma
+    interface do cv2.VideoCapture (read/isOpened/release). Permite pedir
+    ao ffmpeg recorte, redução e formato (ex.: só a faixa, em cinza, ou
+    yuv420p para não converter nada).
+    `source` "-" lê do stdin deste processo; `input_args` vão antes do -i
+    (formato da entrada, -follow, ...).
+    """
+
+    SHAPES = {
+        "gray": lambda w, h: (h, w),
+        "bgr24": lambda w, h: (h, w, 3),
+        "yuv420p": lambda w, h: (h * 3 // 2, w),  # I420 (ver yuv_planes)
+    }
+
+    def __init__(self, source, width, height, pix_fmt="bgr24", filters=None,
+                 input_args=None):
+        self.shape = self.SHAPES[pix_fmt](width, height)
+        self.frame_size = int(np.prod(self.shape))
+        self._stopped = False
+
+        cmd = [FFMPEG_BIN, "-loglevel", "error", "-nostats"]
+        cmd += (input_args or []) + ["-i", "pipe:0" if source == "-" else source]
+        if filters:
+            cmd += ["-vf", filters]
+        cmd += ["-an", "-f", "rawvideo", "-pix_fmt", pix_fmt, "pipe:1"]
+
+        self._stderr_tail = deque(maxlen=20)
+        try:
+            self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                         stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            raise RuntimeError("ffmpeg não encontrado. Instale-o e adicione ao PATH.")
+
+        def read_stderr():
+            for line in iter(self.proc.stderr.readline, b""):
+                self._stderr_tail.append(line.decode("utf-8", "replace").rstrip())
+
+        self._stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+        self._stderr_thread.start()
+
+    def isOpened(self):
+        return self.proc.poll() is None or self.proc.returncode == 0
+
+    def read(self):
+        frame = np.empty(self.shape, np.uint8)
+        view = memoryview(frame).cast("B")
+        got = 0
+        while got < self.frame_size:
+            n = self.proc.stdout.readinto(view[got:])
+            if not n:
+                return False, None
+            got += n
+        return True, frame
+
+    def release(self):
+        """Encerra o ffmpeg; levanta RuntimeError se ele falhou antes do fim do vídeo."""
+        if self.proc.poll() is None:
+            # Consumidor parou antes do fim: não é erro
+            self._stopped = True
+            self.proc.kill()
+        self.proc.stdout.close()
+        self.proc.wait()
+        self._stderr_thread.join()
+        if self.proc.returncode != 0 and not self._stopped:
+            raise _ffmpeg_error(self.proc.returncode, self._stderr_tail)
+
+
+# ---------- ÍNDICE DE LEGENDAS (PRÉ-ANÁLISE) ---------- #
+
+class SubtitleIndex:
+    """
+    Intervalos de frames com legenda e o retângulo do texto em cada um,
+    gerados por analyze_video. O retângulo (x, y, w, h) é relativo à faixa,
+    em pixels da resolução original, e cobre os pixels claros crus (antes do
+    fechamento/dilatação), então o índice vale para qualquer dilatação,
+    densidade ou modo de inpainting.
+    """
+
+    VERSION = 1
+
+    def __init__(self, intervals, frame_count, detect, source=None):
+        self.intervals = sorted(intervals)
+        self.frame_count = frame_count
+        self.detect = detect
+        self.source = source or {}
+        self._starts = [start for start, _, _ in self.intervals]
+
+    def box_at(self, frame_idx):
+        """Retângulo do texto no frame, ou None se o frame não tem legenda."""
+        i = bisect.bisect_right(self._starts, frame_idx) - 1
+        if i >= 0:
+            start, end, box = self.intervals[i]
+            if start <= frame_idx < end:
+                return box
+        return None
+
+    def has_text(self, start, end):
+        """True se algum frame de [start, end) tem legenda."""
+        i = bisect.bisect_right(self._starts, end - 1) - 1
+        return i >= 0 and self.intervals[i][1] > start
+
+    def text_frames(self):
+        return sum(end - start for start, end, _ in self.intervals)
+
+    def matches(self, video_path, detect):
+        """True se o índice foi gerado para este arquivo (tamanho/data) com os mesmos parâmetros de detecção."""
+        stat = os.stat(video_path)
+        return (self.source.get("size") == stat.st_size and
+                self.source.get("mtime") == int(stat.st_mtime) and
+                self.detect == detect)
+
+    def save(self, path):
+        data = {
+            "version": self.VERSION,
+            "source": self.source,
+            "detect": self.detect,
+            "frame_count": self.frame_count,
+            "intervals": [[start, end, list(box)] for start, end, box in self.intervals],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != cls.VERSION:
+            return None
+        intervals = [(start, end, tuple(box)) for start, end, box in data["intervals"]]
+        return cls(intervals, data["frame_count"], data["detect"], data["source"])
+
+
+def subtitle_index_path(video_path):
+    """Arquivo do índice, ao lado do vídeo: video.mp4 -> video.legendas.json"""
+    return os.path.splitext(video_path)[0] + ".legendas.json"
+
+
+def _box_iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+def _box_union(a, b):
+    x1, y1 = min(a[0], b[0]), min(a[1], b[1])
+    x2, y2 = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return (x1, y1, x2 - x1, y2 - y1)
+
+
+def analyze_video(video_path, band_top_frac=0.55, band_bottom_frac=0.95,
+                  band_left_frac=0.0, band_right_frac=1.0, thresh_val=230,
+                  scale=0.5, progress_callback=None):
+    """
+    Pré-análise rápida: o ffmpeg decodifica só a faixa, reduzida por `scale`
+    e em tons de cinza, e cada frame passa pelo mesmo threshold do
+    process_video. Retorna um SubtitleIndex e o salva ao lado do vídeo.
+    """
+    vid = cv2.VideoCapture(video_path)
+    if not vid.isOpened():
+        raise RuntimeError("Não foi possível abrir o vídeo.")
+    frame_count = int(vid.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(vid.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(vid.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    vid.release()
+
+    top, bottom = int(height * band_top_frac), int(height * band_bottom_frac)
+    left, right = int(width * band_left_frac), int(width * band_right_frac)
+    crop_w, crop_h = right - left, bottom - top
+    out_w, out_h = max(1, int(crop_w * scale)), max(1, int(crop_h * scale))
+    sx, sy = crop_w / float(out_w), crop_h / float(out_h)
+
+    # "neighbor" preserva os valores dos pixels (uma média apagaria traços finos)
+    filters = (f"crop={crop_w}:{crop_h}:{left}:{top},"
+               f"scale={out_w}:{out_h}:flags=neighbor")
+    reader = FFmpegPipeReader(video_path, out_w, out_h, pix_fmt="gray", filters=filters)
+
+    print(f"Analisando legendas: {os.path.basename(video_path)} (escala {scale})")
+    start_time = time.time()
+
+    intervals = []
+    current = None
+    frame_idx = 0
+    try:
+        while True:
+            ret, gray = reader.read()
+            if not ret:
+                break
+
+            _, raw = cv2.threshold(gray, thresh_val, 255, cv2.THRESH_BINARY)
+            if cv2.countNonZero(raw):
+                x, y, w, h = cv2.boundingRect(raw)
+                x1, y1 = int(x * sx), int(y * sy)
+                x2, y2 = int(np.ceil((x + w) * sx)), int(np.ceil((y + h) * sy))
+                box = (x1, y1, x2 - x1, y2 - y1)
+
+                # Frame seguinte com o texto no mesmo lugar: mesmo intervalo
+                if (current is not None and current[1] == frame_idx and
+                        _box_iou(current[2], box) >= 0.3):
+                    current[1] = frame_idx + 1
+                    current[2] = _box_union(current[2], box)
+                else:
+                    current = [frame_idx, frame_idx + 1, box]
+                    intervals.append(current)
+
+            frame_idx += 1
+            if frame_idx % 100 == 0 and frame_count:
+                if progress_callback:
+                    progress_callback(min(100.0, frame_idx / frame_count * 100))
+                print(f"Analisado {frame_idx}/{frame_count} frames...")
+    finally:
+        reader.release()
+
+    stat = os.stat(video_path)
+    index = SubtitleIndex(
+        [tuple(i) for i in intervals], frame_idx,
+        detect={"band": [band_top_frac, band_bottom_frac, band_left_frac, band_right_frac],
+                "thresh_val": thresh_val, "scale": scale},
+        source={"size": stat.st_size, "mtime": int(stat.st_mtime)},
+    )
+    index.save(subtitle_index_path(video_path))
+
+    print(f"Análise: {index.text_frames()}/{frame_idx} frames com legenda em "
+          f"{len(intervals)} intervalos ({time.time() - start_time:.2f} s)")
+    return index
+
+
+def load_or_analyze(video_path, band_top_frac, band_bottom_frac, band_left_frac,
+                    band_right_frac, thresh_val, scale=0.5, progress_callback=None):
+    """Reaproveita o índice salvo se ainda valer para o arquivo e a detecção; senão analisa de novo."""
+    path = subtitle_index_path(video_path)
+    detect = {"band": [band_top_frac, band_bottom_frac, band_left_frac, band_right_frac],
+              "thresh_val": thresh_val, "scale": scale}
+    if os.path.exists(path):
+        try:
+            index = SubtitleIndex.load(path)
+        except (OSError, ValueError, KeyError):
+            index = None
+        if index is not None and index.matches(video_path, detect):
+            print(f"Usando índice de legendas: {path}")
+            return index
+
+    return analyze_video(video_path, band_top_frac, band_bottom_frac, band_left_frac,
+                         band_right_frac, thresh_val, scale, progress_callback)
+
+
+def make_cleaner(band, clean_args, cache=None, subtitle_index=None, timer=None,
+                 filler=None, yuv=False, regions=None, propagation=None):
+    """
+    Função clean(frame, índice) usada nos laços de processamento, com um
+    FrameKernel (e seus buffers) por thread. Com `yuv`, os frames são
+    yuv420p (FrameKernel.clean_yuv; sem cache nem preenchimento temporal).
+    Com `regions` (grupos de plan_regions), limpa cada grupo no mesmo frame
+    e ignora `band`, `clean_args`, o cache, o filler, o índice e `propagation`.
+    Com `propagation` (MaskPropagation), a detecção completa roda só de
+    tempos em tempos (como o cache, precisa de uma thread só).
+    Com `subtitle_index`, frames sem legenda passam direto (sem detecção) e
+    os demais são processados só no retângulo do texto, com folga para a
+    dilatação e o contexto do inpainting.
+    """
+    if regions is not None:
+        return _region_cleaner(regions, timer, yuv)
+    local = threading.local()
+
+    def frame_kernel():
+        kernel = getattr(local, "kernel", None)
+        if kernel is None:
+            kernel = local.kernel = FrameKernel(*clean_args, timer=timer)
+        return kernel
+
+    def clean_band(frame, sub_band):
+        if yuv:
+            return frame_kernel().clean_yuv(frame, sub_band, propagation=propagation)
+        return frame_kernel().clean(frame, sub_band, cache, filler, propagation=propagation)
+
+    if subtitle_index is None:
+        def clean(frame, frame_idx):
+            return clean_band(frame, band)
+        return clean
+
+    band_top, band_bottom, band_left, band_right = band
+    dilation_iter = clean_args[3]
+    mask_scale = clean_args[6]
+    scale = subtitle_index.detect.get("scale", 1.0)
+    # fechamento + dilatação + margem do inpainting + erro das escalas reduzidas
+    pad = (int(np.ceil(1.0 / mask_scale)) + dilation_iter + TILE_MARGIN +
+           int(np.ceil(1.0 / scale)) + 1)
+
+    def clean(frame, frame_idx):
+        box = subtitle_index.box_at(frame_idx)
+        if box is None:
+            if filler is not None:
+                # Frame sem legenda: a faixa inteira está limpa
+                filler.observe(frame[band_top:band_bottom, band_left:band_right], None,
+                               (band_top, band_left))
+            if timer is not None:
+                timer.count_frame(None)
+            return frame
+        x, y, w, h = box
+        sub_band = (max(band_top, band_top + y - pad),
+                    min(band_bottom, band_top + y + h + pad),
+                    max(band_left, band_left + x - pad),
+                    min(band_right, band_left + x + w + pad))
+        return clean_band(frame, sub_band)
+
+    return clean
+
+
+# ---------- VÁRIAS REGIÕES NUMA PASSADA ---------- #
+
+REGION_KEYS = ("thresh_val", "min_pixels_text", "clean_weight", "dilation_iter", "use_edges")
+
+
+def normalize_regions(regions, **defaults):
+    """
+    Regiões de remoção completas. Cada uma é um dict com "band" (topo, base,
+    esq, dir em frações) e, se quiser, os próprios thresh_val,
+    min_pixels_text, clean_weight, dilation_iter e use_edges; o que faltar
+    vem de `defaults`. Levanta ValueError se alguma faixa for vazia.
+    """
+    result = []
+    for i, region in enumerate(regions, 1):
+        top, bottom, left, right = (max(0.0, min(1.0, float(v))) for v in region["band"])
+        if bottom <= top or right <= left:
+            raise ValueError(f"Região {i}: o fim da faixa deve ser maior que o início.")
+        full = {"band": [top, bottom, left, right]}
+        for key in REGION_KEYS:
+            full[key] = region.get(key, defaults[key])
+        full["clean_weight"] = max(0.0, min(1.0, full["clean_weight"]))
+        result.append(full)
+    return result
+
+
+def plan_regions(regions, shape, tile_inpaint=False, mask_scale=1.0):
+    """
+    Grupos de limpeza das regiões (normalize_regions) num frame de `shape`.
+    Regiões que se sobrepõem viram um grupo: a máscara é a união das
+    máscaras de cada uma (com o limiar, bordas e dilatação dela) e o
+    inpainting roda uma vez só no retângulo que cobre todas, então nenhum
+    pixel é inpaintado duas vezes. Cada pixel da máscara é misturado com a
+    densidade da região que o detectou (a maior, onde duas detectam; ver
+    merged_mask); com densidades iguais, o grupo usa essa densidade.
+    Retorna [(faixa em pixels, clean_args, membros)]: membros é None para
+    uma região sozinha, ou [(clean_args, (y1, y2, x1, x2) relativo à faixa)].
+    """
+    h, w = shape[:2]
+
+    def region_args(region):
+        return (region["thresh_val"], region["min_pixels_text"], region["clean_weight"],
+                region["dilation_iter"], region["use_edges"], tile_inpaint, mask_scale)
+
+    boxes = [[band_from_fracs(shape, *r["band"]), [r]] for r in regions]
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for band, members in boxes:
+            for other in result:
+                ob = other[0]
+                if band[0] < ob[1] and ob[0] < band[1] and band[2] < ob[3] and ob[2] < band[3]:
+                    other[0] = (min(band[0], ob[0]), max(band[1], ob[1]),
+                                min(band[2], ob[2]), max(band[3], ob[3]))
+                    other[1].extend(members)
+                    merged = True
+                    break
+            else:
+                result.append([band, members])
+        boxes = result
+
+    groups = []
+    for band, members in boxes:
+        if len(members) == 1:
+            groups.append((band, region_args(members[0]), None))
+            continue
+        # Alinhada a pixels pares: o modo YUV não precisa mexer na faixa (e nos membros)
+        top, bottom, left, right = band
+        band = (top - top % 2, min(h, bottom + bottom % 2),
+                left - left % 2, min(w, right + right % 2))
+        parts = []
+        for region in members:
+            t, b, l, r = band_from_fracs(shape, *region["band"])
+            parts.append((region_args(region), (t - band[0], b - band[0], l - band[2], r - band[2])))
+        weight = max(region["clean_weight"] for region in members)
+        groups.append((band, (0, 0, weight, 0, False, tile_inpaint, mask_scale), parts))
+    return groups
+
+
+# Opções de --region na linha de comando -> chave da região e conversão
+REGION_OPTIONS = {
+    "thresh": ("thresh_val", int),
+    "min-pixels": ("min_pixels_text", int),
+    "density": ("clean_weight", float),
+    "dilation": ("dilation_iter", int),
+    "edges": ("use_edges", lambda v: v.lower() in ("1", "sim", "true", "yes")),
+}
+
+
+def parse_region(text):
+    """"0.05,0.2,0,1:thresh=240,dilation=6" -> {"band": [...], "thresh_val": 240, "dilation_iter": 6}"""
+    band, _, options = text.partition(":")
+    values = band.split(",")
+    if len(values) != 4:
+        raise ValueError(f"região precisa de TOPO,BASE,ESQ,DIR: {text}")
+    region = {"band": [float(v) for v in values]}
+    for option in filter(None, options.split(",")):
+        name, _, value = option.partition("=")
+        if name not in REGION_OPTIONS:
+            raise ValueError(f"opção de região desconhecida: {name} "
+                             f"(use {', '.join(REGION_OPTIONS)})")
+        key, convert = REGION_OPTIONS[name]
+        region[key] = convert(value)
+    return region
+
+
+class _FrameTally:
+    """
+    Timer de um frame com vários grupos de regiões: soma os tempos e a
+    máscara de todos e passa ao StageTimer uma amostra por etapa, como num
+    frame de uma região só.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.mask_pixels = None
+
+    def add(self, stage, seconds):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    def count_frame(self, mask_pixels=None):
+        if mask_pixels is not None:
+            self.mask_pixels = (self.mask_pixels or 0) + mask_pixels
+
+    def flush(self, timer):
+        for stage, seconds in self.seconds.items():
+            timer.add(stage, seconds)
+        timer.count_frame(self.mask_pixels)
+        self.seconds = {}
+        self.mask_pixels = None
+
+
+def _region_cleaner(groups, timer=None, yuv=False):
+    """clean(frame, índice) de make_cleaner para vários grupos de regiões (kernels por thread)."""
+    local = threading.local()
+
+    def group_kernels():
+        kernels = getattr(local, "kernels", None)
+        if kernels is None:
+            local.tally = _FrameTally() if timer is not None else None
+            kernels = local.kernels = [
+                (FrameKernel(*args, timer=local.tally),
+                 None if members is None else
+                 [(FrameKernel(*member_args), rect) for member_args, rect in members])
+                for _, args, members in groups
+            ]
+        return kernels
+
+    def clean(frame, frame_idx):
+        for (band, _, _), (kernel, members) in zip(groups, group_kernels()):
+            if yuv:
+                kernel.clean_yuv(frame, band, members)
+            else:
+                kernel.clean(frame, band, members=members)
+        if local.tally is not None:
+            local.tally.flush(timer)
+        return frame
+
+    return clean
+
+
+# ---------- CALIBRAÇÃO AUTOMÁTICA (FAIXA E LIMIAR) ---------- #
+
+CALIBRATION_CONTRAST = 60   # texto: pelo menos isso mais claro que o entorno (top-hat)
+CALIBRATION_MIN_BRIGHT = 160
+CALIBRATION_THRESH_RANGE = (160, 250)
+CALIBRATION_SEEK_DISTANCE = 8  # avanços menores que isso decodificam em sequência (seek custa mais)
+
+
+def _sample_positions(frame_count, samples):
+    """
+    Frames a amostrar, numa ordem que cobre o vídeo todo desde o começo
+    (sequência de van der Corput: 1/2, 1/4, 3/4, 1/8...). Se o tempo acabar
+    no meio, as amostras lidas já estão espalhadas.
+    """
+    positions = []
+    for k in range(1, samples + 1):
+        frac, f, i = 0.0, 0.5, k
+        while i:
+            frac += f * (i & 1)
+            i >>= 1
+            f /= 2
+        pos = int(frac * frame_count)
+        if pos not in positions:
+            positions.append(pos)
+    return positions
+
+
+def _text_boxes(gray, kernel, join_kernel):
+    """
+    Retângulos (x, y, w, h) dos blocos de texto claro do frame e a máscara dos
+    pixels de texto: claros e bem mais claros que o entorno (top-hat), o que
+    descarta áreas claras grandes (céu, parede) que passariam no threshold.
+    """
+    h = gray.shape[0]
+    tophat = cv2.morphologyEx(gray, cv2.MORPH_TOPHAT, kernel)
+    text = ((tophat >= CALIBRATION_CONTRAST) & (gray >= CALIBRATION_MIN_BRIGHT)).view(np.uint8)
+    # Junta as letras de uma linha num bloco só
+    joined = cv2.morphologyEx(text, cv2.MORPH_CLOSE, join_kernel)
+    n, _, stats, _ = cv2.connectedComponentsWithStats(joined, connectivity=8)
+
+    boxes = []
+    for x, y, w, bh, area in stats[1:]:
+        # Linha de texto: mais larga que alta, nem minúscula nem do tamanho da tela
+        if h * 0.01 <= bh <= h * 0.2 and w >= bh and area >= bh * 2:
+            boxes.append((int(x), int(y), int(w), int(bh)))
+    return boxes, text
+
+
+def _busiest_run(hits, min_hits, max_gap):
+    """Trecho [início, fim) de linhas com `min_hits` ou mais ocorrências (buracos até `max_gap`) com mais ocorrências no total."""
+    best, best_score = None, 0
+    start = end = None
+    score = 0
+    for i, count in enumerate(hits.tolist() + [0]):
+        if count >= min_hits:
+            if start is None or i - end > max_gap:
+                if start is not None and score > best_score:
+                    best, best_score = (start, end), score
+                start, score = i, 0
+            end = i + 1
+            score += count
+    if start is not None and score > best_score:
+        best = (start, end)
+    return best
+
+
+def calibrate_video(video_path, samples=40, max_seconds=2.0, dilation_iter=10):
+    """
+    Acha onde a legenda aparece e sugere o limiar, olhando só `samples` frames
+    espalhados pelo vídeo (com seek), em no máximo ~`max_seconds`.
+
+    Em cada amostra, os pixels de texto são os claros que se destacam do
+    entorno; as linhas de texto que aparecem em mais de uma amostra formam a
+    faixa (o trecho vertical com mais ocorrências, para ignorar um logo ou
+    texto solto em outro lugar). A faixa ganha uma margem que cobre a
+    dilatação da máscara. O limiar fica logo abaixo do brilho típico dos
+    pixels de texto (percentil 25 - 5).
+
+    Retorna um dict com band (frações topo, base, esq, dir, como no
+    process_video), thresh_val, samples, text_samples e seconds; ou None se
+    nenhuma amostra tiver texto.
+    """
+    start_time = time.time()
+    vid = cv2.VideoCapture(video_path)
+    if not vid.isOpened():
+        raise RuntimeError("Não foi possível abrir o vídeo.")
+    frame_count = int(vid.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(vid.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(vid.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    size = max(9, height // 60) | 1
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (size, size))
+    join_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (size * 2 + 1, size // 2 | 1))
+
+    row_hits = np.zeros(height, np.int32)
+    boxes = []
+    brightness = []
+    read = text_samples = 0
+    gray = None
+    positions = _sample_positions(max(1, frame_count), samples)
+    if frame_count < samples * CALIBRATION_SEEK_DISTANCE:
+        positions.sort()  # vídeo curto: lê em ordem, quase sem seek
+    next_pos = 0
+    try:
+        for pos in positions:
+            if read and time.time() - start_time > max_seconds:
+                break
+            if not 0 <= pos - next_pos < CALIBRATION_SEEK_DISTANCE:
+                vid.set(cv2.CAP_PROP_POS_FRAMES, pos)
+                next_pos = pos
+            while next_pos < pos and vid.grab():
+                next_pos += 1
+            ret, frame = vid.read()
+            next_pos = pos + 1
+            if not ret:
+                continue
+            read += 1
+
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+            frame_boxes, text = _text_boxes(gray, kernel, join_kernel)
+            if not frame_boxes:
+                continue
+            text_samples += 1
+
+            rows = np.zeros(height, bool)
+            for x, y, w, h in frame_boxes:
+                rows[y:y + h] = True
+                values = gray[y:y + h, x:x + w][text[y:y + h, x:x + w] > 0]
+                brightness.append(values[::max(1, values.size // 2000)])
+            row_hits += rows
+            boxes.extend(frame_boxes)
+    finally:
+        vid.release()
+
+    elapsed = time.time() - start_time
+    name = os.path.basename(video_path)
+    if not text_samples:
+        print(f"Calibração: nenhuma legenda nas {read} amostras de {name} ({elapsed:.2f} s)")
+        return None
+
+    # Texto que aparece numa amostra só (logo, placa) não define a faixa
+    min_hits = 2 if text_samples >= 4 else 1
+    run = _busiest_run(row_hits, min_hits, max_gap=height // 20)
+    if run is None:
+        run = _busiest_run(row_hits, 1, max_gap=height // 20)
+    top, bottom = run
+    in_run = [(x, w) for x, y, w, h in boxes if y < bottom and y + h > top]
+    left = min(x for x, _ in in_run)
+    right = max(x + w for x, w in in_run)
+
+    # A máscara dilatada e o contexto do inpainting precisam caber na faixa;
+    # na horizontal, folga extra para falas mais longas que as amostradas
+    margin = dilation_iter + TILE_MARGIN + height // 100
+    top, bottom = max(0, top - margin), min(height, bottom + margin)
+    margin_x = max(margin, width // 20)
+    left, right = max(0, left - margin_x), min(width, right + margin_x)
+
+    values = np.concatenate(brightness)
+    low, high = CALIBRATION_THRESH_RANGE
+    thresh_val = int(max(low, min(high, np.percentile(values, 25) - 5)))
+
+    result = {
+        "band": [round(top / height, 3), round(bottom / height, 3),
+                 round(left / width, 3), round(right / width, 3)],
+        "thresh_val": thresh_val,
+        "samples": read,
+        "text_samples": text_samples,
+        "seconds": elapsed,
+    }
+    top_frac, bottom_frac, left_frac, right_frac = result["band"]
+    print(f"Calibração de {name}: faixa Y {top_frac:.1%}-{bottom_frac:.1%}, "
+          f"X {left_frac:.1%}-{right_frac:.1%}, limiar {thresh_val} "
+          f"({text_samples}/{read} amostras com legenda, {elapsed:.2f} s)")
+    return result
+
+
+# ---------- PROCESSAMENTO EM BLOCOS (VÁRIOS PROCESSOS) ---------- #
+
+FFPROBE_BIN = "ffprobe"
+
+
+def probe_keyframes(video_path, fps):
+    """
+    Índices dos keyframes do vídeo (via ffprobe; sem ele, pelos pacotes que o
+    ffmpeg lista). Lista vazia se não for possível obter.
+    """
+    cmd = [FFPROBE_BIN, "-v", "error", "-select_streams", "v:0",
+           "-skip_frame", "nokey", "-show_entries", "frame=pts_time",
+           "-of", "csv=p=0", video_path]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except FileNotFoundError:
+        return _keyframes_from_packets(video_path, fps)
+    if result.returncode != 0:
+        return []
+
+    times = []
+    for line in result.stdout.split():
+        try:
+            times.append(float(line.strip(",")))
+        except ValueError:
+            continue
+    if not times:
+        return []
+
+    start = min(times)
+    return sorted({int(round((t - start) * fps)) for t in times})
+
+
+def _keyframes_from_packets(video_path, fps):
+    """
+    Keyframes pela lista de pacotes do ffmpeg (-c copy -f framecrc: só lê o
+    contêiner, não decodifica). Pacotes sem "F=" ou com o bit 1 são keyframes.
+    """
+    cmd = [FFMPEG_BIN, "-loglevel", "error", "-nostats", "-i", video_path,
+           "-map", "0:v:0", "-c", "copy", "-f", "framecrc", "-"]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except FileNotFoundError:
+        return []
+    if result.returncode != 0:
+        return []
+
+    timebase = None
+    all_pts, key_pts = [], []
+    for line in result.stdout.splitlines():
+        if line.startswith("#tb 0:"):
+            num, _, den = line.split(":", 1)[1].strip().partition("/")
+            timebase = int(num) / float(den)
+            continue
+        fields = [f.strip() for f in line.split(",")]
+        if line.startswith("#") or timebase is None or len(fields) < 6:
+            continue
+        pts = int(fields[2])
+        all_pts.append(pts)
+        flags = fields[6] if len(fields) > 6 else ""
+        if not flags.startswith("F=") or int(flags[2:], 16) & 1:
+            key_pts.append(pts)
+    if not key_pts:
+        return []
+
+    start = min(all_pts)
+    return sorted({int(round((pts - start) * timebase * fps)) for pts in key_pts})
+
+
+def split_frame_ranges(frame_count, parts, keyframes=()):
+    """
+    Divide [0, frame_count) em até `parts` trechos (início, fim) de tamanho
+    parecido, com as fronteiras encaixadas no keyframe mais próximo.
+    """
+    keyframes = [k for k in keyframes if 0 < k < frame_count]
+    bounds = [0]
+    for i in range(1, parts):
+        target = round(frame_count * i / parts)
+        if keyframes:
+            target = min(keyframes, key=lambda k: abs(k - target))
+        if bounds[-1] < target < frame_count:
+            bounds.append(target)
+    bounds.append(frame_count)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def concat_segments(video_path, segments, concat_list, final_output, frame_count,
+                    timer=None, durations=None):
+    """
+    Junta os segmentos (concat do ffmpeg, sem recodificar) com o áudio original.
+    `durations` (segundos, um por segmento) substitui a duração que o concat
+    deduziria de cada arquivo.
+    """
+    print("\nJuntando segmentos e copiando áudio original...")
+    with open(concat_list, "w", encoding="utf-8") as f:
+        for i, seg in enumerate(segments):
+            path = os.path.abspath(seg).replace("'", "'\\''")
+            f.write(f"file '{path}'\n")
+            if durations is not None:
+                f.write(f"duration {durations[i]:.6f}\n")
+
+    t0 = time.perf_counter()
+    run_ffmpeg(["-f", "concat", "-safe", "0", "-i", concat_list]
+               + audio_mux_args(video_path) + ["-c:v", "copy", final_output],
+               frame_count)
+    if timer is not None:
+        timer.add("encode", time.perf_counter() - t0)
+
+
+SEEK_PREROLL_SECONDS = 2.0  # o seek do open_at cai esse tanto antes do frame pedido
+
+
+def open_at(video_path, start, fps):
+    """
+    VideoCapture cujo próximo read() é exatamente o frame `start`. O seek
+    por frame do OpenCV (CAP_PROP_POS_FRAMES) não é exato em muitos
+    H.264/HEVC e repetiria ou pularia frames na emenda dos trechos: aqui o
+    seek cai antes (no keyframe anterior a ~SEEK_PREROLL_SECONDS do alvo) e
+    os frames são descartados pelo timestamp até o alvo. Se os timestamps
+    não fecharem, conta os frames desde o começo do vídeo.
+    """
+    back = max(1, int(round(SEEK_PREROLL_SECONDS * fps)))
+    while True:
+        vid = cv2.VideoCapture(video_path)
+        if not vid.isOpened():
+            raise RuntimeError("Não foi possível abrir o vídeo.")
+        seek = max(0, start - back)
+        if start <= 0:
+            return vid
+        if seek == 0:
+            # Do começo, a posição é a contagem de frames: sempre exata
+            for _ in range(start):
+                if not vid.grab():
+                    break
+            return vid
+
+        vid.set(cv2.CAP_PROP_POS_MSEC, seek * 1000.0 / fps)
+        idx = None
+        while vid.grab():
+            idx = int(round(vid.get(cv2.CAP_PROP_POS_MSEC) * fps / 1000.0))
+            if idx >= start - 1:
+                break
+        if idx == start - 1:
+            return vid
+        # O seek passou do alvo (ou o timestamp pulou): volta mais
+        vid.release()
+        back *= 4
+
+
+def _process_chunk(video_path, start, end, segment_path, band, clean_args,
+                   fps, workers, progress_queue, chunk_id, temporal_cache=False,
+                   subtitle_index=None, fill_engine="telea", encoder_args=None,
+                   regions=None, detect_every=1):
+    """
+    Executado em outro processo: limpa os frames [start, end) e codifica o
+    segmento (`encoder_args`: opções extras do ffmpeg para a saída;
+    `regions`: grupos de plan_regions, como no make_cleaner; com
+    `detect_every` > 1, detecção completa só a cada tantos frames).
+    Os frames limpos são os mesmos do processamento em um processo, exceto
+    com cache temporal, preenchimento temporal e `detect_every`: o estado
+    deles recomeça vazio em cada trecho, então a emenda não é equivalente.
+    """
+    vid = open_at(video_path, start, fps)
+
+    width = int(vid.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(vid.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    # Segmento sem áudio; o áudio original entra só na junção final
+    writer = FFmpegPipeWriter(segment_path, width, height, fps,
+                              frame_count=end - start, output_args=encoder_args)
+
+    done = 0
+
+    def frame_done():
+        nonlocal done
+        done += 1
+        if done % 10 == 0:
+            progress_queue.put((chunk_id, 10))
+
+    # Cada trecho tem seu próprio cache (começa vazio no início do trecho)
+    cache = TemporalCache() if temporal_cache else None
+    filler = TemporalFill(band) if fill_engine == "temporal" else None
+    propagation = MaskPropagation(detect_every) if detect_every > 1 else None
+    timer = StageTimer()
+    clean = make_cleaner(band, clean_args, cache, subtitle_index, timer, filler,
+                         regions=regions, propagation=propagation)
+
+    completed = False
+    try:
+        clean_frames(vid, writer, clean, workers, frame_done,
+                     frame_limit=end - start, first_index=start, timer=timer)
+        completed = True
+    finally:
+        vid.release()
+        if completed:
+            t0 = time.perf_counter()
+            writer.release()
+            timer.add("encode", time.perf_counter() - t0)
+        else:
+            writer.abort()
+
+    progress_queue.put((chunk_id, done % 10))
+    if cache is not None:
+        print(f"Trecho {chunk_id}: {cache.summary()}")
+    if filler is not None:
+        print(f"Trecho {chunk_id}: {filler.summary()}")
+    if propagation is not None:
+        print(f"Trecho {chunk_id}: {propagation.summary()}")
+    return done, timer.to_dict()
+
+
+def process_video_chunked(video_path, final_output, frame_count, fps, width,
+                          height, band, clean_args, processes, workers=1,
+                          reporter=None, temporal_cache=False,
+                          subtitle_index=None, timer=None, fill_engine="telea",
+                          regions=None, detect_every=1):
+    """
+    Divide o vídeo em trechos (nos keyframes), limpa cada trecho num processo
+    separado e junta os segmentos com o áudio original sem recodificar.
+    Cada trecho começa no frame exato (open_at) e sai igual ao processamento
+    em um processo; cache temporal, preenchimento temporal e `detect_every`
+    recomeçam vazios em cada trecho, então nesses modos não há equivalência.
+    `reporter` (ProgressReporter) recebe o total de frames limpos; os tempos
+    de cada trecho são somados em `timer` (StageTimer).
+    """
+    keyframes = probe_keyframes(video_path, fps)
+    ranges = split_frame_ranges(frame_count, processes, keyframes)
+    print(f"Trechos: {', '.join(f'{a}-{b - 1}' for a, b in ranges)}")
+
+    base, _ = os.path.splitext(final_output)
+    segments = [f"{base}_parte{i:03d}.mp4" for i in range(len(ranges))]
+    concat_list = f"{base}_partes.txt"
+
+    manager = multiprocessing.Manager()
+    progress_queue = manager.Queue()
+
+    try:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            futures = [
+                pool.submit(_process_chunk, video_path, start, end, segments[i],
+                            band, clean_args, fps, workers, progress_queue, i,
+                            temporal_cache, subtitle_index, fill_engine, None, regions,
+                            detect_every)
+                for i, (start, end) in enumerate(ranges)
+            ]
+
+            processed = 0
+            last_report = 0
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=0.2)
+                while not progress_queue.empty():
+                    _, n = progress_queue.get()
+                    processed += n
+                if reporter is not None and (processed > last_report or not pending):
+                    last_report = processed
+                    reporter.update(processed)
+
+            # Propaga o primeiro erro de um dos processos
+            results = [f.result() for f in futures]
+            written = sum(done for done, _ in results)
+            if timer is not None:
+                for _, state in results:
+                    timer.merge(state)
+
+        if written != frame_count:
+            print(f"Aviso: {written} frames gravados de {frame_count} esperados")
+
+        concat_segments(video_path, segments, concat_list, final_output, frame_count, timer)
+    finally:
+        manager.shutdown()
+        for path in segments + [concat_list]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def run_segments(video_path, jobs, band, clean_args, fps, processes=1, workers=1,
+                 reporter=None, processed=0, temporal_cache=False, subtitle_index=None,
+                 timer=None, fill_engine="telea", on_done=None, encoder_args=None,
+                 regions=None, detect_every=1):
+    """
+    Limpa e codifica cada segmento de `jobs` [(id, início, fim, arquivo)] com
+    _process_chunk: numa thread, ou em `processes` processos. `processed` é o
+    total de frames já prontos antes (para o progresso); `on_done(id)` é
+    chamado a cada segmento pronto. No primeiro erro, cancela o que ainda não
+    começou e levanta a exceção.
+    """
+    if processes > 1:
+        manager = multiprocessing.Manager()
+        progress_queue = manager.Queue()
+        pool = ProcessPoolExecutor(max_workers=processes)
+    else:
+        manager = None
+        progress_queue = queue.Queue()
+        pool = ThreadPoolExecutor(max_workers=1)
+
+    try:
+        with pool:
+            futures = {
+                pool.submit(_process_chunk, video_path, start, end, path, band,
+                            clean_args, fps, workers, progress_queue, i,
+                            temporal_cache, subtitle_index, fill_engine, encoder_args,
+                            regions, detect_every): i
+                for i, start, end, path in jobs
+            }
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                while not progress_queue.empty():
+                    _, n = progress_queue.get()
+                    processed += n
+
+                for future in finished:
+                    try:
+                        _, state = future.result()
+                    except Exception:
+                        for other in pending:
+                            other.cancel()
+                        raise
+                    if on_done is not None:
+                        on_done(futures[future])
+                    if timer is not None:
+                        timer.merge(state)
+
+                if reporter is not None:
+                    reporter.update(processed)
+    finally:
+        if manager is not None:
+            manager.shutdown()
+
+
+# ---------- RETOMADA (SEGMENTOS + MANIFESTO) ---------- #
+
+RESUME_SEGMENT_SECONDS = 60
+
+
+def output_params(band_top_frac=0.55, band_bottom_frac=0.95, band_left_frac=0.0,
+                  band_right_frac=1.0, thresh_val=230, min_pixels_text=150,
+                  clean_weight=0.75, dilation_iter=10, use_edges=False,
+                  tile_inpaint=False, temporal_cache=False, subtitle_index=False,
+                  mask_scale=1.0, fill_engine="telea", auto_calibrate=False,
+                  smart_copy=False, regions=None, detect_every=1, direct_ffmpeg=False,
+                  processes=1, resume=False, yuv=False, **_):
+    """
+    Os argumentos do process_video que mudam a saída (threads, pasta e afins
+    não entram). A retomada e o cache de saídas só reaproveitam o que foi
+    feito com os mesmos valores. "encoder" é por onde os frames chegam ao
+    H.264: "xvid" (AVI temporário, uma compressão a mais) só quando
+    process_video usaria esse caminho; segmentos e blocos vão pelo pipe.
+    "yuv" é o modo que vale depois das trocas do process_video (retomada,
+    cópia direta, blocos e cache/preenchimento temporal voltam para BGR;
+    a paridade das dimensões depende só do vídeo).
+    """
+    if regions and len(regions) > 1:
+        temporal_cache, fill_engine = False, "telea"  # desligados com várias regiões
+    yuv = bool(yuv and not (resume or smart_copy or processes > 1 or temporal_cache
+                            or fill_engine == "temporal"))
+    xvid = not (direct_ffmpeg or yuv) and processes <= 1 and not resume
+    return {
+        "band": [band_top_frac, band_bottom_frac, band_left_frac, band_right_frac],
+        "thresh_val": thresh_val, "min_pixels_text": min_pixels_text,
+        "clean_weight": clean_weight, "dilation_iter": dilation_iter,
+        "use_edges": use_edges, "tile_inpaint": tile_inpaint,
+        "temporal_cache": temporal_cache, "subtitle_index": bool(subtitle_index),
+        "mask_scale": mask_scale, "fill_engine": fill_engine,
+        "auto_calibrate": auto_calibrate, "smart_copy": smart_copy,
+        "regions": regions, "detect_every": detect_every,
+        "encoder": "xvid" if xvid else "pipe", "yuv": yuv,
+    }
+
+
+def resume_manifest_path(final_output):
+    """Manifesto ao lado da saída: video_sem_legenda.mp4 -> video_sem_legenda.retomada.json"""
+    return os.path.splitext(final_output)[0] + ".retomada.json"
+
+
+class ResumeManifest:
+    """
+    Estado de um processamento retomável: os trechos (início, fim) do vídeo,
+    quais já foram codificados e os parâmetros usados. Os segmentos ficam
+    numa pasta ao lado da saída e o manifesto é regravado a cada segmento
+    pronto; ao final a pasta é apagada e o manifesto fica com `complete`.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, source, params, ranges=None, done=(), complete=False,
+                 calibration=None):
+        self.path = path
+        self.source = source
+        self.params = json.loads(json.dumps(params))  # mesmo formato que volta do JSON
+        self.ranges = ranges
+        self.done = set(done)
+        self.complete = complete
+        self.calibration = calibration
+
+    @classmethod
+    def for_video(cls, video_path, final_output, params, calibration=None):
+        stat = os.stat(video_path)
+        return cls(resume_manifest_path(final_output),
+                   {"size": stat.st_size, "mtime": int(stat.st_mtime)}, params,
+                   calibration=calibration)
+
+    @property
+    def segment_dir(self):
+        return self.path[:-len(".retomada.json")] + "_partes"
+
+    def segment_path(self, i):
+        return os.path.join(self.segment_dir, f"parte{i:04d}.mp4")
+
+    def done_frames(self):
+        return sum(end - start for i, (start, end) in enumerate(self.ranges) if i in self.done)
+
+    def matches(self, video_path, params):
+        """True se o manifesto é deste arquivo (tamanho/data) com os mesmos parâmetros."""
+        stat = os.stat(video_path)
+        return (self.source.get("size") == stat.st_size and
+                self.source.get("mtime") == int(stat.st_mtime) and
+                self.params == json.loads(json.dumps(params)))
+
+    def save(self):
+        data = {
+            "version": self.VERSION,
+            "source": self.source,
+            "params": self.params,
+            "calibration": self.calibration,
+            "ranges": self.ranges,
+            "done": sorted(self.done),
+            "complete": self.complete,
+        }
+        # Grava num temporário e troca: um processo morto no meio não corrompe o manifesto
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(self.path + ".tmp", self.path)
+
+    @classmethod
+    def load(cls, path):
+        """Manifesto salvo, ou None se não existir ou não for legível."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != cls.VERSION:
+            return None
+        ranges = data["ranges"] and [tuple(r) for r in data["ranges"]]
+        return cls(path, data["source"], data["params"], ranges, data["done"],
+                   data["complete"], data.get("calibration"))
+
+
+def resume_complete(video_path, params):
+    """True se o vídeo já foi processado por completo (retomada) com estes argumentos do process_video."""
+    _, final_output = output_paths(video_path, params.get("output_dir"), params.get("output_name"))
+    manifest = ResumeManifest.load(resume_manifest_path(final_output))
+    return (manifest is not None and manifest.complete and os.path.exists(final_output)
+            and manifest.matches(video_path, output_params(**params)))
+
+
+def process_video_resumable(video_path, final_output, frame_count, fps, band,
+                            clean_args, manifest, processes=1, workers=1,
+                            reporter=None, temporal_cache=False,
+                            subtitle_index=None, timer=None, fill_engine="telea",
+                            segment_seconds=RESUME_SEGMENT_SECONDS, regions=None,
+                            detect_every=1):
+    """
+    Limpa o vídeo em segmentos de ~`segment_seconds` codificados um a um
+    (em `processes` processos) e anota cada segmento pronto no manifesto.
+    Se o processamento morrer, a próxima chamada com o mesmo manifesto só
+    refaz os segmentos que faltam. No fim junta tudo com o áudio original.
+    """
+    if manifest.ranges is None:
+        # Manifesto novo: segmentos de algum processamento antigo não valem mais
+        shutil.rmtree(manifest.segment_dir, ignore_errors=True)
+        parts = max(1, -(-frame_count // max(1, int(segment_seconds * fps))))
+        manifest.ranges = split_frame_ranges(frame_count, parts,
+                                             probe_keyframes(video_path, fps))
+        manifest.done.clear()
+        manifest.complete = False
+        manifest.save()
+    else:
+        # Segmento anotado como pronto mas apagado (ou a pasta toda): refaz esse
+        lost = {i for i in manifest.done if not os.path.exists(manifest.segment_path(i))}
+        if lost:
+            print(f"Segmentos prontos não encontrados: {len(lost)}, refazendo")
+            manifest.done -= lost
+            manifest.save()
+    os.makedirs(manifest.segment_dir, exist_ok=True)
+
+    todo = [i for i in range(len(manifest.ranges)) if i not in manifest.done]
+    processed = manifest.done_frames()
+    if manifest.done:
+        print(f"Retomando: {len(manifest.done)}/{len(manifest.ranges)} segmentos "
+              f"já prontos ({processed} frames)")
+    else:
+        print(f"Segmentos: {len(manifest.ranges)} de até {segment_seconds} s")
+    if reporter is not None:
+        reporter.start_at(processed)
+
+    def segment_done(i):
+        manifest.done.add(i)
+        manifest.save()
+
+    jobs = [(i, start, end, manifest.segment_path(i))
+            for i, (start, end) in enumerate(manifest.ranges) if i in todo]
+    # Se um segmento falhar, os prontos já estão no manifesto; o resto fica para a próxima vez
+    run_segments(video_path, jobs, band, clean_args, fps, processes, workers, reporter,
+                 processed, temporal_cache, subtitle_index, timer, fill_engine,
+                 on_done=segment_done, regions=regions, detect_every=detect_every)
+
+    segments = [manifest.segment_path(i) for i in range(len(manifest.ranges))]
+    concat_segments(video_path, segments, os.path.join(manifest.segment_dir, "partes.txt"),
+                    final_output, frame_count, timer)
+
+    manifest.complete = True
+    manifest.save()
+    shutil.rmtree(manifest.segment_dir, ignore_errors=True)
+
+
+# ---------- CÓPIA DIRETA DOS GOPs SEM LEGENDA ---------- #
+
+SMART_COPY_CODECS = ("h264", "avc1", "x264")
+# Trechos recodificados levam SPS/PPS em todo keyframe: depois da junção o
+# decodificador troca de parâmetros a cada trecho (os copiados recebem os
+# deles pelo h264_mp4toannexb)
+SMART_COPY_ENCODER_ARGS = ["-x264-params", "repeat-headers=1"]
+# Perfil do H.264 (como o ffprobe informa, em minúsculas) -> -profile do x264
+X264_PROFILES = {"constrained baseline": "baseline", "baseline": "baseline", "main": "main",
+                 "high": "high", "high 10": "high10", "high 4:2:2": "high422",
+                 "high 4:4:4 predictive": "high444"}
+X264_PIX_FMTS = ("yuv420p", "yuvj420p", "yuv422p", "yuvj422p", "yuv444p", "yuvj444p",
+                 "yuv420p10le", "yuv422p10le", "yuv444p10le", "gray", "gray10le")
+# Cores do stream -> opção do ffmpeg que grava a mesma marcação no H.264
+COLOR_OPTIONS = (("color_range", "-color_range"), ("color_space", "-colorspace"),
+                 ("color_primaries", "-color_primaries"), ("color_transfer", "-color_trc"))
+
+
+def video_codec(video_path):
+    """FourCC do vídeo em minúsculas (ex.: "h264", "xvid"), como o OpenCV informa."""
+    vid = cv2.VideoCapture(video_path)
+    fourcc = int(vid.get(cv2.CAP_PROP_FOURCC))
+    vid.release()
+    return fourcc.to_bytes(4, "little").decode("ascii", "replace").strip("\x00 ").lower()
+
+
+def probe_video_stream(video_path):
+    """
+    Perfil, nível, formato de pixel e cores do vídeo como o ffprobe informa
+    (sem ele, pelo SPS do primeiro keyframe, ver _stream_from_sps). Cores
+    não informadas ficam de fora. None se não for possível obter.
+    """
+    cmd = [FFPROBE_BIN, "-v", "error", "-select_streams", "v:0",
+           "-show_entries", "stream=profile,level,pix_fmt," +
+           ",".join(key for key, _ in COLOR_OPTIONS), "-of", "json", video_path]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except FileNotFoundError:
+        return _stream_from_sps(video_path)
+    if result.returncode != 0:
+        return None
+    try:
+        stream = json.loads(result.stdout)["streams"][0]
+    except (ValueError, KeyError, IndexError):
+        return None
+    return {key: value for key, value in stream.items()
+            if value not in ("unknown", "unspecified", "reserved")}
+
+
+# profile_idc do SPS -> perfil como o ffprobe informa
+H264_PROFILE_IDC = {66: "Baseline", 77: "Main", 88: "Extended", 100: "High",
+                    110: "High 10", 122: "High 4:2:2", 244: "High 4:4:4 Predictive"}
+# chroma_format_idc -> formato de pixel de 8 bits
+H264_CHROMA_FORMATS = {0: "gray", 1: "yuv420p", 2: "yuv422p", 3: "yuv444p"}
+
+
+def _stream_from_sps(video_path):
+    """
+    probe_video_stream pelo ffmpeg (bsf trace_headers: lê o SPS sem
+    decodificar). As cores saem como os códigos numéricos do SPS, que as
+    opções do ffmpeg também aceitam (2 = não informado fica de fora).
+    """
+    cmd = [FFMPEG_BIN, "-nostats", "-i", video_path, "-map", "0:v:0", "-c", "copy",
+           "-bsf:v", "trace_headers", "-frames:v", "1", "-f", "null", "-"]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    if result.returncode != 0:
+        return None
+
+    sps = {}
+    for line in result.stderr.splitlines():
+        fields = line.split()
+        # "[trace_headers @ 0x..] 8  profile_idc  01100100 = 100": o primeiro valor de cada campo
+        if len(fields) >= 6 and fields[0] == "[trace_headers" and fields[-2] == "=":
+            sps.setdefault(fields[4], fields[-1])
+    try:
+        profile_idc, level = int(sps["profile_idc"]), int(sps["level_idc"])
+        chroma = int(sps.get("chroma_format_idc", 1))
+        depth = 8 + int(sps.get("bit_depth_luma_minus8", 0))
+    except (KeyError, ValueError):
+        return None
+
+    profile = H264_PROFILE_IDC.get(profile_idc, str(profile_idc))
+    if profile_idc == 66 and sps.get("constraint_set1_flag") == "1":
+        profile = "Constrained Baseline"
+    elif profile_idc in (110, 122, 244) and sps.get("constraint_set3_flag") == "1":
+        profile += " Intra"
+    pix_fmt = H264_CHROMA_FORMATS.get(chroma, str(chroma))
+    if depth != 8:
+        pix_fmt += f"{depth}le"  # yuv420p -> yuv420p10le, gray -> gray10le
+    stream = {"profile": profile, "level": level, "pix_fmt": pix_fmt}
+    if sps.get("video_signal_type_present_flag") == "1":
+        stream["color_range"] = "pc" if sps.get("video_full_range_flag") == "1" else "tv"
+    if sps.get("colour_description_present_flag") == "1":
+        for key, field in (("color_primaries", "colour_primaries"),
+                           ("color_transfer", "transfer_characteristics"),
+                           ("color_space", "matrix_coefficients")):
+            if sps.get(field, "2") != "2":
+                stream[key] = sps[field]
+    return stream
+
+
+def smart_copy_encoder_args(video_path):
+    """
+    Opções do x264 para os trechos recodificados da cópia direta: o mesmo
+    perfil, nível, formato de pixel e cores do original, para o stream não
+    mudar de parâmetros entre um trecho copiado e um recodificado. Levanta
+    ValueError se algum deles não puder ser lido ou repetido pelo x264.
+    """
+    stream = probe_video_stream(video_path)
+    if stream is None:
+        raise ValueError("parâmetros do H.264 não encontrados")
+    profile = X264_PROFILES.get(str(stream.get("profile", "")).lower())
+    if profile is None:
+        raise ValueError(f"perfil {stream.get('profile') or '?'} sem equivalente no x264")
+    pix_fmt = stream.get("pix_fmt")
+    if pix_fmt not in X264_PIX_FMTS:
+        raise ValueError(f"formato de pixel {pix_fmt or '?'} sem equivalente no x264")
+    level = int(stream.get("level") or 0)
+    if level <= 0:
+        raise ValueError("nível do H.264 não encontrado")
+
+    # -pix_fmt repetido: vale o último, que substitui o yuv420p do H264_ARGS
+    args = ["-pix_fmt", pix_fmt, "-profile:v", profile,
+            "-level", "1b" if level == 9 else f"{level // 10}.{level % 10}"]
+    for key, option in COLOR_OPTIONS:
+        if key in stream:
+            args += [option, str(stream[key])]
+    return args + SMART_COPY_ENCODER_ARGS
+
+
+def plan_smart_copy(frame_count, keyframes, subtitle_index):
+    """
+    Divide o vídeo em trechos de GOPs inteiros [(início, fim, recodificar, GOPs)].
+    Um GOP com legenda em qualquer frame é recodificado; os demais são
+    copiados. GOPs vizinhos do mesmo tipo viram um trecho só.
+    """
+    cuts = [k for k in keyframes if 0 < k < frame_count]
+    runs = []
+    for start, end in zip([0] + cuts, cuts + [frame_count]):
+        reencode = subtitle_index.has_text(start, end)
+        if runs and runs[-1][2] == reencode:
+            first, _, _, gops = runs[-1]
+            runs[-1] = (first, end, reencode, gops + 1)
+        else:
+            runs.append((start, end, reencode, 1))
+    return runs
+
+
+def process_video_smart(video_path, final_output, frame_count, fps, band,
+                        clean_args, subtitle_index, processes=1, workers=1,
+                        reporter=None, temporal_cache=False, timer=None,
+                        fill_engine="telea", detect_every=1):
+    """
+    Só recodifica os GOPs que têm legenda: os outros vão para a saída como
+    estão (-c copy, cortados nos keyframes). Precisa de vídeo H.264 e dos
+    keyframes, e de um perfil/formato de pixel que o x264 consiga repetir
+    (smart_copy_encoder_args); se não der, retorna None e o chamador segue
+    o caminho normal.
+    Retorna a contagem de frames/GOPs copiados e recodificados.
+    """
+    codec = video_codec(video_path)
+    if codec not in SMART_COPY_CODECS:
+        print(f"Cópia direta indisponível: vídeo em {codec or '?'} (só H.264)")
+        return None
+    # Os trechos recodificados têm que sair com os parâmetros dos copiados
+    try:
+        encoder_args = smart_copy_encoder_args(video_path)
+    except ValueError as e:
+        print(f"Cópia direta indisponível: {e}")
+        return None
+    keyframes = probe_keyframes(video_path, fps)
+    if len([k for k in keyframes if 0 < k < frame_count]) < 1:
+        print("Cópia direta indisponível: keyframes não encontrados")
+        return None
+
+    runs = plan_smart_copy(frame_count, keyframes, subtitle_index)
+    copied = sum(end - start for start, end, reencode, _ in runs if not reencode)
+    stats = {
+        "copied_frames": copied,
+        "reencoded_frames": frame_count - copied,
+        "copied_gops": sum(gops for _, _, reencode, gops in runs if not reencode),
+        "reencoded_gops": sum(gops for _, _, reencode, gops in runs if reencode),
+    }
+
+    work_dir = os.path.splitext(final_output)[0] + "_gops"
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+    try:
+        # 1) Corta o original nos inícios dos trechos, sem decodificar
+        t0 = time.perf_counter()
+        cuts = ",".join(str(start) for start, _, _, _ in runs[1:]) or str(frame_count)
+        run_ffmpeg(["-i", video_path, "-map", "0:v:0", "-c:v", "copy",
+                    "-bsf:v", "h264_mp4toannexb", "-f", "segment",
+                    "-segment_format", "matroska", "-segment_frames", cuts,
+                    "-reset_timestamps", "1", os.path.join(work_dir, "copia%04d.mkv")],
+                   frame_count)
+        if timer is not None:
+            timer.add("encode", time.perf_counter() - t0)
+        segments = [os.path.join(work_dir, f"copia{i:04d}.mkv") for i in range(len(runs))]
+
+        # 2) Limpa e recodifica só os trechos com legenda
+        jobs = []
+        for i, (start, end, reencode, _) in enumerate(runs):
+            if reencode:
+                segments[i] = os.path.join(work_dir, f"limpo{i:04d}.mkv")
+                jobs.append((i, start, end, segments[i]))
+        if reporter is not None:
+            reporter.start_at(copied)
+        run_segments(video_path, jobs, band, clean_args, fps, processes, workers,
+                     reporter, copied, temporal_cache, subtitle_index, timer,
+                     fill_engine, encoder_args=encoder_args,
+                     detect_every=detect_every)
+
+        # 3) Junta tudo com o áudio original. Os trechos copiados herdam o
+        # atraso de apresentação do original (edit list do MP4) e o concat
+        # erraria a duração deles: vai a duração exata de cada trecho
+        concat_segments(video_path, segments, os.path.join(work_dir, "partes.txt"),
+                        final_output, frame_count, timer,
+                        durations=[(end - start) / fps for start, end, _, _ in runs])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    total_gops = stats["copied_gops"] + stats["reencoded_gops"]
+    print(f"Cópia direta: {copied / frame_count:.1%} dos frames copiados "
+          f"({stats['copied_gops']} de {total_gops} GOPs), "
+          f"{stats['reencoded_frames'] / frame_count:.1%} recodificados")
+    return stats
+
+
+# ---------- PREVIEW (FRAMES REDUZIDOS EM CACHE) ---------- #
+
+class PreviewSource:
+    """
+    Frames do vídeo para o preview, já reduzidos para caber em `max_size`
+    (INTER_AREA) e guardados num cache LRU. Avanços curtos decodificam em
+    sequência (grab) em vez de fazer seek. Os keyframes (ffprobe, lidos em
+    segundo plano) permitem mostrar na hora o keyframe mais próximo enquanto
+    o slider ainda está se movendo; o frame exato vem depois (quick_frame/frame).
+
+    Não é thread-safe: use só na thread da interface (ou numa só thread).
+    """
+
+    CACHE_SIZE = 64
+    SEEK_DISTANCE = 48  # avanços menores que isso decodificam em sequência
+
+    def __init__(self, video_path, max_size):
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise RuntimeError("Não foi possível abrir o vídeo.")
+
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 25
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        max_w, max_h = max_size
+        self.scale = min(1.0, max_w / float(width), max_h / float(height))
+        self.size = (max(1, int(width * self.scale)), max(1, int(height * self.scale)))
+
+        self.keyframes = []
+        self._cache = OrderedDict()
+        self._next = 0  # índice do próximo frame que o cap vai entregar
+        threading.Thread(target=self._load_keyframes, args=(video_path,), daemon=True).start()
+
+    def _load_keyframes(self, video_path):
+        self.keyframes = probe_keyframes(video_path, self.fps)
+
+    def nearest_keyframe(self, frame_idx):
+        """Último keyframe antes de (ou em) `frame_idx`, ou None se ainda não são conhecidos."""
+        keyframes = self.keyframes
+        pos = bisect.bisect_right(keyframes, frame_idx)
+        return keyframes[pos - 1] if pos else None
+
+    def cached(self, frame_idx):
+        frame = self._cache.get(frame_idx)
+        if frame is not None:
+            self._cache.move_to_end(frame_idx)
+        return frame
+
+    def frame(self, frame_idx):
+        """Frame `frame_idx` reduzido (do cache ou decodificado agora); None se a leitura falhar."""
+        frame_idx = max(0, min(frame_idx, max(0, self.frame_count - 1)))
+        frame = self.cached(frame_idx)
+        if frame is not None:
+            return frame
+
+        if self._next is None or not 0 <= frame_idx - self._next < self.SEEK_DISTANCE:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+            self._next = frame_idx
+        while self._next < frame_idx and self.cap.grab():
+            self._next += 1
+
+        ret, frame = self.cap.read()
+        if not ret:
+            self._next = None  # posição desconhecida: o próximo pedido faz seek
+            return None
+        self._next = frame_idx + 1
+
+        if self.scale < 1.0:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        self._cache[frame_idx] = frame
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return frame
+
+    def quick_frame(self, frame_idx):
+        """
+        (índice, frame) que dá para mostrar já: o exato se estiver no cache,
+        senão o keyframe mais próximo. None se nenhum dos dois estiver disponível.
+        """
+        frame = self.cached(frame_idx)
+        if frame is not None:
+            return frame_idx, frame
+        key = self.nearest_keyframe(frame_idx)
+        if key is None:
+            return None
+        frame = self.frame(key)
+        return (key, frame) if frame is not None else None
+
+    def release(self):
+        self.cap.release()
+        self._cache.clear()
+
+
+class CleanPreviewWorker:
+    """
+    Calcula em segundo plano o resultado limpo (inpainting + mistura) na
+    resolução do preview: um frame, ou um trecho curto para comparar antes e
+    depois. Só o pedido mais recente interessa: um pedido novo substitui o
+    que estava na fila e interrompe o que está em andamento (entre um frame
+    e outro do trecho).
+
+    `on_result` é chamado na thread do worker com um dict: frame_idx,
+    clip_frames, params, band_fracs e frames (lista de (original, limpo)).
+    Com "regions" em `params` (como no process_video), limpa as regiões
+    pelo mesmo caminho do processamento (plan_regions) e ignora `band_fracs`.
+    """
+
+    def __init__(self, video_path, max_size, on_result):
+        # PreviewSource próprio: o da interface não pode ser usado em outra thread
+        self.source = PreviewSource(video_path, max_size)
+        self.on_result = on_result
+        self._cond = threading.Condition()
+        self._request = None
+        self._generation = 0
+        self._closed = False
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, frame_idx, params, band_fracs, clip_frames=1):
+        """Pede o frame `frame_idx` limpo (ou `clip_frames` frames a partir dele) com `params` do process_video."""
+        with self._cond:
+            self._generation += 1
+            self._request = (self._generation, frame_idx, dict(params),
+                             tuple(band_fracs), clip_frames)
+            self._cond.notify()
+
+    def cancel(self):
+        with self._cond:
+            self._generation += 1
+            self._request = None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._generation += 1
+            self._cond.notify()
+
+    def _is_current(self, generation):
+        return generation == self._generation and not self._closed
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._request is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    break
+                request, self._request = self._request, None
+            try:
+                self._render(*request)
+            except Exception as e:
+                print(f"Erro no preview limpo: {e}")
+        self.source.release()
+
+    def _render(self, generation, frame_idx, params, band_fracs, clip_frames):
+        # Parâmetros em pixels reduzidos na mesma proporção do frame do preview
+        scale = self.source.scale
+        settings = dict(thresh_val=params.get("thresh_val", 230),
+                        min_pixels_text=params.get("min_pixels_text", 150),
+                        clean_weight=params.get("clean_weight", 0.75),
+                        dilation_iter=params.get("dilation_iter", 10),
+                        use_edges=params.get("use_edges", False))
+        regions = params.get("regions")
+        if regions:
+            regions = normalize_regions(regions, **settings)
+            for region in regions:
+                region["min_pixels_text"] = int(region["min_pixels_text"] * scale * scale)
+                region["dilation_iter"] = int(round(region["dilation_iter"] * scale))
+        else:
+            kernel = FrameKernel(settings["thresh_val"],
+                                 int(settings["min_pixels_text"] * scale * scale),
+                                 settings["clean_weight"],
+                                 int(round(settings["dilation_iter"] * scale)),
+                                 settings["use_edges"],
+                                 params.get("tile_inpaint", False))
+
+        frames = []
+        clean = None
+        last = min(frame_idx + clip_frames, max(1, self.source.frame_count))
+        for idx in range(frame_idx, last):
+            if not self._is_current(generation):
+                return
+            original = self.source.frame(idx)
+            if original is None:
+                break
+            if regions:
+                if clean is None:
+                    clean = _region_cleaner(plan_regions(regions, original.shape,
+                                                         params.get("tile_inpaint", False)))
+                frames.append((original, clean(original.copy(), idx)))
+            else:
+                band = band_from_fracs(original.shape, *band_fracs)
+                frames.append((original, kernel.clean(original.copy(), band)))
+
+        if frames and self._is_current(generation):
+            self.on_result({"frame_idx": frame_idx, "clip_frames": clip_frames,
+                            "params": params, "band_fracs": band_fracs, "frames": frames})
+
+
+# ---------- FUNÇÃO PRINCIPAL DE PROCESSAMENTO ---------- #
+
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.expanduser("~"), "Downloads", "legenda_removida")
+
+
+def output_paths(video_path, output_dir=None, output_name=None):
+    """
+    (AVI temporário, MP4 final) de um vídeo na pasta de saída. `output_name`
+    troca o nome do vídeo (sem extensão) nos arquivos (ver batch_output_names).
+    """
+    name_no_ext = output_name or os.path.splitext(os.path.basename(video_path))[0]
+    output_folder = output_dir or DEFAULT_OUTPUT_DIR
+    return (os.path.join(output_folder, f"{name_no_ext}_temp.avi"),
+            os.path.join(output_folder, f"{name_no_ext}_sem_legenda.mp4"))
+
+
+def process_video(video_path, band_top_frac=0.55, band_bottom_frac=0.95,
+                  band_left_frac=0.0, band_right_frac=1.0,
+                  thresh_val=230, min_pixels_text=150, clean_weight=0.75,
+                  dilation_iter=10, use_edges=False, progress_callback=None,
+                  workers=1, direct_ffmpeg=False, processes=1,
+                  encoder_threads=None, tile_inpaint=False, temporal_cache=False,
+                  subtitle_index=False, mask_scale=1.0, output_dir=None,
+                  report=False, fill_engine="telea", auto_calibrate=False,
+                  resume=False, segment_seconds=RESUME_SEGMENT_SECONDS,
+                  smart_copy=False, yuv=False, regions=None, detect_every=1,
+                  output_name=None):
+    """
+    Remove a legenda do vídeo e salva o MP4 em `output_dir` (com o nome do
+    vídeo, ou `output_name` se informado).
+    `progress_callback` recebe eventos de progresso (dict com stage, done,
+    total, percent, fps e eta), no máximo ~4 por segundo.
+    Com `report`, salva os tempos por etapa num JSON ao lado da saída.
+    `fill_engine`: "telea" (inpainting em todo frame) ou "temporal" (pixels
+    de frames vizinhos onde a legenda não estava, TELEA só no resto).
+    Com `auto_calibrate`, a faixa e o limiar vêm de calibrate_video (os
+    valores passados ficam só se nenhuma legenda for encontrada).
+    Com `resume`, grava a saída em segmentos de ~`segment_seconds` e um
+    manifesto ao lado dela: se o processamento for interrompido, chamar de
+    novo com os mesmos argumentos continua do último segmento pronto (e um
+    vídeo já concluído é pulado).
+    Com `smart_copy` (vídeo H.264), só os GOPs com legenda são recodificados;
+    os outros são copiados sem perda (usa o índice de legendas).
+    Com `yuv`, o ffmpeg entrega e recebe os frames em yuv420p e a limpeza
+    roda nos planos (detecção no Y), sem conversão para BGR; vale para o
+    caminho de um processo, com TELEA e dimensões pares.
+    `regions` troca a faixa única por uma lista de regiões (dicts com "band"
+    em frações e, se quiser, thresh_val, min_pixels_text, clean_weight,
+    dilation_iter e use_edges próprios; ver normalize_regions), todas
+    limpas na mesma decodificação/codificação. Regiões sobrepostas são
+    unidas (plan_regions). Com mais de uma região não há calibração, cache,
+    preenchimento temporal, índice, cópia direta nem detecção espaçada.
+    Com `detect_every` > 1, a detecção completa roda no máximo a cada tantos
+    frames e a máscara é propagada no meio, com redetecção imediata quando
+    os pixels claros da faixa mudam (MaskPropagation; uma thread de limpeza).
+    Retorna (caminho da saída, tempo total em segundos, incluindo o ffmpeg).
+    """
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Vídeo não encontrado: {video_path}")
+
+    # --- NOME DO ARQUIVO E PASTA DE SAÍDA ---
+    video_name = os.path.basename(video_path)
+    os.makedirs(output_dir or DEFAULT_OUTPUT_DIR, exist_ok=True)
+    temp_output, final_output = output_paths(video_path, output_dir, output_name)
+
+    manifest = None
+    if resume:
+        job = output_params(band_top_frac, band_bottom_frac, band_left_frac, band_right_frac,
+                            thresh_val, min_pixels_text, clean_weight, dilation_iter,
+                            use_edges, tile_inpaint, temporal_cache, subtitle_index,
+                            mask_scale, fill_engine, auto_calibrate, smart_copy, regions,
+                            detect_every, direct_ffmpeg, processes, resume, yuv)
+        manifest = ResumeManifest.load(resume_manifest_path(final_output))
+        if manifest is not None and not manifest.matches(video_path, job):
+            print("Manifesto de retomada é de outro arquivo ou parâmetros: começando do zero")
+            manifest = None
+        if manifest is not None and manifest.complete:
+            if os.path.exists(final_output):
+                print(f"Já concluído: {final_output}")
+                return final_output, 0.0
+            # Os segmentos foram apagados ao concluir: sem a saída, refaz tudo
+            print("Saída concluída não encontrada: processando de novo")
+            manifest.ranges = None
+
+    # A saída antiga pode ser um hard link do cache de saídas: o ffmpeg a
+    # sobrescreveria no lugar e estragaria a entrada do cache junto
+    if os.path.exists(final_output):
+        os.remove(final_output)
+
+    if regions:
+        regions = normalize_regions(regions, thresh_val=thresh_val, min_pixels_text=min_pixels_text,
+                                    clean_weight=clean_weight, dilation_iter=dilation_iter,
+                                    use_edges=use_edges)
+    if regions and len(regions) == 1:
+        # Uma região só é o caminho de sempre, com a faixa e os ajustes dela
+        region = regions[0]
+        band_top_frac, band_bottom_frac, band_left_frac, band_right_frac = region["band"]
+        thresh_val, min_pixels_text = region["thresh_val"], region["min_pixels_text"]
+        clean_weight, dilation_iter = region["clean_weight"], region["dilation_iter"]
+        use_edges = region["use_edges"]
+        regions = None
+    elif regions:
+        # Tudo isso parte de uma faixa só
+        disabled = [name for name, on in (("calibração", auto_calibrate),
+                                          ("cache temporal", temporal_cache),
+                                          ("preenchimento temporal", fill_engine == "temporal"),
+                                          ("índice de legendas", subtitle_index),
+                                          ("cópia direta", smart_copy),
+                                          ("detecção espaçada", detect_every > 1)) if on]
+        if disabled:
+            print(f"Várias regiões: sem {', '.join(disabled)}")
+        auto_calibrate = temporal_cache = subtitle_index = smart_copy = False
+        fill_engine = "telea"
+        detect_every = 1
+    else:
+        regions = None
+
+    calibration = None
+    if auto_calibrate:
+        # Na retomada, a faixa calibrada da primeira execução (a amostragem tem limite de tempo)
+        if manifest is not None and manifest.calibration:
+            calibration = manifest.calibration
+        else:
+            calibration = calibrate_video(video_path, dilation_iter=dilation_iter)
+        if calibration is not None:
+            band_top_frac, band_bottom_frac, band_left_frac, band_right_frac = calibration["band"]
+            thresh_val = calibration["thresh_val"]
+    if resume and manifest is None:
+        manifest = ResumeManifest.for_video(video_path, final_output, job, calibration)
+
+    band_top_frac = max(0.0, min(1.0, band_top_frac))
+    band_bottom_frac = max(0.0, min(1.0, band_bottom_frac))
+    if band_bottom_frac <= band_top_frac:
+        raise ValueError("O fim da faixa (Y) deve ser maior que o início.")
+    
+    band_left_frac = max(0.0, min(1.0, band_left_frac))
+    band_right_frac = max(0.0, min(1.0, band_right_frac))
+    if band_right_frac <= band_left_frac:
+        raise ValueError("O fim da faixa (X) deve ser maior que o início.")
+
+    clean_weight = max(0.0, min(1.0, clean_weight))
+    mask_scale = max(0.05, min(1.0, mask_scale))
+    workers = max(1, int(workers))
+    processes = max(1, int(processes))
+    detect_every = max(1, int(detect_every))
+    if fill_engine not in FILL_ENGINES:
+        raise ValueError(f"Preenchimento desconhecido: {fill_engine} (use {', '.join(FILL_ENGINES)})")
+    if (temporal_cache or fill_engine == "temporal") and workers > 1:
+        # Cache e preenchimento temporal dependem dos frames anteriores: a limpeza precisa ser em ordem
+        print("Cache/preenchimento temporal ativo: usando 1 thread de limpeza")
+        workers = 1
+    if detect_every > 1 and workers > 1:
+        # A máscara propagada vem do frame anterior, como no cache
+        print("Detecção espaçada ativa: usando 1 thread de limpeza")
+        workers = 1
+    if yuv and (temporal_cache or fill_engine == "temporal"):
+        print("Modo YUV não tem cache/preenchimento temporal: usando BGR")
+        yuv = False
+
+    start_time = time.time()
+
+    vid = cv2.VideoCapture(video_path)
+    if not vid.isOpened():
+        raise RuntimeError("Não foi possível abrir o vídeo.")
+
+    frame_count = int(vid.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps         = vid.get(cv2.CAP_PROP_FPS) or 25
+    width       = int(vid.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height      = int(vid.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    if yuv and (width % 2 or height % 2):
+        print("Modo YUV precisa de largura e altura pares: usando BGR")
+        yuv = False
+    if yuv and (resume or smart_copy or processes > 1):
+        print("Modo YUV só no processamento em um processo: segmentos em BGR")
+        yuv = False
+
+    print(f"Processando: {video_name}")
+    print(f"Frames: {frame_count}, FPS: {fps}, Resolução: {width}x{height}")
+    if workers > 1:
+        print(f"Modo pipeline com {workers} threads de limpeza")
+    if processes > 1:
+        print(f"Modo em blocos com {processes} processos")
+
+    band_top = int(height * band_top_frac)
+    band_bottom = int(height * band_bottom_frac)
+    band_left = int(width * band_left_frac)
+    band_right = int(width * band_right_frac)
+    band = (band_top, band_bottom, band_left, band_right)
+
+    clean_args = (thresh_val, min_pixels_text, clean_weight, dilation_iter,
+                  use_edges, tile_inpaint, mask_scale)
+    groups = None
+    if regions is not None:
+        groups = plan_regions(regions, (height, width), tile_inpaint, mask_scale)
+        print(f"Regiões: {len(regions)}, limpas em {len(groups)} grupo(s)")
+
+    if isinstance(subtitle_index, SubtitleIndex):
+        index = subtitle_index
+    elif subtitle_index or smart_copy:
+        # Pré-análise (ou índice já salvo): pula a detecção nos frames sem legenda
+        index = load_or_analyze(video_path, band_top_frac, band_bottom_frac,
+                                band_left_frac, band_right_frac, thresh_val)
+    else:
+        index = None
+
+    timer = StageTimer()
+    # Alguns contêineres não informam o total de frames (0): progresso sem percentual
+    reporter = ProgressReporter(progress_callback, frame_count or None)
+
+    def finish(cache=None, filler=None, extra=None, propagation=None):
+        exec_time = time.time() - start_time
+        if cache is not None:
+            print(cache.summary())
+        if filler is not None:
+            print(filler.summary())
+        if propagation is not None:
+            print(propagation.summary())
+            extra = dict(extra or {}, mask_propagation=propagation.stats())
+        print(timer.summary())
+        if report:
+            save_report(report_path(final_output), video_path, final_output, frame_count,
+                        fps, width, height, exec_time, timer, cache, filler,
+                        dict(band=[band_top_frac, band_bottom_frac, band_left_frac, band_right_frac],
+                             thresh_val=thresh_val, min_pixels_text=min_pixels_text,
+                             clean_weight=clean_weight, dilation_iter=dilation_iter,
+                             use_edges=use_edges, workers=workers, direct_ffmpeg=direct_ffmpeg,
+                             processes=processes, tile_inpaint=tile_inpaint,
+                             temporal_cache=temporal_cache, subtitle_index=index is not None,
+                             mask_scale=mask_scale, fill_engine=fill_engine,
+                             auto_calibrate=auto_calibrate, resume=resume,
+                             smart_copy=smart_copy, yuv=yuv, regions=regions,
+                             detect_every=detect_every),
+                        extra)
+        print(f"\nVídeo final salvo em: {final_output}")
+        print(f"Tempo total: {exec_time:.2f} segundos")
+        return final_output, exec_time
+
+    if resume and frame_count > 0:
+        # Segmentos independentes + manifesto: um processamento interrompido continua daqui
+        vid.release()
+        process_video_resumable(video_path, final_output, frame_count, fps, band,
+                                clean_args, manifest, processes, workers, reporter,
+                                temporal_cache, index, timer, fill_engine,
+                                segment_seconds, groups, detect_every)
+        return finish()
+
+    if smart_copy and frame_count > 0:
+        vid.release()
+        stats = process_video_smart(video_path, final_output, frame_count, fps, band,
+                                    clean_args, index, processes, workers, reporter,
+                                    temporal_cache, timer, fill_engine, detect_every)
+        if stats is not None:
+            return finish(extra={"smart_copy": stats})
+        vid = cv2.VideoCapture(video_path)
+
+    if processes > 1 and frame_count > 0:
+        # Modo em blocos: cada processo limpa um trecho e o ffmpeg junta tudo no final
+        vid.release()
+        process_video_chunked(video_path, final_output, frame_count, fps,
+                              width, height, band, clean_args, processes,
+                              workers, reporter, temporal_cache, index, timer,
+                              fill_engine, groups, detect_every)
+        return finish()
+
+    if yuv:
+        # yuv420p do decodificador do ffmpeg até o encoder, sem passar por BGR
+        vid.release()
+        vid = FFmpegPipeReader(video_path, width, height, pix_fmt="yuv420p")
+        direct_ffmpeg = True
+
+    if direct_ffmpeg:
+        # Frames crus direto para o ffmpeg, que já junta o áudio original
+        writer = FFmpegPipeWriter(final_output, width, height, fps,
+                                  audio_source=video_path,
+                                  frame_count=frame_count,
+                                  threads=encoder_threads,
+                                  pix_fmt="yuv420p" if yuv else "bgr24")
+    else:
+        fourcc = cv2.VideoWriter_fourcc(*'XVID')
+        writer = cv2.VideoWriter(temp_output, fourcc, fps, (width, height))
+
+    if not writer.isOpened():
+        vid.release()
+        if direct_ffmpeg:
+            writer.release()  # levanta o erro do ffmpeg
+        raise RuntimeError("Não foi possível criar AVI temporário.")
+
+    cache = TemporalCache() if temporal_cache else None
+    filler = TemporalFill(band) if fill_engine == "temporal" else None
+    propagation = MaskPropagation(detect_every) if detect_every > 1 else None
+    clean = make_cleaner(band, clean_args, cache, index, timer, filler, yuv, groups,
+                         propagation)
+
+    frame_idx = 0
+
+    def frame_done():
+        nonlocal frame_idx
+        frame_idx += 1
+        reporter.update(frame_idx)
+
+    completed = False
+    try:
+        clean_frames(vid, writer, clean, workers, frame_done, timer=timer)
+        completed = True
+    finally:
+        vid.release()
+        if direct_ffmpeg and not completed:
+            writer.abort()
+        else:
+            # No modo direto, espera o ffmpeg terminar de codificar o que está no pipe
+            t0 = time.perf_counter()
+            writer.release()
+            if direct_ffmpeg:
+                timer.add("encode", time.perf_counter() - t0)
+
+    if not direct_ffmpeg:
+        # ---------- CONVERSÃO PARA H.264 COM ÁUDIO ORIGINAL ---------- #
+        print("\nConvertendo para MP4 H.264 e copiando áudio original...")
+
+        # -i temp_output: vídeo processado (sem áudio)
+        # -i video_path: vídeo original (fonte do áudio)
+        # -c:v libx264: recodifica o vídeo
+        # -c:a copy: copia o áudio original sem reprocessar (rápido e sem perda)
+        # -map 0:v:0: pega o vídeo da primeira entrada (temp_output)
+        # -map 1:a:0: pega o áudio da segunda entrada (video_path)
+        t0 = time.perf_counter()
+        try:
+            run_ffmpeg(["-i", temp_output] + audio_mux_args(video_path)
+                       + h264_args(encoder_threads) + [final_output], frame_count)
+        except RuntimeError as e:
+            # Mantém o AVI temporário para inspeção/nova tentativa
+            raise RuntimeError(f"{e}\nAVI temporário mantido em: {temp_output}")
+        timer.add("encode", time.perf_counter() - t0)
+        os.remove(temp_output)
+
+    return finish(cache, filler, propagation=propagation)
+
+
+def save_report(path, video_path, output_path, frame_count, fps, width, height,
+                exec_time, timer, cache=None, filler=None, params=None, extra=None):
+    """
+    Grava o relatório JSON de um processamento (tempos por etapa, frames,
+    parâmetros). `extra` entra como está (seções de modos específicos).
+    """
+    data = {
+        "video": os.path.abspath(video_path),
+        "output": os.path.abspath(output_path),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "frames": frame_count,
+        "video_fps": fps,
+        "resolution": [width, height],
+        "wall_seconds": exec_time,
+        "throughput_fps": frame_count / exec_time if exec_time > 0 else None,
+        "params": params or {},
+    }
+    data.update(timer.stats())
+    if cache is not None:
+        data["cache"] = {"hits": cache.hits, "misses": cache.misses,
+                         "scene_cuts": cache.scene_cuts}
+    if filler is not None:
+        data["temporal_fill"] = {"temporal_pixels": filler.temporal_pixels,
+                                 "telea_pixels": filler.telea_pixels,
+                                 "stale_tiles": filler.stale_tiles,
+                                 "scene_cuts": filler.scene_cuts}
+    data.update(extra or {})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    print(f"Relatório salvo em: {path}")
+
+
+# ---------- STREAMING (PIPE / FIFO / ARQUIVO CRESCENDO) ---------- #
+
+STREAM_FOLLOW_TIMEOUT = 10  # segundos sem dados novos no arquivo crescendo = fim
+
+
+def parse_size(text):
+    """"1080x1920" -> (1080, 1920)"""
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+
+def stream_video(source, destination="-", size=None, fps=None,
+                 band_top_frac=0.55, band_bottom_frac=0.95,
+                 band_left_frac=0.0, band_right_frac=1.0,
+                 thresh_val=230, min_pixels_text=150, clean_weight=0.75,
+                 dilation_iter=10, use_edges=False, tile_inpaint=True,
+                 mask_scale=1.0, temporal_cache=False, fill_engine="telea",
+                 workers=1, input_format=None, output_format="mpegts",
+                 follow=False, encoder_threads=None, progress_callback=None, yuv=False,
+                 detect_every=1):
+    """
+    Limpa um vídeo que chega aos poucos: `source` pode ser "-" (stdin), um
+    FIFO ou um arquivo ainda sendo gravado (`follow`), e a saída vai para
+    `destination` ("-" = stdout, FIFO ou arquivo) no contêiner
+    `output_format` ("mpegts", "matroska", "nut"... ou "rawvideo" para frames
+    BGR crus). Nada de seek, total de frames ou arquivo temporário: a memória
+    é constante e o atraso fica em poucos frames (fila do pipeline + encoder
+    sem lookahead).
+
+    `size` (largura, altura) e `fps` são obrigatórios para pipes e para
+    `input_format` "rawvideo" (frames BGR crus); para arquivos comuns vêm do
+    próprio arquivo se omitidos. Qualquer outra entrada é redimensionada
+    para `size`. O progresso (`progress_callback`) sai sem percentual nem ETA.
+    Com `yuv` (TELEA, dimensões pares), os frames ficam em yuv420p do começo
+    ao fim, e "rawvideo" na entrada/saída passa a ser yuv420p.
+    `detect_every` como no process_video.
+    Retorna o número de frames gravados.
+    """
+    if fill_engine not in FILL_ENGINES:
+        raise ValueError(f"Preenchimento desconhecido: {fill_engine} (use {', '.join(FILL_ENGINES)})")
+    if size is None or fps is None:
+        if not os.path.isfile(source):
+            raise ValueError("Informe size e fps para ler de um pipe ou FIFO.")
+        vid = cv2.VideoCapture(source)
+        if not vid.isOpened():
+            raise RuntimeError("Não foi possível abrir o vídeo.")
+        size = size or (int(vid.get(cv2.CAP_PROP_FRAME_WIDTH)), int(vid.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        fps = fps or vid.get(cv2.CAP_PROP_FPS) or 25
+        vid.release()
+    width, height = size
+    workers = max(1, int(workers))
+    detect_every = max(1, int(detect_every))
+    if (temporal_cache or fill_engine == "temporal" or detect_every > 1) and workers > 1:
+        workers = 1
+    if yuv and (temporal_cache or fill_engine == "temporal" or width % 2 or height % 2):
+        raise ValueError("Modo YUV precisa de TELEA sem cache e de largura/altura pares.")
+    pix_fmt = "yuv420p" if yuv else "bgr24"
+
+    input_args, filters = [], None
+    if input_format == "rawvideo":
+        input_args = ["-f", "rawvideo", "-pix_fmt", pix_fmt, "-s", f"{width}x{height}",
+                      "-r", str(fps)]
+    else:
+        if input_format:
+            input_args = ["-f", input_format]
+        filters = f"scale={width}:{height}"
+    if follow:
+        # Relê o fim do arquivo enquanto ele cresce; para depois de um tempo sem dados
+        input_args = ["-follow", "1", "-rw_timeout", str(STREAM_FOLLOW_TIMEOUT * 1000000)] + input_args
+
+    band = band_from_fracs((height, width), band_top_frac, band_bottom_frac,
+                           band_left_frac, band_right_frac)
+    clean_args = (thresh_val, min_pixels_text, clean_weight, dilation_iter,
+                  use_edges, tile_inpaint, mask_scale)
+
+    # O vídeo pode estar saindo pelo stdout: as mensagens vão para o stderr
+    to_stdout = destination in ("-", "pipe:1")
+    log = contextlib.redirect_stdout(sys.stderr) if to_stdout else contextlib.nullcontext()
+    with log:
+        reader = FFmpegPipeReader(source, width, height, pix_fmt, filters, input_args)
+        writer = FFmpegPipeWriter(destination, width, height, fps, threads=encoder_threads,
+                                  output_format=output_format, low_latency=True,
+                                  pix_fmt=pix_fmt)
+
+        cache = TemporalCache() if temporal_cache else None
+        filler = TemporalFill(band) if fill_engine == "temporal" else None
+        propagation = MaskPropagation(detect_every) if detect_every > 1 else None
+        timer = StageTimer()
+        reporter = ProgressReporter(progress_callback, None, min_interval=1.0, stage="streaming")
+        clean = make_cleaner(band, clean_args, cache, None, timer, filler, yuv,
+                             propagation=propagation)
+
+        done = 0
+
+        def frame_done():
+            nonlocal done
+            done += 1
+            reporter.update(done)
+
+        print(f"Streaming: {source} -> {destination} ({width}x{height}, {fps} fps, "
+              f"{workers} thread(s) de limpeza)")
+        completed = False
+        try:
+            clean_frames(reader, writer, clean, workers, frame_done, timer=timer)
+            completed = True
+        finally:
+            try:
+                reader.release()
+            finally:
+                if completed:
+                    writer.release()
+                else:
+                    writer.abort()
+
+        if cache is not None:
+            print(cache.summary())
+        if filler is not None:
+            print(filler.summary())
+        if propagation is not None:
+            print(propagation.summary())
+        print(timer.summary())
+    return done
+
+
+# ---------- CACHE DE SAÍDAS (LOTE) ---------- #
+
+OUTPUT_CACHE_MAX_BYTES = 20 * 1024 ** 3
+
+
+def fingerprint(video_path, blocks=16, block_size=64 * 1024):
+    """
+    Impressão digital rápida do conteúdo: tamanho + `blocks` blocos espalhados
+    pelo arquivo (começo e fim inclusos), sem ler o vídeo inteiro.
+    """
+    size = os.path.getsize(video_path)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(video_path, "rb") as f:
+        if size <= blocks * block_size:
+            digest.update(f.read())
+        else:
+            for i in range(blocks):
+                f.seek((size - block_size) * i // (blocks - 1))
+                digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+
+class OutputCache:
+    """
+    Saídas já geradas, endereçadas pelo conteúdo do vídeo de entrada
+    (fingerprint) e pelos parâmetros que mudam a saída (output_params).
+    Um acerto liga (hard link, ou cópia se não der) o arquivo do cache no
+    lugar da saída, sem processar nada. As entradas são apagadas da menos
+    usada para a mais usada quando a pasta passa de `max_bytes`.
+
+    Só a thread/processo que coordena o lote deve usar (não há trava entre processos).
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=OUTPUT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir or os.path.join(DEFAULT_OUTPUT_DIR, ".cache")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._fingerprints = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, video_path, params):
+        stat = os.stat(video_path)
+        cached = self._fingerprints.get(video_path)
+        if cached is None or cached[0] != (stat.st_size, stat.st_mtime):
+            cached = ((stat.st_size, stat.st_mtime), fingerprint(video_path))
+            self._fingerprints[video_path] = cached
+        job = json.dumps(output_params(**params), sort_keys=True)
+        return hashlib.blake2b((cached[1] + job).encode(), digest_size=16).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key + ".mp4")
+
+    @staticmethod
+    def _link(src, dst):
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            return
+        tmp = dst + ".tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copy2(src, tmp)  # outro disco ou sistema de arquivos sem hard link
+        os.replace(tmp, dst)
+
+    def fetch(self, video_path, params):
+        """Caminho da saída, já no lugar, se o cache tiver o resultado; senão None."""
+        entry = self._entry(self.key(video_path, params))
+        if not os.path.exists(entry):
+            self.misses += 1
+            return None
+        os.utime(entry)  # mais recente na ordem de remoção
+        _, final_output = output_paths(video_path, params.get("output_dir"),
+                                       params.get("output_name"))
+        os.makedirs(os.path.dirname(final_output), exist_ok=True)
+        self._link(entry, final_output)
+        self.hits += 1
+        return final_output
+
+    def store(self, video_path, params, output_path):
+        """Guarda a saída recém-gerada e apaga as entradas mais antigas se passar do limite."""
+        self._link(output_path, self._entry(self.key(video_path, params)))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".mp4"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and total > self.max_bytes:
+            _, size, name = entries.pop(0)
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+            self.evicted += 1
+
+    def summary(self):
+        return (f"Cache de saídas: {self.hits} reaproveitadas, {self.misses} processadas, "
+                f"{self.evicted} removidas do cache")
+
+
+# ---------- LOTE (VÁRIOS VÍDEOS EM PARALELO) ---------- #
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mkv", ".mov"}
+
+
+def list_videos(folder_path):
+    """Caminhos dos vídeos da pasta, ordenados do maior para o menor arquivo."""
+    files = [os.path.join(folder_path, f) for f in os.listdir(folder_path)
+             if os.path.splitext(f)[1].lower() in VIDEO_EXTENSIONS]
+    # Maiores primeiro: os arquivos longos não ficam sozinhos no final do lote
+    return sorted(files, key=os.path.getsize, reverse=True)
+
+
+def batch_output_names(video_paths):
+    """
+    {caminho: nome de saída ou None} de um lote. Vídeos com o mesmo nome em
+    pastas diferentes sairiam no mesmo arquivo: ganham o nome da pasta
+    (clip_pastaA, clip_pastaB) e, se ainda repetir, um número. Os demais
+    ficam com None (o nome de sempre).
+    """
+    stems = [os.path.splitext(os.path.basename(p))[0] for p in video_paths]
+    names = {}
+    taken = {stem for stem in stems if stems.count(stem) == 1}
+    for path, stem in zip(video_paths, stems):
+        if stems.count(stem) == 1:
+            names[path] = None
+            continue
+        parent = os.path.basename(os.path.dirname(os.path.abspath(path))) or "raiz"
+        name = f"{stem}_{parent}"
+        n = 2
+        while name in taken:
+            name = f"{stem}_{parent}_{n}"
+            n += 1
+        taken.add(name)
+        names[path] = name
+    return names
+
+
+def plan_core_budget(file_count, jobs=None, cores=None):
+    """
+    Divide os núcleos entre vídeos simultâneos.
+    Retorna (jobs, threads de limpeza por vídeo, threads do ffmpeg por vídeo).
+    """
+    cores = max(1, cores or os.cpu_count() or 1)
+    jobs = max(1, min(file_count, jobs or max(1, cores // 2)))
+    per_job = max(1, cores // jobs)
+    encoder_threads = max(1, per_job // 2)
+    workers = max(1, per_job - encoder_threads)
+    return jobs, workers, encoder_threads
+
+
+def _process_batch_item(video_path, params, workers, encoder_threads, progress_queue):
+    """Executado em outro processo: um vídeo do lote."""
+    # O paralelismo vem dos vídeos simultâneos e das threads de limpeza;
+    # evita que o OpenCV crie mais threads que o orçamento do processo
+    cv2.setNumThreads(1)
+    return process_video(
+        video_path,
+        progress_callback=lambda event: progress_queue.put((video_path, event["percent"] or 0.0)),
+        workers=workers,
+        encoder_threads=encoder_threads,
+        **params
+    )
+
+
+def run_batch(video_paths, params, jobs=None, cores=None, progress_callback=None, cache=None):
+    """
+    Processa vários vídeos ao mesmo tempo num pool de processos.
+
+    `params` são os argumentos de process_video (faixa, limiar, etc.); com
+    `resume`, os vídeos já concluídos numa execução anterior são pulados.
+    Com `cache` (OutputCache), vídeos com o mesmo conteúdo e parâmetros de
+    um lote anterior saem do cache na hora, e as saídas novas entram nele.
+    Vídeos com o mesmo nome em pastas diferentes saem com nomes distintos
+    (batch_output_names).
+    `progress_callback` recebe um dict com o progresso agregado do lote:
+    done, total, percent, fps, eta e active ({nome: %} dos vídeos em andamento).
+    Retorna (saídas geradas, lista de erros "arquivo: mensagem").
+    """
+    outputs = []
+    # Cada vídeo do lote já roda num processo próprio
+    params = dict(params, processes=1)
+    item_params = {}
+    for path, name in batch_output_names(video_paths).items():
+        item_params[path] = params if name is None else dict(params, output_name=name)
+        if name is not None:
+            print(f"Nome repetido: {path} -> {name}_sem_legenda.mp4")
+
+    if cache is not None:
+        cached = {p: cache.fetch(p, item_params[p]) for p in video_paths}
+        for path, output in cached.items():
+            if output is not None:
+                print(f"Do cache: {os.path.basename(path)} -> {output}")
+                outputs.append(output)
+        video_paths = [p for p in video_paths if cached[p] is None]
+
+    if params.get("resume"):
+        # Vídeos já concluídos numa execução anterior do lote
+        skipped = [p for p in video_paths if resume_complete(p, item_params[p])]
+        for path in skipped:
+            print(f"Já concluído, pulando: {os.path.basename(path)}")
+        video_paths = [p for p in video_paths if p not in skipped]
+
+    if not video_paths:
+        if cache is not None:
+            print(cache.summary())
+        return outputs, []
+
+    video_paths = sorted(video_paths, key=os.path.getsize, reverse=True)
+    jobs, workers, encoder_threads = plan_core_budget(len(video_paths), jobs, cores)
+    print(f"Lote: {len(video_paths)} vídeos, {jobs} simultâneos, "
+          f"{workers} thread(s) de limpeza + {encoder_threads} do ffmpeg cada")
+
+    # Total de frames de cada vídeo, para o fps e o ETA do lote todo
+    frame_counts = {}
+    for path in video_paths:
+        cap = cv2.VideoCapture(path)
+        frame_counts[path] = max(1, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+        cap.release()
+    total_frames = sum(frame_counts.values())
+
+    manager = multiprocessing.Manager()
+    progress_queue = manager.Queue()
+    percent_by_file = {}
+    errors = []
+    start_time = time.time()
+
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(_process_batch_item, path, item_params[path], workers,
+                            encoder_threads, progress_queue): path
+                for path in video_paths
+            }
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, timeout=0.5,
+                                         return_when=FIRST_COMPLETED)
+                while not progress_queue.empty():
+                    path, pct = progress_queue.get()
+                    percent_by_file[path] = pct
+
+                for future in finished:
+                    path = futures[future]
+                    name = os.path.basename(path)
+                    percent_by_file[path] = 100.0
+                    try:
+                        output = future.result()[0]
+                    except Exception as e:
+                        errors.append(f"{name}: {e}")
+                        print(f"Erro em {name}: {e}")
+                        continue
+                    outputs.append(output)
+                    print(f"Concluído: {name}")
+                    if cache is not None:
+                        try:
+                            cache.store(path, item_params[path], output)
+                        except OSError as e:
+                            print(f"Aviso: não foi possível guardar {name} no cache: {e}")
+
+                done_frames = sum(frame_counts[p] * pct / 100.0
+                                  for p, pct in percent_by_file.items())
+                elapsed = time.time() - start_time
+                fps = done_frames / elapsed if elapsed > 0 else 0.0
+                eta = (total_frames - done_frames) / fps if fps > 0 else None
+                status = {
+                    "done": len(video_paths) - len(pending),
+                    "total": len(video_paths),
+                    "percent": done_frames / total_frames * 100,
+                    "fps": fps,
+                    "eta": eta,
+                    "active": {os.path.basename(p): pct
+                               for p, pct in percent_by_file.items()
+                               if pct < 100.0},
+                }
+                print(f"Lote: {status['done']}/{status['total']} vídeos, "
+                      f"{fps:.1f} fps, ETA {format_eta(eta) if eta is not None else '--:--'}")
+                if progress_callback:
+                    progress_callback(status)
+    finally:
+        manager.shutdown()
+
+    if cache is not None:
+        print(cache.summary())
+    return outputs, errors
+
+
+# ---------- LINHA DE COMANDO ---------- #
+
+def expand_inputs(patterns):
+    """Arquivos, pastas e globs da linha de comando -> lista de vídeos (sem repetição)."""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        for path in matches:
+            if os.path.isdir(path):
+                paths.extend(list_videos(path))
+            else:
+                paths.append(path)
+    return list(dict.fromkeys(os.path.abspath(p) for p in paths))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove legendas embutidas de vídeos (sem interface gráfica).")
+    parser.add_argument("inputs", nargs="+", help="vídeos, pastas ou globs (\"pasta/*.mp4\")")
+    parser.add_argument("--band", type=float, nargs=4, default=(0.55, 0.95, 0.0, 1.0),
+                        metavar=("TOPO", "BASE", "ESQ", "DIR"),
+                        help="faixa da legenda em frações da altura/largura")
+    parser.add_argument("--region", type=parse_region, action="append", metavar="T,B,E,D[:OPÇÕES]",
+                        help="região de remoção (repetível; substitui --band), com ajustes próprios "
+                             "opcionais: thresh=, dilation=, density=, edges=, min-pixels= "
+                             "(ex.: 0.05,0.2,0,1:thresh=200,dilation=6)")
+    parser.add_argument("--thresh", type=int, default=230, help="limiar de brilho (0-255)")
+    parser.add_argument("--dilation", type=int, default=10, help="espessura da máscara")
+    parser.add_argument("--density", type=float, default=0.75, help="opacidade da remoção (0-1)")
+    parser.add_argument("--min-pixels", type=int, default=150)
+    parser.add_argument("--edges", action="store_true", help="reforçar bordas (Canny)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) - 1),
+                        help="threads de limpeza por vídeo")
+    parser.add_argument("--processes", type=int, default=1, help="processos por vídeo (blocos)")
+    parser.add_argument("--jobs", type=int, default=1, help="vídeos simultâneos")
+    parser.add_argument("--out", default=DEFAULT_OUTPUT_DIR, help="pasta de saída")
+    parser.add_argument("--no-direct", action="store_true",
+                        help="grava AVI temporário em vez de enviar os frames direto ao ffmpeg")
+    parser.add_argument("--no-tiles", action="store_true", help="inpainting na faixa inteira")
+    parser.add_argument("--cache", action="store_true", help="reaproveitar frames com a mesma legenda")
+    parser.add_argument("--index", action="store_true", help="pré-analisar e pular frames sem legenda")
+    parser.add_argument("--detect-every", type=int, default=1, metavar="N",
+                        help="detecção completa só a cada N frames, propagando a máscara no meio "
+                             "(redetecta antes se o texto mudar)")
+    parser.add_argument("--mask-scale", type=float, default=1.0)
+    parser.add_argument("--fill", choices=FILL_ENGINES, default="telea",
+                        help="preenchimento: TELEA em todo frame ou frames vizinhos (temporal)")
+    parser.add_argument("--auto", action="store_true",
+                        help="calibra faixa e limiar por vídeo (amostra alguns frames; ignora --band/--thresh se achar legenda)")
+    parser.add_argument("--resume", action="store_true",
+                        help="grava em segmentos com manifesto: rodar de novo continua de onde parou "
+                             "e pula vídeos já concluídos")
+    parser.add_argument("--yuv", action="store_true",
+                        help="frames em yuv420p do decodificador ao encoder (detecção no plano Y, "
+                             "sem conversão para BGR)")
+    parser.add_argument("--smart-copy", action="store_true",
+                        help="vídeo H.264: recodifica só os GOPs com legenda e copia o resto sem perda")
+    parser.add_argument("--reuse", action="store_true",
+                        help="cache de saídas em <out>/.cache: vídeo com o mesmo conteúdo e "
+                             "parâmetros não é processado de novo")
+    parser.add_argument("--cache-size", type=float, default=OUTPUT_CACHE_MAX_BYTES / 1024 ** 3,
+                        help="tamanho máximo do cache de saídas, em GB")
+    parser.add_argument("--stream", metavar="SAÍDA",
+                        help="modo streaming: a entrada (\"-\" = stdin, FIFO ou arquivo crescendo) "
+                             "vai limpa para SAÍDA (\"-\" = stdout, FIFO ou arquivo)")
+    parser.add_argument("--size", type=parse_size, metavar="LxA",
+                        help="streaming: tamanho dos frames (obrigatório para pipes)")
+    parser.add_argument("--fps", type=float, help="streaming: fps (obrigatório para pipes)")
+    parser.add_argument("--input-format", help="streaming: formato da entrada (ex.: mpegts, rawvideo)")
+    parser.add_argument("--output-format", default="mpegts",
+                        help="streaming: contêiner da saída (mpegts, matroska, nut ou rawvideo)")
+    parser.add_argument("--follow", action="store_true",
+                        help="streaming: continua lendo o arquivo enquanto ele cresce")
+    parser.add_argument("--report", action="store_true",
+                        help="salva os tempos por etapa em <saída>.relatorio.json")
+    args = parser.parse_args(argv)
+
+    if args.stream:
+        if len(args.inputs) != 1:
+            parser.error("o modo streaming recebe uma entrada só")
+        top, bottom, left, right = args.band
+        try:
+            stream_video(args.inputs[0], args.stream, args.size, args.fps,
+                         band_top_frac=top, band_bottom_frac=bottom,
+                         band_left_frac=left, band_right_frac=right,
+                         thresh_val=args.thresh, min_pixels_text=args.min_pixels,
+                         clean_weight=args.density, dilation_iter=args.dilation,
+                         use_edges=args.edges, tile_inpaint=not args.no_tiles,
+                         mask_scale=args.mask_scale, temporal_cache=args.cache,
+                         fill_engine=args.fill, workers=args.workers,
+                         input_format=args.input_format, output_format=args.output_format,
+                         follow=args.follow, yuv=args.yuv, detect_every=args.detect_every)
+        except (ValueError, RuntimeError) as e:
+            print(f"Erro: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    video_paths = expand_inputs(args.inputs)
+    missing = [p for p in video_paths if not os.path.isfile(p)]
+    if missing:
+        parser.error("arquivo não encontrado: " + ", ".join(missing))
+
+    top, bottom, left, right = args.band
+    params = dict(
+        band_top_frac=top,
+        band_bottom_frac=bottom,
+        band_left_frac=left,
+        band_right_frac=right,
+        thresh_val=args.thresh,
+        min_pixels_text=args.min_pixels,
+        clean_weight=args.density,
+        dilation_iter=args.dilation,
+        use_edges=args.edges,
+        direct_ffmpeg=not args.no_direct,
+        tile_inpaint=not args.no_tiles,
+        temporal_cache=args.cache,
+        subtitle_index=args.index,
+        mask_scale=args.mask_scale,
+        output_dir=args.out,
+        report=args.report,
+        fill_engine=args.fill,
+        auto_calibrate=args.auto,
+        resume=args.resume,
+        smart_copy=args.smart_copy,
+        yuv=args.yuv,
+        regions=args.region,
+        detect_every=args.detect_every,
+    )
+
+    cache = None
+    if args.reuse:
+        cache = OutputCache(os.path.join(args.out, ".cache"), int(args.cache_size * 1024 ** 3))
+
+    if args.jobs > 1 and len(video_paths) > 1:
+        _, errors = run_batch(video_paths, params, jobs=args.jobs, cache=cache)
+    else:
+        errors = []
+        names = batch_output_names(video_paths)
+        for path in video_paths:
+            item = dict(params, processes=args.processes)
+            if names[path] is not None:
+                item["output_name"] = names[path]
+                print(f"Nome repetido: {path} -> {names[path]}_sem_legenda.mp4")
+            if cache is not None:
+                output = cache.fetch(path, item)
+                if output is not None:
+                    print(f"Do cache: {os.path.basename(path)} -> {output}")
+                    continue
+            try:
+                output, _ = process_video(path, workers=args.workers, **item)
+            except Exception as e:
+                errors.append(f"{os.path.basename(path)}: {e}")
+                print(f"Erro em {os.path.basename(path)}: {e}")
+                continue
+            if cache is not None:
+                cache.store(path, item, output)
+        if cache is not None:
+            print(cache.summary())
+
+    for error in errors:
+        print(f"Erro: {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
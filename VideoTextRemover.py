@@ -1,154 +1,14 @@
 import cv2
 import os
-import numpy as np
-import time
 import threading
+import multiprocessing
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk  # para mostrar o frame no Tkinter
 
-# ---------- FUNÇÃO PRINCIPAL DE PROCESSAMENTO ---------- #
-
-def process_video(video_path, band_top_frac=0.55, band_bottom_frac=0.95,
-                  band_left_frac=0.0, band_right_frac=1.0,
-                  thresh_val=230, min_pixels_text=150, clean_weight=0.75,
-                  dilation_iter=10, use_edges=False, progress_callback=None):
-    if not os.path.exists(video_path):
-        raise FileNotFoundError(f"Vídeo não encontrado: {video_path}")
-
-    band_top_frac = max(0.0, min(1.0, band_top_frac))
-    band_bottom_frac = max(0.0, min(1.0, band_bottom_frac))
-    if band_bottom_frac <= band_top_frac:
-        raise ValueError("O fim da faixa (Y) deve ser maior que o início.")
-    
-    band_left_frac = max(0.0, min(1.0, band_left_frac))
-    band_right_frac = max(0.0, min(1.0, band_right_frac))
-    if band_right_frac <= band_left_frac:
-        raise ValueError("O fim da faixa (X) deve ser maior que o início.")
-
-    clean_weight = max(0.0, min(1.0, clean_weight))
-
-    # --- NOME DO ARQUIVO E PASTA DE SAÍDA ---
-    video_name = os.path.basename(video_path)
-    name_no_ext, _ = os.path.splitext(video_name)
-
-    downloads = os.path.join(os.path.expanduser("~"), "Downloads")
-    output_folder = os.path.join(downloads, "legenda_removida")
-    os.makedirs(output_folder, exist_ok=True)
-
-    temp_output = os.path.join(output_folder, f"{name_no_ext}_temp.avi")
-    final_output = os.path.join(output_folder, f"{name_no_ext}_sem_legenda.mp4")
-
-    start_time = time.time()
-
-    vid = cv2.VideoCapture(video_path)
-    if not vid.isOpened():
-        raise RuntimeError("Não foi possível abrir o vídeo.")
-
-    frame_count = int(vid.get(cv2.CAP_PROP_FRAME_COUNT))
-    fps         = vid.get(cv2.CAP_PROP_FPS) or 25
-    width       = int(vid.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height      = int(vid.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-    print(f"Processando: {video_name}")
-    print(f"Frames: {frame_count}, FPS: {fps}, Resolução: {width}x{height}")
-
-    fourcc = cv2.VideoWriter_fourcc(*'XVID')
-    writer = cv2.VideoWriter(temp_output, fourcc, fps, (width, height))
-
-    if not writer.isOpened():
-        vid.release()
-        raise RuntimeError("Não foi possível criar AVI temporário.")
-
-    band_top = int(height * band_top_frac)
-    band_bottom = int(height * band_bottom_frac)
-    band_left = int(width * band_left_frac)
-    band_right = int(width * band_right_frac)
-
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-
-    CLEAN_WEIGHT = clean_weight
-    ORIG_WEIGHT  = 1.0 - CLEAN_WEIGHT
-
-    frame_idx = 0
-
-    while True:
-        ret, frame = vid.read()
-        if not ret:
-            break
-
-        roi = frame[band_top:band_bottom, band_left:band_right]
-        gray_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-
-        _, bin_roi = cv2.threshold(gray_roi, thresh_val, 255, cv2.THRESH_BINARY)
-        
-        # Se ativado, usa detecção de bordas (Canny) para reforçar a máscara
-        # Isso ajuda a capturar legendas claras ou com bordas definidas que o threshold ignora
-        if use_edges:
-            # Canny com limiares conservadores para pegar texto
-            edges = cv2.Canny(gray_roi, 50, 150)
-            bin_roi = cv2.bitwise_or(bin_roi, edges)
-
-        bin_roi = cv2.morphologyEx(bin_roi, cv2.MORPH_CLOSE, kernel)
-
-        # Dilatação configurável
-        if dilation_iter > 0:
-            bin_roi = cv2.dilate(bin_roi, kernel, iterations=dilation_iter)
-
-        white_pixels = cv2.countNonZero(bin_roi)
-
-        if white_pixels > min_pixels_text:
-            # Inpainting direto com a máscara binária dilatada
-            # Voltamos a processar a ROI inteira para evitar artefatos de recorte (faixas)
-            cleaned_roi = cv2.inpaint(roi, bin_roi, 3, cv2.INPAINT_TELEA)
-            
-            # Se a densidade for 100%, não misturamos com o original para evitar fantasmas
-            if CLEAN_WEIGHT >= 1.0:
-                frame[band_top:band_bottom, band_left:band_right] = cleaned_roi
-            else:
-                blended_roi = cv2.addWeighted(cleaned_roi, CLEAN_WEIGHT, roi, ORIG_WEIGHT, 0)
-                frame[band_top:band_bottom, band_left:band_right] = blended_roi
-
-        writer.write(frame)
-
-        frame_idx += 1
-        if frame_idx % 10 == 0 or frame_idx == frame_count:
-            if progress_callback:
-                progress_callback((frame_idx / frame_count) * 100)
-            print(f"Processado {frame_idx}/{frame_count} frames...")
-
-    vid.release()
-    writer.release()
-
-    exec_time = time.time() - start_time
-
-    # ---------- CONVERSÃO PARA H.264 COM ÁUDIO ORIGINAL ---------- #
-    print("\nConvertendo para MP4 H.264 e copiando áudio original...")
-
-    # -i temp_output: vídeo processado (sem áudio)
-    # -i video_path: vídeo original (fonte do áudio)
-    # -c:v libx264: recodifica o vídeo
-    # -c:a copy: copia o áudio original sem reprocessar (rápido e sem perda)
-    # -map 0:v:0: pega o vídeo da primeira entrada (temp_output)
-    # -map 1:a:0: pega o áudio da segunda entrada (video_path)
-    # -shortest: garante que pare quando o menor stream acabar (evita loops)
-    
-    ffmpeg_cmd = (
-        f'ffmpeg -y -i "{temp_output}" -i "{video_path}" '
-        f'-map 0:v:0 -map 1:a:0? '  # O '?' evita erro se o vídeo original não tiver áudio
-        f'-c:v libx264 -pix_fmt yuv420p -preset veryfast '
-        f'-c:a copy -shortest '
-        f'"{final_output}"'
-    )
-
-    os.system(ffmpeg_cmd)
-    os.remove(temp_output)
-
-    print(f"\nVídeo final salvo em: {final_output}")
-    print(f"Tempo total: {exec_time:.2f} segundos")
-
-    return final_output, exec_time
-
+from VideoTextEngine import (CleanPreviewWorker, OutputCache, PreviewSource, band_from_fracs,
+                             calibrate_video, format_eta, list_videos, mask_overlay,
+                             process_video, run_batch)
 
 # ---------- INTERFACE GRÁFICA (TKINTER) ---------- #
 
@@ -156,13 +16,30 @@ selected_video_path = None
 preview_frame = None
 preview_img_tk = None
 rect_id = None
-preview_cap = None
+image_id = None
+preview_source = None
+preview_frame_idx = 0
+preview_key = None   # o que está desenhado agora (evita refazer a imagem à toa)
+redraw_job = None
+seek_job = None
+clean_worker = None
+clean_result = None     # último frame limpo recebido do worker
+clean_requested = None  # último pedido de frame limpo enviado
+clip_requested = None   # pedido de trecho antes/depois em andamento
+clip_job = None
+extra_regions = []      # regiões salvas com "Adicionar região" (além da faixa dos sliders)
+extra_rect_ids = []
 
 MAX_PREVIEW_W = 380
 MAX_PREVIEW_H = 450
+PREVIEW_OVERSAMPLE = 2  # frames do preview guardados em 2x o tamanho exibido (máscara mais fiel)
+REDRAW_DELAY_MS = 15    # junta vários movimentos de slider num redesenho só
+SEEK_DELAY_MS = 120     # o frame exato só é decodificado quando o slider para
+CLIP_FRAMES = 45        # tamanho do trecho antes/depois
 
 def choose_video():
-    global selected_video_path, preview_frame, preview_img_tk, rect_id, preview_cap
+    global selected_video_path, preview_frame, preview_source, preview_key
+    global clean_worker, clean_result, clean_requested, clip_requested
 
     file_path = filedialog.askopenfilename(
         title="Escolher vídeo",
@@ -177,38 +54,197 @@ def choose_video():
     selected_video_path = file_path
     label_video.config(text=f"Vídeo selecionado:\n{file_path}")
 
-    if preview_cap is not None:
-        preview_cap.release()
-    
-    preview_cap = cv2.VideoCapture(file_path)
-    if not preview_cap.isOpened():
+    if preview_source is not None:
+        preview_source.release()
+        preview_source = None
+    if clean_worker is not None:
+        clean_worker.close()
+        clean_worker = None
+
+    preview_size = (MAX_PREVIEW_W * PREVIEW_OVERSAMPLE, MAX_PREVIEW_H * PREVIEW_OVERSAMPLE)
+    try:
+        preview_source = PreviewSource(file_path, preview_size)
+        clean_worker = CleanPreviewWorker(
+            file_path, preview_size,
+            on_result=lambda result: root.after(0, lambda: receive_clean_result(result)))
+    except RuntimeError:
         messagebox.showerror("Erro", "Não foi possível abrir o vídeo.")
         return
 
-    total_frames = int(preview_cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    slider_seek.config(to=total_frames-1, state="normal")
+    preview_frame = None
+    preview_key = None
+    clean_result = clean_requested = clip_requested = None
+    btn_clip.config(text="Prévia antes/depois", state="normal")
+    slider_seek.config(to=max(0, preview_source.frame_count - 1), state="normal")
     slider_seek.set(0)
-    
-    seek_video(0)
+
+    show_exact_frame(0)
 
 def seek_video(val):
-    global preview_frame
-    if preview_cap is None:
+    """Mostra na hora o que estiver pronto (cache ou keyframe); o frame exato vem quando o slider para."""
+    global preview_frame, preview_frame_idx, seek_job
+    if preview_source is None:
         return
-    
+
     frame_no = int(float(val))
-    preview_cap.set(cv2.CAP_PROP_POS_FRAMES, frame_no)
-    ret, frame = preview_cap.read()
-    if ret:
-        preview_frame = frame
+    quick = preview_source.quick_frame(frame_no)
+    if quick is not None:
+        preview_frame_idx, preview_frame = quick
+        draw_band_rectangle()
+
+    if seek_job is not None:
+        root.after_cancel(seek_job)
+    if quick is None or quick[0] != frame_no:
+        seek_job = root.after(SEEK_DELAY_MS, lambda: show_exact_frame(frame_no))
+    else:
+        seek_job = None
+
+def show_exact_frame(frame_no):
+    global preview_frame, preview_frame_idx, seek_job
+    seek_job = None
+    if preview_source is None:
+        return
+    frame = preview_source.frame(frame_no)
+    if frame is not None:
+        preview_frame_idx, preview_frame = frame_no, frame
         draw_band_rectangle()
 
+def current_clean_params():
+    """Parâmetros atuais da limpeza (como no process_video) para o preview limpo, com as regiões salvas."""
+    return dict(
+        thresh_val=int(threshold_var.get()),
+        min_pixels_text=150,
+        clean_weight=density_var.get() / 100.0,
+        dilation_iter=int(dilation_var.get()),
+        use_edges=edges_var.get(),
+        tile_inpaint=tiles_var.get(),
+        regions=current_regions(),
+    )
+
+def current_region():
+    """Faixa dos sliders e ajustes atuais como uma região do process_video."""
+    return dict(
+        band=[band_top_var.get() / 100.0, band_bottom_var.get() / 100.0,
+              band_left_var.get() / 100.0, band_right_var.get() / 100.0],
+        thresh_val=int(threshold_var.get()),
+        clean_weight=density_var.get() / 100.0,
+        dilation_iter=int(dilation_var.get()),
+        use_edges=edges_var.get(),
+    )
+
+def current_regions():
+    """Regiões salvas + a faixa atual, ou None se só houver a faixa dos sliders."""
+    if not extra_regions:
+        return None
+    return extra_regions + [current_region()]
+
+def add_region():
+    """Guarda a faixa e os ajustes atuais como mais uma região e deixa os sliders livres para a próxima."""
+    region = current_region()
+    extra_regions.append(region)
+    top, bottom, left, right = (v * 100 for v in region["band"])
+    list_regions.insert("end", f"Y {top:.0f}-{bottom:.0f}% · X {left:.0f}-{right:.0f}% · "
+                               f"limiar {region['thresh_val']}")
+    draw_band_rectangle()
+
+def remove_region():
+    for i in reversed(list_regions.curselection()):
+        list_regions.delete(i)
+        del extra_regions[i]
+    draw_band_rectangle()
+
+def draw_extra_regions(canvas_w, canvas_h):
+    """Retângulos laranja das regiões salvas (o vermelho é a faixa dos sliders)."""
+    for item in extra_rect_ids:
+        canvas_preview.delete(item)
+    extra_rect_ids.clear()
+    for region in extra_regions:
+        top, bottom, left, right = region["band"]
+        extra_rect_ids.append(canvas_preview.create_rectangle(
+            int(canvas_w * left), int(canvas_h * top),
+            int(canvas_w * right), int(canvas_h * bottom),
+            outline="orange", width=2, dash=(4, 2)))
+
+def receive_clean_result(result):
+    global clean_result, clip_requested
+    request = (result["frame_idx"], result["params"], result["band_fracs"])
+    if result["clip_frames"] > 1:
+        if request != clip_requested:
+            return  # trecho de parâmetros antigos
+        clip_requested = None
+        btn_clip.config(text="Prévia antes/depois", state="normal")
+        play_clip(result["frames"], 0)
+    else:
+        clean_result = result
+        draw_band_rectangle()
+
+def preview_clip():
+    global clip_requested
+    if clean_worker is None or preview_frame is None:
+        messagebox.showwarning("Atenção", "Escolha um vídeo primeiro.")
+        return
+    band_fracs = (band_top_var.get() / 100.0, band_bottom_var.get() / 100.0,
+                  band_left_var.get() / 100.0, band_right_var.get() / 100.0)
+    params = current_clean_params()
+    clip_requested = (preview_frame_idx, params, band_fracs)
+    clean_worker.submit(preview_frame_idx, params, band_fracs, CLIP_FRAMES)
+    btn_clip.config(text="Gerando prévia...", state="disabled")
+
+def play_clip(frames, i):
+    """Toca o trecho com o original à esquerda e o resultado limpo à direita."""
+    global clip_job, preview_key
+    preview_key = None  # ao terminar, o preview normal é redesenhado
+    if i >= len(frames):
+        clip_job = None
+        draw_band_rectangle()
+        return
+    original, cleaned = frames[i]
+    half = original.shape[1] // 2
+    split = cleaned.copy()
+    split[:, :half] = original[:, :half]
+    split[:, half] = (255, 255, 255)
+    show_image(split)
+    clip_job = root.after(int(1000 / clean_worker.source.fps), lambda: play_clip(frames, i + 1))
+
+def show_image(frame):
+    """Mostra o frame (BGR) no canvas, reduzido para caber no preview."""
+    global image_id, preview_img_tk
+    h, w = frame.shape[:2]
+
+    # Redimensionar para o canvas mantendo aspecto
+    scale = min(MAX_PREVIEW_W / float(w), MAX_PREVIEW_H / float(h))
+    new_w = int(w * scale)
+    new_h = int(h * scale)
+
+    # Converte para exibir no Tkinter
+    frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_AREA)
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    preview_img_tk = ImageTk.PhotoImage(Image.fromarray(rgb))
+    if image_id is None:
+        image_id = canvas_preview.create_image(0, 0, anchor="nw", image=preview_img_tk)
+    else:
+        canvas_preview.itemconfig(image_id, image=preview_img_tk)
+    if rect_id is not None:
+        canvas_preview.tag_raise(rect_id)
+
 def draw_band_rectangle(*args):
-    global rect_id, preview_frame, preview_img_tk
+    """Agenda um redesenho; vários pedidos seguidos viram um só, com o estado mais recente."""
+    global redraw_job
+    if redraw_job is None:
+        redraw_job = root.after(REDRAW_DELAY_MS, render_preview)
+
+def render_preview():
+    global rect_id, preview_key, redraw_job, clip_job, clean_requested, clip_requested
+    redraw_job = None
 
     if preview_frame is None:
         return
 
+    # Qualquer mudança interrompe o trecho antes/depois que está tocando
+    if clip_job is not None:
+        root.after_cancel(clip_job)
+        clip_job = None
+
     canvas_w = canvas_preview.winfo_width()
     canvas_h = canvas_preview.winfo_height()
 
@@ -225,68 +261,49 @@ def draw_band_rectangle(*args):
         right_frac = left_frac + 0.02
         band_right_var.set(right_frac * 100)
 
-    # Verifica se deve mostrar o preview da máscara
-    show_mask = mask_preview_var.get()
-    
-    # Atualiza a imagem mostrada
-    if preview_frame is not None:
-        h, w = preview_frame.shape[:2]
-        canvas_w = canvas_preview.winfo_width()
-        canvas_h = canvas_preview.winfo_height()
-        
-        # Redimensionar para o canvas mantendo aspecto
-        scale = min(MAX_PREVIEW_W / float(w), MAX_PREVIEW_H / float(h))
-        new_w = int(w * scale)
-        new_h = int(h * scale)
-        
-        display_frame = preview_frame.copy()
-        
+    # Verifica se deve mostrar o resultado limpo ou o preview da máscara
+    show_clean = clean_preview_var.get() and clean_worker is not None
+    show_mask = mask_preview_var.get() and not show_clean
+    thresh_val = int(threshold_var.get())
+    dilation_iter = int(dilation_var.get())
+    use_edges = edges_var.get()
+
+    # Resultado limpo: calculado pelo worker; um pedido novo cancela o anterior
+    display_src = preview_frame
+    band_fracs = (top_frac, bottom_frac, left_frac, right_frac)
+    request = (preview_frame_idx, current_clean_params(), band_fracs)
+    if clip_requested is not None and clip_requested != request:
+        clip_requested = request
+        clean_worker.submit(preview_frame_idx, request[1], band_fracs, CLIP_FRAMES)
+    elif show_clean:
+        if clean_result is not None and request == (clean_result["frame_idx"], clean_result["params"],
+                                                    clean_result["band_fracs"]):
+            display_src = clean_result["frames"][0][1]
+        elif request != clean_requested:
+            clean_requested = request
+            clean_worker.submit(preview_frame_idx, request[1], band_fracs)
+
+    key = (id(display_src), show_mask)
+    if show_mask:
+        key += (top_frac, bottom_frac, left_frac, right_frac, thresh_val, dilation_iter, use_edges)
+
+    # Só refaz a imagem se o frame ou a máscara mudaram; mover a faixa sem a máscara só move o retângulo
+    if key != preview_key:
+        preview_key = key
+
         if show_mask:
-            # Calcula a máscara com os parâmetros atuais
-            roi_y1 = int(h * top_frac)
-            roi_y2 = int(h * bottom_frac)
-            roi_x1 = int(w * left_frac)
-            roi_x2 = int(w * right_frac)
-            
-            # Garante limites válidos
-            roi_y1 = max(0, min(roi_y1, h-1))
-            roi_y2 = max(roi_y1+1, min(roi_y2, h))
-            roi_x1 = max(0, min(roi_x1, w-1))
-            roi_x2 = max(roi_x1+1, min(roi_x2, w))
-            
-            roi = display_frame[roi_y1:roi_y2, roi_x1:roi_x2]
-            gray_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-            
-            # Parâmetros
-            thresh_val = int(threshold_var.get())
-            use_edges = edges_var.get()
-            dilation_iter = int(dilation_var.get())
-            
-            _, bin_roi = cv2.threshold(gray_roi, thresh_val, 255, cv2.THRESH_BINARY)
-            
-            if use_edges:
-                edges = cv2.Canny(gray_roi, 50, 150)
-                bin_roi = cv2.bitwise_or(bin_roi, edges)
-            
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-            bin_roi = cv2.morphologyEx(bin_roi, cv2.MORPH_CLOSE, kernel)
-            
-            if dilation_iter > 0:
-                bin_roi = cv2.dilate(bin_roi, kernel, iterations=dilation_iter)
-            
-            # Converte máscara para BGR (verde neon para destaque) onde for branco
-            mask_bgr = cv2.cvtColor(bin_roi, cv2.COLOR_GRAY2BGR)
-            # Pinta de verde onde detectou texto
-            mask_bgr[bin_roi == 255] = [0, 255, 0] 
-            
-            # Sobrepõe na ROI
-            display_frame[roi_y1:roi_y2, roi_x1:roi_x2] = mask_bgr
-
-        # Converte para exibir no Tkinter
-        rgb = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
-        img_pil = Image.fromarray(rgb).resize((new_w, new_h), Image.LANCZOS)
-        preview_img_tk = ImageTk.PhotoImage(img_pil)
-        canvas_preview.create_image(0, 0, anchor="nw", image=preview_img_tk)
+            # Mesma máscara do processamento, calculada no frame reduzido
+            # (dilatação proporcional à redução em relação ao vídeo original)
+            band = band_from_fracs(preview_frame.shape, top_frac, bottom_frac,
+                                   left_frac, right_frac)
+            display_frame = mask_overlay(preview_frame, band,
+                                         thresh_val=thresh_val,
+                                         dilation_iter=int(round(dilation_iter * preview_source.scale)),
+                                         use_edges=use_edges)
+        else:
+            display_frame = display_src
+
+        show_image(display_frame)
 
     y1 = int(canvas_h * top_frac)
     y2 = int(canvas_h * bottom_frac)
@@ -300,15 +317,57 @@ def draw_band_rectangle(*args):
         )
     else:
         canvas_preview.coords(rect_id, x1, y1, x2, y2)
+        canvas_preview.tag_raise(rect_id)
+    draw_extra_regions(canvas_w, canvas_h)
+
+def calibrate():
+    if not selected_video_path:
+        messagebox.showwarning("Atenção", "Escolha um vídeo primeiro.")
+        return
+
+    btn_calibrate.config(text="Calibrando...", state="disabled")
+    dilation = int(dilation_var.get())
+
+    def task():
+        try:
+            result = calibrate_video(selected_video_path, dilation_iter=dilation)
+            root.after(0, lambda: calibration_finished(result))
+        except Exception as e:
+            message = str(e)
+            root.after(0, lambda: calibration_finished(None, message))
+
+    threading.Thread(target=task, daemon=True).start()
+
+def calibration_finished(result, error=None):
+    btn_calibrate.config(text="Calibrar automaticamente", state="normal")
+    if error:
+        messagebox.showerror("Erro", f"Ocorreu um erro:\n{error}")
+        return
+    if result is None:
+        messagebox.showinfo("Calibração", "Nenhuma legenda encontrada nos frames amostrados.")
+        return
 
-def update_progress(val):
-    progress_var.set(val)
+    # Preenche os sliders com a faixa e o limiar sugeridos
+    top_frac, bottom_frac, left_frac, right_frac = result["band"]
+    band_top_var.set(top_frac * 100)
+    band_bottom_var.set(bottom_frac * 100)
+    band_left_var.set(left_frac * 100)
+    band_right_var.set(right_frac * 100)
+    threshold_var.set(result["thresh_val"])
+    draw_band_rectangle()
+
+def update_progress(event):
+    if event["percent"] is not None:  # vídeo sem total de frames conhecido
+        progress_var.set(event["percent"])
+    eta = format_eta(event["eta"]) if event["eta"] is not None else "--:--"
+    lbl_progress.config(text=f"{event['fps']:.1f} fps · ETA {eta}")
 
 def processing_finished(output_path, exec_time, error=None):
     btn_run.config(state="normal")
     btn_choose.config(state="normal")
     progress_var.set(0)
-    
+    lbl_progress.config(text="Progresso:")
+
     # Reabre o preview cap se necessário
     if selected_video_path:
         choose_video()
@@ -323,7 +382,7 @@ def processing_finished(output_path, exec_time, error=None):
             f"Tempo: {exec_time:.2f} s"
         )
 
-def batch_finished(total, errors):
+def batch_finished(total, errors, cache=None):
     btn_run.config(state="normal")
     btn_choose.config(state="normal")
     btn_batch.config(state="normal")
@@ -334,12 +393,23 @@ def batch_finished(total, errors):
     else:
         label_video.config(text="Nenhum vídeo selecionado.")
 
+    cached = f"\n\n{cache.hits} reaproveitados do cache, {cache.misses} processados." if cache else ""
     if errors:
         msg = f"Processamento concluído com {len(errors)} erros:\n" + "\n".join(errors[:5])
         if len(errors) > 5: msg += "\n..."
-        messagebox.showwarning("Concluído com Erros", msg)
+        messagebox.showwarning("Concluído com Erros", msg + cached)
     else:
-        messagebox.showinfo("Concluído", f"Todos os {total} vídeos foram processados com sucesso!")
+        messagebox.showinfo("Concluído", f"Todos os {total} vídeos foram processados com sucesso!" + cached)
+
+def update_batch_progress(status):
+    progress_var.set(status["percent"])
+
+    eta = format_eta(status["eta"]) if status["eta"] is not None else "--:--"
+    lines = [f"Lote: {status['done']}/{status['total']} vídeos · "
+             f"{status['fps']:.1f} fps · ETA {eta}"]
+    for name, pct in sorted(status["active"].items()):
+        lines.append(f"{name}: {pct:.0f}%")
+    label_video.config(text="\n".join(lines))
 
 def run_batch_processing():
     folder_path = filedialog.askdirectory(title="Escolher Pasta para Processamento em Lote")
@@ -347,17 +417,31 @@ def run_batch_processing():
         return
 
     # Parâmetros
-    top_frac = band_top_var.get() / 100.0
-    bottom_frac = band_bottom_var.get() / 100.0
-    left_frac = band_left_var.get() / 100.0
-    right_frac = band_right_var.get() / 100.0
-    thresh = int(threshold_var.get())
-    dilation = int(dilation_var.get())
-    use_canny = edges_var.get()
-    density = density_var.get() / 100.0
+    params = dict(
+        band_top_frac=band_top_var.get() / 100.0,
+        band_bottom_frac=band_bottom_var.get() / 100.0,
+        band_left_frac=band_left_var.get() / 100.0,
+        band_right_frac=band_right_var.get() / 100.0,
+        thresh_val=int(threshold_var.get()),
+        min_pixels_text=150,
+        clean_weight=density_var.get() / 100.0,
+        dilation_iter=int(dilation_var.get()),
+        use_edges=edges_var.get(),
+        direct_ffmpeg=direct_var.get(),
+        tile_inpaint=tiles_var.get(),
+        temporal_cache=cache_var.get(),
+        subtitle_index=index_var.get(),
+        mask_scale=mask_scale_var.get() / 100.0,
+        fill_engine="temporal" if fill_var.get() else "telea",
+        auto_calibrate=auto_var.get(),
+        resume=resume_var.get(),
+        smart_copy=smart_var.get(),
+        regions=current_regions(),
+    )
+    jobs = int(jobs_var.get())
+    cache = OutputCache() if reuse_var.get() else None
 
-    video_extensions = {".mp4", ".avi", ".mkv", ".mov"}
-    files = [f for f in os.listdir(folder_path) if os.path.splitext(f)[1].lower() in video_extensions]
+    files = list_videos(folder_path)
 
     if not files:
         messagebox.showwarning("Aviso", "Nenhum vídeo encontrado na pasta.")
@@ -368,39 +452,20 @@ def run_batch_processing():
     btn_batch.config(state="disabled")
     
     # Fecha preview
-    if preview_cap is not None:
-        preview_cap.release()
+    if preview_source is not None:
+        preview_source.release()
 
     def task():
-        errors = []
-        total = len(files)
-        
-        for i, filename in enumerate(files):
-            full_path = os.path.join(folder_path, filename)
-            
-            # Atualiza UI
-            msg = f"Processando {i+1}/{total}: {filename}"
-            root.after(0, lambda m=msg: label_video.config(text=m))
-            
-            try:
-                process_video(
-                    full_path,
-                    band_top_frac=top_frac,
-                    band_bottom_frac=bottom_frac,
-                    band_left_frac=left_frac,
-                    band_right_frac=right_frac,
-                    thresh_val=thresh,
-                    min_pixels_text=150,
-                    clean_weight=density,
-                    dilation_iter=dilation,
-                    use_edges=use_canny,
-                    progress_callback=lambda v: root.after(0, lambda: update_progress(v))
-                )
-            except Exception as e:
-                errors.append(f"{filename}: {e}")
-                print(f"Erro em {filename}: {e}")
+        try:
+            _, errors = run_batch(
+                files, params, jobs=jobs,
+                progress_callback=lambda st: root.after(0, lambda: update_batch_progress(st)),
+                cache=cache
+            )
+        except Exception as e:
+            errors = [str(e)]
         
-        root.after(0, lambda: batch_finished(total, errors))
+        root.after(0, lambda: batch_finished(len(files), errors, cache))
 
     threading.Thread(target=task, daemon=True).start()
 
@@ -428,13 +493,25 @@ def run_processing():
         return
 
     density = density_var.get() / 100.0
+    workers = int(workers_var.get())
+    direct = direct_var.get()
+    processes = int(processes_var.get())
+    tiles = tiles_var.get()
+    use_cache = cache_var.get()
+    use_index = index_var.get()
+    mask_scale = mask_scale_var.get() / 100.0
+    fill_engine = "temporal" if fill_var.get() else "telea"
+    auto_calibrate = auto_var.get()
+    resume = resume_var.get()
+    smart_copy = smart_var.get()
+    regions = current_regions()
 
     btn_run.config(state="disabled")
     btn_choose.config(state="disabled")
     
     # Fecha preview para liberar arquivo
-    if preview_cap is not None:
-        preview_cap.release()
+    if preview_source is not None:
+        preview_source.release()
 
     def task():
         try:
@@ -449,7 +526,19 @@ def run_processing():
                 clean_weight=density,
                 dilation_iter=dilation,
                 use_edges=use_canny,
-                progress_callback=lambda v: root.after(0, lambda: update_progress(v))
+                progress_callback=lambda ev: root.after(0, lambda: update_progress(ev)),
+                workers=workers,
+                direct_ffmpeg=direct,
+                processes=processes,
+                tile_inpaint=tiles,
+                temporal_cache=use_cache,
+                subtitle_index=use_index,
+                mask_scale=mask_scale,
+                fill_engine=fill_engine,
+                auto_calibrate=auto_calibrate,
+                resume=resume,
+                smart_copy=smart_copy,
+                regions=regions
             )
             root.after(0, lambda: processing_finished(output_path, exec_time))
         except Exception as e:
@@ -460,143 +549,253 @@ def run_processing():
 
 # ---------- CRIA JANELA ---------- #
 
-root = tk.Tk()
-root.title("Removedor de Legendas 9:16 (Inpainting)")
-
-root.geometry("1000x750")
-root.resizable(True, True)
-
-title_label = tk.Label(root, text="Removedor de Legendas 9:16", font=("Arial", 16, "bold"))
-title_label.pack(pady=5)
-
-frame_top = tk.Frame(root)
-frame_top.pack(pady=5)
-
-btn_choose = tk.Button(frame_top, text="Escolher vídeo...", command=choose_video, width=20)
-btn_choose.grid(row=0, column=0, padx=10)
-
-btn_run = tk.Button(frame_top, text="Remover legenda", command=run_processing, width=20)
-btn_run.grid(row=0, column=1, padx=10)
-
-btn_batch = tk.Button(frame_top, text="Processar Pasta (Batch)", command=run_batch_processing, width=20, bg="#dddddd")
-btn_batch.grid(row=0, column=2, padx=10)
-
-label_video = tk.Label(root, text="Nenhum vídeo selecionado.", wraplength=860, justify="center")
-label_video.pack(pady=5)
-
-frame_middle = tk.Frame(root)
-frame_middle.pack(pady=5, fill="x")
-
-frame_left = tk.Frame(frame_middle)
-frame_left.pack(side="left", padx=10, pady=5)
-
-canvas_preview = tk.Canvas(frame_left, width=MAX_PREVIEW_W, height=MAX_PREVIEW_H, bg="black")
-canvas_preview.pack(side="top")
-
-slider_seek = tk.Scale(frame_left, from_=0, to=100, orient="horizontal", command=seek_video, state="disabled", label="Navegar no Vídeo")
-slider_seek.pack(fill="x", pady=5)
-
-frame_controls = tk.Frame(frame_middle)
-frame_controls.pack(side="left", padx=20, pady=5, fill="y")
-
-band_top_var = tk.DoubleVar(value=55.0)
-band_bottom_var = tk.DoubleVar(value=95.0)
-band_left_var = tk.DoubleVar(value=0.0)
-band_right_var = tk.DoubleVar(value=100.0)
-
-threshold_var = tk.DoubleVar(value=230.0)
-dilation_var = tk.DoubleVar(value=10.0)
-density_var = tk.DoubleVar(value=75.0)
-edges_var = tk.BooleanVar(value=False)
-mask_preview_var = tk.BooleanVar(value=False)
-
-# --- Sliders de Área ---
-label_area = tk.Label(frame_controls, text="Área de Remoção", font=("Arial", 10, "bold"))
-label_area.pack(pady=(0, 5))
-
-frame_sliders_area = tk.Frame(frame_controls)
-frame_sliders_area.pack(fill="x")
-
-# Top
-tk.Label(frame_sliders_area, text="Topo Y%").pack(anchor="w")
-slider_top = tk.Scale(frame_sliders_area, from_=0, to=100,
-                      orient="horizontal", variable=band_top_var,
-                      command=draw_band_rectangle)
-slider_top.pack(fill="x")
-
-# Bottom
-tk.Label(frame_sliders_area, text="Base Y%").pack(anchor="w")
-slider_bottom = tk.Scale(frame_sliders_area, from_=0, to=100,
-                         orient="horizontal", variable=band_bottom_var,
-                         command=draw_band_rectangle)
-slider_bottom.pack(fill="x")
-
-# Left
-tk.Label(frame_sliders_area, text="Esq X%").pack(anchor="w")
-slider_left = tk.Scale(frame_sliders_area, from_=0, to=100,
-                      orient="horizontal", variable=band_left_var,
-                      command=draw_band_rectangle)
-slider_left.pack(fill="x")
-
-# Right
-tk.Label(frame_sliders_area, text="Dir X%").pack(anchor="w")
-slider_right = tk.Scale(frame_sliders_area, from_=0, to=100,
-                         orient="horizontal", variable=band_right_var,
-                         command=draw_band_rectangle)
-slider_right.pack(fill="x")
-
-# --- Sliders de Ajuste ---
-label_adjust = tk.Label(frame_controls, text="Ajustes Finos", font=("Arial", 10, "bold"))
-label_adjust.pack(pady=(15, 5))
-
-# Threshold
-tk.Label(frame_controls, text="Limiar de Brilho (0-255)").pack(anchor="w")
-slider_thresh = tk.Scale(frame_controls, from_=0, to=255,
-                         orient="horizontal", variable=threshold_var,
-                         command=draw_band_rectangle)
-slider_thresh.pack(fill="x")
-
-# Dilatação
-tk.Label(frame_controls, text="Espessura Máscara").pack(anchor="w")
-slider_dilation = tk.Scale(frame_controls, from_=0, to=50,
-                           orient="horizontal", variable=dilation_var,
-                           command=draw_band_rectangle)
-slider_dilation.pack(fill="x")
-
-# Reforço de Bordas
-check_edges = tk.Checkbutton(frame_controls, text="Reforçar Bordas (Canny)", variable=edges_var,
+if __name__ == "__main__":
+    # Necessário para o ProcessPoolExecutor no executável do PyInstaller
+    multiprocessing.freeze_support()
+
+    root = tk.Tk()
+    root.title("Removedor de Legendas 9:16 (Inpainting)")
+
+    root.geometry("1000x750")
+    root.resizable(True, True)
+
+    title_label = tk.Label(root, text="Removedor de Legendas 9:16", font=("Arial", 16, "bold"))
+    title_label.pack(pady=5)
+
+    frame_top = tk.Frame(root)
+    frame_top.pack(pady=5)
+
+    btn_choose = tk.Button(frame_top, text="Escolher vídeo...", command=choose_video, width=20)
+    btn_choose.grid(row=0, column=0, padx=10)
+
+    btn_run = tk.Button(frame_top, text="Remover legenda", command=run_processing, width=20)
+    btn_run.grid(row=0, column=1, padx=10)
+
+    btn_batch = tk.Button(frame_top, text="Processar Pasta (Batch)", command=run_batch_processing, width=20, bg="#dddddd")
+    btn_batch.grid(row=0, column=2, padx=10)
+
+    label_video = tk.Label(root, text="Nenhum vídeo selecionado.", wraplength=860, justify="center")
+    label_video.pack(pady=5)
+
+    frame_middle = tk.Frame(root)
+    frame_middle.pack(pady=5, fill="x")
+
+    frame_left = tk.Frame(frame_middle)
+    frame_left.pack(side="left", padx=10, pady=5)
+
+    canvas_preview = tk.Canvas(frame_left, width=MAX_PREVIEW_W, height=MAX_PREVIEW_H, bg="black")
+    canvas_preview.pack(side="top")
+
+    slider_seek = tk.Scale(frame_left, from_=0, to=100, orient="horizontal", command=seek_video, state="disabled", label="Navegar no Vídeo")
+    slider_seek.pack(fill="x", pady=5)
+
+    frame_controls = tk.Frame(frame_middle)
+    frame_controls.pack(side="left", padx=20, pady=5, fill="y")
+
+    band_top_var = tk.DoubleVar(value=55.0)
+    band_bottom_var = tk.DoubleVar(value=95.0)
+    band_left_var = tk.DoubleVar(value=0.0)
+    band_right_var = tk.DoubleVar(value=100.0)
+
+    threshold_var = tk.DoubleVar(value=230.0)
+    dilation_var = tk.DoubleVar(value=10.0)
+    density_var = tk.DoubleVar(value=75.0)
+    edges_var = tk.BooleanVar(value=False)
+    mask_preview_var = tk.BooleanVar(value=False)
+    clean_preview_var = tk.BooleanVar(value=False)
+    direct_var = tk.BooleanVar(value=True)
+    tiles_var = tk.BooleanVar(value=True)
+    cache_var = tk.BooleanVar(value=False)
+    index_var = tk.BooleanVar(value=False)
+    mask_scale_var = tk.DoubleVar(value=100.0)
+    fill_var = tk.BooleanVar(value=False)
+    auto_var = tk.BooleanVar(value=False)
+    resume_var = tk.BooleanVar(value=False)
+    smart_var = tk.BooleanVar(value=False)
+    reuse_var = tk.BooleanVar(value=True)
+    processes_var = tk.IntVar(value=1)
+    jobs_var = tk.IntVar(value=max(1, (os.cpu_count() or 1) // 2))
+    workers_var = tk.IntVar(value=max(1, (os.cpu_count() or 1) - 1))
+
+    # --- Sliders de Área ---
+    label_area = tk.Label(frame_controls, text="Área de Remoção", font=("Arial", 10, "bold"))
+    label_area.pack(pady=(0, 5))
+
+    frame_sliders_area = tk.Frame(frame_controls)
+    frame_sliders_area.pack(fill="x")
+
+    # Top
+    tk.Label(frame_sliders_area, text="Topo Y%").pack(anchor="w")
+    slider_top = tk.Scale(frame_sliders_area, from_=0, to=100,
+                          orient="horizontal", variable=band_top_var,
+                          command=draw_band_rectangle)
+    slider_top.pack(fill="x")
+
+    # Bottom
+    tk.Label(frame_sliders_area, text="Base Y%").pack(anchor="w")
+    slider_bottom = tk.Scale(frame_sliders_area, from_=0, to=100,
+                             orient="horizontal", variable=band_bottom_var,
+                             command=draw_band_rectangle)
+    slider_bottom.pack(fill="x")
+
+    # Left
+    tk.Label(frame_sliders_area, text="Esq X%").pack(anchor="w")
+    slider_left = tk.Scale(frame_sliders_area, from_=0, to=100,
+                          orient="horizontal", variable=band_left_var,
+                          command=draw_band_rectangle)
+    slider_left.pack(fill="x")
+
+    # Right
+    tk.Label(frame_sliders_area, text="Dir X%").pack(anchor="w")
+    slider_right = tk.Scale(frame_sliders_area, from_=0, to=100,
+                             orient="horizontal", variable=band_right_var,
                              command=draw_band_rectangle)
-check_edges.pack(pady=5, anchor="w")
-
-# Preview de Máscara (NOVO)
-check_mask = tk.Checkbutton(frame_controls, text="VER O QUE SERÁ APAGADO (Verde)", variable=mask_preview_var,
-                            command=draw_band_rectangle, fg="green", font=("Arial", 9, "bold"))
-check_mask.pack(pady=5, anchor="w")
-
-# Densidade
-tk.Label(frame_controls, text="Opacidade Remoção (%)").pack(anchor="w")
-slider_density = tk.Scale(frame_controls, from_=0, to=100,
-                          orient="horizontal", variable=density_var)
-slider_density.pack(fill="x")
-
-info_label = tk.Label(
-    root,
-    text=("Ajuste a área da legenda e a densidade do apagamento.\n"
-          "O vídeo final será salvo em MP4 H.264 (compatível com Chrome)."),
-    font=("Arial", 9),
-    justify="center"
-)
-info_label.pack(pady=5)
-
-# --- Barra de Progresso ---
-progress_var = tk.DoubleVar()
-frame_bottom = tk.Frame(root)
-frame_bottom.pack(side="bottom", fill="x", padx=10, pady=10)
-
-lbl_progress = tk.Label(frame_bottom, text="Progresso:")
-lbl_progress.pack(side="left")
-
-progress_bar = ttk.Progressbar(frame_bottom, variable=progress_var, maximum=100)
-progress_bar.pack(side="left", fill="x", expand=True, padx=10)
-
-root.mainloop()
+    slider_right.pack(fill="x")
+
+    # Várias áreas (ex.: legenda embaixo e @ no topo) na mesma passada pelo vídeo
+    frame_regions = tk.Frame(frame_sliders_area)
+    frame_regions.pack(fill="x", pady=(5, 0))
+    btn_add_region = tk.Button(frame_regions, text="Adicionar região", command=add_region)
+    btn_add_region.pack(side="left")
+    btn_remove_region = tk.Button(frame_regions, text="Remover região", command=remove_region)
+    btn_remove_region.pack(side="left", padx=5)
+    list_regions = tk.Listbox(frame_sliders_area, height=3, selectmode="extended")
+    list_regions.pack(fill="x")
+
+    # Faixa e limiar a partir de alguns frames do vídeo
+    btn_calibrate = tk.Button(frame_sliders_area, text="Calibrar automaticamente", command=calibrate)
+    btn_calibrate.pack(pady=5, anchor="w")
+
+    # No lote cada vídeo tem a sua legenda: calibra um por um
+    check_auto = tk.Checkbutton(frame_sliders_area, text="Calibrar cada vídeo ao processar (lote)",
+                                variable=auto_var)
+    check_auto.pack(anchor="w")
+
+    # --- Sliders de Ajuste ---
+    label_adjust = tk.Label(frame_controls, text="Ajustes Finos", font=("Arial", 10, "bold"))
+    label_adjust.pack(pady=(15, 5))
+
+    # Threshold
+    tk.Label(frame_controls, text="Limiar de Brilho (0-255)").pack(anchor="w")
+    slider_thresh = tk.Scale(frame_controls, from_=0, to=255,
+                             orient="horizontal", variable=threshold_var,
+                             command=draw_band_rectangle)
+    slider_thresh.pack(fill="x")
+
+    # Dilatação
+    tk.Label(frame_controls, text="Espessura Máscara").pack(anchor="w")
+    slider_dilation = tk.Scale(frame_controls, from_=0, to=50,
+                               orient="horizontal", variable=dilation_var,
+                               command=draw_band_rectangle)
+    slider_dilation.pack(fill="x")
+
+    # Reforço de Bordas
+    check_edges = tk.Checkbutton(frame_controls, text="Reforçar Bordas (Canny)", variable=edges_var,
+                                 command=draw_band_rectangle)
+    check_edges.pack(pady=5, anchor="w")
+
+    # Preview de Máscara (NOVO)
+    check_mask = tk.Checkbutton(frame_controls, text="VER O QUE SERÁ APAGADO (Verde)", variable=mask_preview_var,
+                                command=draw_band_rectangle, fg="green", font=("Arial", 9, "bold"))
+    check_mask.pack(pady=5, anchor="w")
+
+    # Preview do resultado limpo (calculado em segundo plano, na resolução do preview)
+    check_clean = tk.Checkbutton(frame_controls, text="VER RESULTADO LIMPO", variable=clean_preview_var,
+                                 command=draw_band_rectangle, fg="blue", font=("Arial", 9, "bold"))
+    check_clean.pack(pady=5, anchor="w")
+
+    btn_clip = tk.Button(frame_controls, text="Prévia antes/depois", command=preview_clip)
+    btn_clip.pack(pady=5, anchor="w")
+
+    # Densidade
+    tk.Label(frame_controls, text="Opacidade Remoção (%)").pack(anchor="w")
+    slider_density = tk.Scale(frame_controls, from_=0, to=100,
+                              orient="horizontal", variable=density_var,
+                              command=draw_band_rectangle)
+    slider_density.pack(fill="x")
+
+    # Threads de limpeza (modo pipeline quando > 1)
+    tk.Label(frame_controls, text="Threads de Processamento").pack(anchor="w")
+    slider_workers = tk.Scale(frame_controls, from_=1, to=max(1, os.cpu_count() or 1),
+                              orient="horizontal", variable=workers_var)
+    slider_workers.pack(fill="x")
+
+    # Processos (divide vídeos longos em trechos)
+    tk.Label(frame_controls, text="Processos (vídeos longos)").pack(anchor="w")
+    slider_processes = tk.Scale(frame_controls, from_=1, to=max(1, os.cpu_count() or 1),
+                                orient="horizontal", variable=processes_var)
+    slider_processes.pack(fill="x")
+
+    # Vídeos simultâneos no processamento em lote
+    tk.Label(frame_controls, text="Vídeos Simultâneos (Lote)").pack(anchor="w")
+    slider_jobs = tk.Scale(frame_controls, from_=1, to=max(1, os.cpu_count() or 1),
+                           orient="horizontal", variable=jobs_var)
+    slider_jobs.pack(fill="x")
+
+    # Codificação direta no ffmpeg (sem AVI temporário)
+    check_direct = tk.Checkbutton(frame_controls, text="Enviar direto ao ffmpeg (sem AVI temporário)",
+                                  variable=direct_var)
+    check_direct.pack(pady=5, anchor="w")
+
+    # Inpainting só ao redor do texto detectado
+    check_tiles = tk.Checkbutton(frame_controls, text="Inpainting só nas áreas de texto",
+                                 variable=tiles_var, command=draw_band_rectangle)
+    check_tiles.pack(pady=5, anchor="w")
+
+    # Reaproveita o inpainting enquanto a mesma legenda fica na tela
+    check_cache = tk.Checkbutton(frame_controls, text="Reaproveitar frames com a mesma legenda",
+                                 variable=cache_var)
+    check_cache.pack(pady=5, anchor="w")
+
+    # Pré-análise: pula frames sem legenda (índice salvo ao lado do vídeo)
+    check_index = tk.Checkbutton(frame_controls, text="Pré-analisar e pular frames sem legenda",
+                                 variable=index_var)
+    check_index.pack(pady=5, anchor="w")
+
+    # Escala da detecção (máscara calculada em resolução reduzida)
+    tk.Label(frame_controls, text="Escala da Detecção (%)").pack(anchor="w")
+    slider_mask_scale = tk.Scale(frame_controls, from_=25, to=100, resolution=25,
+                                 orient="horizontal", variable=mask_scale_var)
+    slider_mask_scale.pack(fill="x")
+
+    # Preenche com pixels de frames vizinhos (cenas paradas); TELEA só onde faltar
+    check_fill = tk.Checkbutton(frame_controls, text="Preencher com frames vizinhos (cenas paradas)",
+                                variable=fill_var)
+    check_fill.pack(pady=5, anchor="w")
+
+    # Segmentos com manifesto: se cair no meio, processar de novo continua de onde parou
+    check_resume = tk.Checkbutton(frame_controls, text="Retomar de onde parou (vídeos longos)",
+                                  variable=resume_var)
+    check_resume.pack(pady=5, anchor="w")
+
+    # H.264: só os GOPs com legenda são recodificados, o resto é copiado sem perda
+    check_smart = tk.Checkbutton(frame_controls, text="Recodificar só os trechos com legenda (H.264)",
+                                 variable=smart_var)
+    check_smart.pack(pady=5, anchor="w")
+
+    # Lote: vídeo já processado com os mesmos parâmetros sai do cache, sem processar de novo
+    check_reuse = tk.Checkbutton(frame_controls, text="Reaproveitar vídeos já processados (lote)",
+                                 variable=reuse_var)
+    check_reuse.pack(pady=5, anchor="w")
+
+    info_label = tk.Label(
+        root,
+        text=("Ajuste a área da legenda e a densidade do apagamento.\n"
+              "O vídeo final será salvo em MP4 H.264 (compatível com Chrome)."),
+        font=("Arial", 9),
+        justify="center"
+    )
+    info_label.pack(pady=5)
+
+    # --- Barra de Progresso ---
+    progress_var = tk.DoubleVar()
+    frame_bottom = tk.Frame(root)
+    frame_bottom.pack(side="bottom", fill="x", padx=10, pady=10)
+
+    lbl_progress = tk.Label(frame_bottom, text="Progresso:")
+    lbl_progress.pack(side="left")
+
+    progress_bar = ttk.Progressbar(frame_bottom, variable=progress_var, maximum=100)
+    progress_bar.pack(side="left", fill="x", expand=True, padx=10)
+
+    root.mainloop()